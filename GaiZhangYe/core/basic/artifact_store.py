@@ -0,0 +1,253 @@
+# GaiZhangYe/core/basic/artifact_store.py
+"""
+内容寻址的产物缓存：按"输入内容摘要 + 处理参数"生成键，缓存处理结果文件
+- 索引保存在SQLite中，记录大小与最近访问时间，超出容量上限时按LRU淘汰
+- 写入先落到临时文件再原子替换，多个进程/工作者可安全共享同一缓存目录
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import record_cache_lookup
+from GaiZhangYe.core.basic.file_manager import get_file_manager
+from GaiZhangYe.core.basic.file_processor import compute_file_hash
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_last_access ON artifacts (last_access);
+"""
+
+
+def make_cache_key(content_hash: str, options: Optional[dict] = None) -> str:
+    """由输入内容摘要与处理参数生成缓存键（参数按键排序后序列化，顺序无关）"""
+    payload = json.dumps({"content": content_hash, "options": options or {}}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """内容寻址的文件缓存（LRU淘汰，容量上限按字节计）"""
+
+    def __init__(self, root_dir: Path, max_bytes: int, suffix: str = ""):
+        """
+        :param root_dir: 缓存目录
+        :param max_bytes: 缓存总容量上限（字节），<=0表示不缓存
+        :param suffix: 缓存文件的扩展名（如".pdf"）
+        """
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root_dir / "index.sqlite3"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在退出时提交、关闭"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _artifact_path(self, key: str) -> Path:
+        return self.root_dir / key[:2] / f"{key}{self.suffix}"
+
+    def contains(self, key: str) -> bool:
+        """是否存在缓存（不更新访问时间）"""
+        return self._artifact_path(key).exists()
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        """
+        将缓存产物复制到目标路径
+        :return: 命中返回True，未命中返回False
+        """
+        artifact = self._artifact_path(key)
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(artifact, dest)
+        except FileNotFoundError:
+            record_cache_lookup(self.root_dir.name, False)
+            return False
+        except Exception as e:
+            logger.warning(f"读取缓存失败：{key} - {e}")
+            record_cache_lookup(self.root_dir.name, False)
+            return False
+        record_cache_lookup(self.root_dir.name, True)
+
+        try:
+            with self._connect() as conn:
+                conn.execute("UPDATE artifacts SET last_access = ? WHERE key = ?", (time.time(), key))
+        except Exception as e:
+            logger.warning(f"更新缓存访问时间失败：{key} - {e}")
+        return True
+
+    def open_path(self, key: str) -> Optional[Path]:
+        """返回缓存产物的路径并更新访问时间（只读使用；可能随后被淘汰，调用方需容忍文件消失）"""
+        artifact = self._artifact_path(key)
+        exists = artifact.exists()
+        record_cache_lookup(self.root_dir.name, exists)
+        if not exists:
+            return None
+        try:
+            with self._connect() as conn:
+                conn.execute("UPDATE artifacts SET last_access = ? WHERE key = ?", (time.time(), key))
+        except Exception as e:
+            logger.warning(f"更新缓存访问时间失败：{key} - {e}")
+        return artifact
+
+    def put(self, key: str, src: Path) -> None:
+        """将文件存入缓存（超出容量时淘汰最久未使用的产物；单个文件超过上限时不缓存）"""
+        if self.max_bytes <= 0 or not src.exists():
+            return
+        size = src.stat().st_size
+        if size > self.max_bytes:
+            logger.debug(f"文件超过缓存容量上限，不缓存：{src}")
+            return
+
+        artifact = self._artifact_path(key)
+        try:
+            artifact.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(dir=artifact.parent, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(src, temp_name)
+                os.replace(temp_name, artifact)
+            except Exception:
+                if os.path.exists(temp_name):
+                    os.unlink(temp_name)
+                raise
+
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT OR REPLACE INTO artifacts (key, size, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, size, now, now),
+                )
+                evicted = self._evict(conn)
+            for evicted_key in evicted:
+                self._remove_file(evicted_key)
+            logger.debug(f"已写入缓存：{key}（{size}字节，淘汰{len(evicted)}项）")
+        except Exception as e:
+            logger.warning(f"写入缓存失败：{src} - {e}")
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        """将字节内容存入缓存"""
+        fd, temp_name = tempfile.mkstemp(dir=self.root_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self.put(key, Path(temp_name))
+        finally:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+
+    def _evict(self, conn: sqlite3.Connection) -> list:
+        """按最近访问时间淘汰，直至总大小不超过上限；返回被淘汰的键"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        evicted = []
+        if total <= self.max_bytes:
+            return evicted
+        for key, size in conn.execute("SELECT key, size FROM artifacts ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+            total -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove_file(self, key: str) -> None:
+        try:
+            self._artifact_path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"删除缓存文件失败：{key} - {e}")
+
+    def stats(self) -> Tuple[int, int]:
+        """返回(缓存项数, 总字节数)"""
+        with self._connect() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        return count, total
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute("SELECT key FROM artifacts").fetchall()]
+            conn.execute("DELETE FROM artifacts")
+        for key in keys:
+            self._remove_file(key)
+
+
+# 模块级单例（按命名空间区分不同类型的产物）
+_stores: Dict[str, ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store(namespace: str, max_bytes: int, suffix: str = "") -> ArtifactStore:
+    """返回 business_data/.cache/<namespace> 下的产物缓存单例"""
+    store = _stores.get(namespace)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(namespace)
+            if store is None:
+                store = ArtifactStore(get_file_manager().get_cache_dir(namespace), max_bytes, suffix)
+                _stores[namespace] = store
+    return store
+
+
+def get_conversion_cache() -> Optional[ArtifactStore]:
+    """Word→PDF转换缓存（配置关闭时返回None）"""
+    settings = get_settings()
+    if not settings.conversion_cache_enabled:
+        return None
+    return get_artifact_store("pdf", settings.conversion_cache_max_bytes, ".pdf")
+
+
+def conversion_options(page_range: Optional[Tuple[int, int]] = None) -> dict:
+    """Word→PDF的导出参数（与 WordProcessor._export_pdf 的参数保持一致），参与缓存键与增量转换清单"""
+    return {
+        "format": "pdf",
+        "clean": True,  # 导出前接受修订并删除注释
+        "item": 0,
+        "bookmarks": 1,
+        "range": list(page_range) if page_range else None,
+    }
+
+
+def conversion_cache_key(word_path: Path, page_range: Optional[Tuple[int, int]] = None,
+                         content_hash: Optional[str] = None) -> str:
+    """
+    Word→PDF转换的缓存键：文档内容摘要 + 导出参数
+    :param page_range: 导出的页码范围，默认整篇
+    :param content_hash: 已计算好的文档摘要（同一文档生成多个键时避免重复读取文件）
+    """
+    return make_cache_key(content_hash or compute_file_hash(word_path), conversion_options(page_range))
+
+
+def get_image_cache() -> Optional[ArtifactStore]:
+    """盖章图片缩放/清理结果的缓存（容量配置为0时返回None）；不同格式的产物共用，扩展名由使用方决定"""
+    max_bytes = get_settings().image_cache_max_bytes
+    if max_bytes <= 0:
+        return None
+    return get_artifact_store("images", max_bytes)
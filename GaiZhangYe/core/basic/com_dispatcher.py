@@ -0,0 +1,143 @@
+# GaiZhangYe/core/basic/com_dispatcher.py
+"""
+Word COM调度器：固定数量的常驻STA线程，每个线程启动时初始化一次COM单元，并独占一个常驻Word实例
+- 提交到调度器的是单次Word操作（打开-转换-关闭一个文档、计算一个文档的页数、一个文档的盖章会话），
+  由空闲的调度线程按提交顺序执行；后台任务在自己的线程中运行，只在需要Word时逐次提交，
+  多个任务与扫描、预览等请求的Word操作交替执行，不会由一个任务长期占用调度线程
+- 任务中创建的WordProcessor共用所在线程的Word实例（首次使用时启动），任务结束不退出Word，避免反复启动
+- 任务失败后检查Word实例是否仍可用（如Word进程崩溃），不可用时下次使用时重新启动
+- 未启动调度器时（命令行、开发服务器），run_with_word直接在当前线程执行，行为与之前一致
+"""
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, TypeVar
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import gauge
+from GaiZhangYe.core.basic.word_processor import (
+    check_resident_word_app,
+    enable_resident_word_app,
+    release_resident_word_app,
+)
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class ComDispatcher:
+    """固定数量的COM调度线程（STA），任务按提交顺序执行"""
+
+    def __init__(self, threads: int = 1):
+        self._tasks: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._local = threading.local()
+        self._threads: List[threading.Thread] = []
+        for i in range(max(1, threads)):
+            thread = threading.Thread(target=self._worker, name=f"com-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"COM调度器已启动：{len(self._threads)}个常驻Word线程")
+
+    @property
+    def threads(self) -> int:
+        return len(self._threads)
+
+    @property
+    def pending(self) -> int:
+        """排队等待执行的任务数"""
+        return self._tasks.qsize()
+
+    def in_worker_thread(self) -> bool:
+        """当前线程是否为本调度器的调度线程"""
+        return getattr(self._local, "worker", False)
+
+    def submit(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """提交任务，返回Future；调度器已关闭时抛出RuntimeError"""
+        future: "Future[T]" = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("COM调度器已关闭")
+            self._tasks.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在调度线程中执行任务并等待结果；已在调度线程中时直接执行（避免任务嵌套提交导致死锁）"""
+        if self.in_worker_thread():
+            return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """停止接收任务；已提交的任务执行完后各线程退出自己的Word实例"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for _ in self._threads:
+                self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join(timeout)
+        logger.info("COM调度器已关闭")
+
+    def _worker(self) -> None:
+        self._local.worker = True
+        enable_resident_word_app()
+        try:
+            while True:
+                item = self._tasks.get()
+                if item is None:
+                    break
+                future, func, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                    check_resident_word_app()
+        finally:
+            release_resident_word_app()
+
+
+# 全局调度器：仅在生产服务模式下启动
+_dispatcher: Optional[ComDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+gauge("com_queue_depth", "排队等待COM调度线程执行的Word任务数",
+      callback=lambda: _dispatcher.pending if _dispatcher is not None else 0)
+
+
+def start_com_dispatcher(threads: Optional[int] = None) -> ComDispatcher:
+    """启动全局COM调度器（已启动时直接返回）；threads默认读取配置com_threads"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = ComDispatcher(threads or get_settings().com_threads)
+        return _dispatcher
+
+
+def get_com_dispatcher() -> Optional[ComDispatcher]:
+    """全局COM调度器，未启动时为None"""
+    return _dispatcher
+
+
+def stop_com_dispatcher(timeout: Optional[float] = None) -> None:
+    """关闭全局COM调度器（未启动时不做任何事）"""
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.shutdown(wait=True, timeout=timeout)
+
+
+def run_with_word(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """执行需要Word的操作：已启动COM调度器时在调度线程中执行，否则在当前线程执行"""
+    dispatcher = _dispatcher
+    if dispatcher is None:
+        return func(*args, **kwargs)
+    return dispatcher.call(func, *args, **kwargs)
@@ -0,0 +1,208 @@
+# GaiZhangYe/core/basic/config_store.py
+"""
+业务配置存储：基于SQLite，每个文档（如func1的target_pages、func2的stamp_config）按行存储
+- 顶层字段各占一行；声明为"按文件拆分"的字段（如config），其中每个文件的配置各占一行
+- 修改在一个事务中完成（BEGIN IMMEDIATE，读取-修改-写入期间其他线程/进程的写入排队），只写入有变化的行
+- 每次有变化的提交递增文档版本号；进程内读缓存按版本号校验，未变化时只需一次单行查询
+- 单行内容损坏时只跳过该行，不会让整个文档变为空
+"""
+import copy
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from GaiZhangYe.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    document TEXT NOT NULL,
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (document, section, key)
+);
+CREATE TABLE IF NOT EXISTS versions (
+    document TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# 行标识：(section, key)；section为空串表示顶层字段，否则为所属的拆分字段
+RowId = Tuple[str, str]
+
+
+class ConfigStore:
+    """按行存储的JSON文档集合（进程间共享，WAL模式支持并发读写）"""
+
+    def __init__(self, db_path: Path, split_fields: Optional[Mapping[str, Sequence[str]]] = None):
+        """
+        :param db_path: SQLite文件路径
+        :param split_fields: {文档名: 按文件拆分的顶层字段}；未声明的文档整体按顶层字段拆分
+        """
+        self.db_path = db_path
+        self.split_fields = {name: tuple(fields) for name, fields in (split_fields or {}).items()}
+        self._cache: Dict[str, Tuple[int, dict]] = {}
+        self._cache_lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接（手动管理事务）并在退出时关闭"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def version(self, document: str) -> int:
+        """文档版本号（从未写入时为0）"""
+        with self._connect() as conn:
+            return self._version(conn, document)
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection, document: str) -> int:
+        row = conn.execute("SELECT version FROM versions WHERE document = ?", (document,)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, document: str) -> dict:
+        """读取文档（返回副本，可自由修改）"""
+        return self.get_with_version(document)[0]
+
+    def get_with_version(self, document: str) -> Tuple[dict, int]:
+        """读取文档及其版本号：版本号与缓存一致时直接使用缓存"""
+        with self._connect() as conn:
+            version = self._version(conn, document)
+            with self._cache_lock:
+                cached = self._cache.get(document)
+            if cached is None or cached[0] != version:
+                conn.execute("BEGIN")
+                try:
+                    version = self._version(conn, document)
+                    data = self._assemble(self._load_rows(conn, document))
+                finally:
+                    conn.execute("COMMIT")
+                cached = (version, data)
+                with self._cache_lock:
+                    self._cache[document] = cached
+        return copy.deepcopy(cached[1]), cached[0]
+
+    @contextmanager
+    def edit(self, *documents: str) -> Iterator[List[dict]]:
+        """
+        在一个事务中修改一个或多个文档：依次产生各文档的可修改副本，正常退出时写入有变化的行并递增版本号
+        用法：with store.edit("func1", "func1.state") as (data, state): ...
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                originals = [self._load_rows(conn, document) for document in documents]
+                edited = [self._assemble(rows) for rows in originals]
+                yield edited
+                results = []
+                for document, rows, data in zip(documents, originals, edited):
+                    changed = self._write_rows(conn, document, rows, self._flatten(document, data))
+                    version = self._version(conn, document)
+                    if changed:
+                        version += 1
+                        conn.execute("INSERT OR REPLACE INTO versions (document, version) VALUES (?, ?)",
+                                     (document, version))
+                    results.append((document, version, data))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        with self._cache_lock:
+            for document, version, data in results:
+                self._cache[document] = (version, copy.deepcopy(data))
+
+    def replace(self, document: str, data: dict) -> int:
+        """整体替换文档（只写入有变化的行），返回新版本号"""
+        with self.edit(document) as (current,):
+            current.clear()
+            current.update(copy.deepcopy(data))
+        return self.version(document)
+
+    def patch(self, document: str, key: str, value: Any, field: Optional[str] = None) -> int:
+        """
+        修改文档中的一项，返回新版本号
+        :param key: 顶层字段名，或field中的文件名
+        :param value: 新值；为None时删除该项
+        :param field: 按文件拆分的字段（如config），为空时修改顶层字段
+        """
+        with self.edit(document) as (data,):
+            target = data.setdefault(field, {}) if field else data
+            if not isinstance(target, dict):
+                raise ValueError(f"字段{field}不是对象，无法按项修改")
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+        return self.version(document)
+
+    def _load_rows(self, conn: sqlite3.Connection, document: str) -> Dict[RowId, Tuple[str, int]]:
+        rows = conn.execute(
+            "SELECT section, key, value, position FROM records WHERE document = ? ORDER BY section, position",
+            (document,),
+        ).fetchall()
+        return {(section, key): (value, position) for section, key, value, position in rows}
+
+    @staticmethod
+    def _assemble(rows: Dict[RowId, Tuple[str, int]]) -> dict:
+        """由行还原文档：先还原顶层字段，再把拆分字段的各行填回（均按保存时的顺序）"""
+        data: Dict[str, Any] = {}
+        sections: Dict[str, List[Tuple[int, str, Any]]] = {}
+        for (section, key), (value, position) in rows.items():
+            try:
+                decoded = json.loads(value)
+            except ValueError as e:
+                logger.warning(f"配置行内容损坏，已跳过：{section}/{key} - {e}")
+                continue
+            sections.setdefault(section, []).append((position, key, decoded))
+        for _, key, value in sorted(sections.pop("", []), key=lambda item: item[0]):
+            data[key] = value
+        for section, items in sections.items():
+            target = data.setdefault(section, {})
+            if isinstance(target, dict):
+                for _, key, value in sorted(items, key=lambda item: item[0]):
+                    target[key] = value
+        return data
+
+    def _flatten(self, document: str, data: dict) -> Dict[RowId, Tuple[str, int]]:
+        """文档拆分为行：{(section, key): (JSON值, 顺序)}"""
+        split = self.split_fields.get(document, ())
+        rows = {}
+        for position, (key, value) in enumerate(data.items()):
+            if key in split and isinstance(value, dict):
+                # 拆分字段本身保留一行空对象，使空的拆分字段也能还原
+                rows[("", key)] = ("{}", position)
+                for sub_position, (sub_key, sub_value) in enumerate(value.items()):
+                    rows[(key, sub_key)] = (json.dumps(sub_value, ensure_ascii=False), sub_position)
+            else:
+                rows[("", key)] = (json.dumps(value, ensure_ascii=False), position)
+        return rows
+
+    @staticmethod
+    def _write_rows(conn: sqlite3.Connection, document: str, old: Dict[RowId, Tuple[str, int]],
+                    new: Dict[RowId, Tuple[str, int]]) -> bool:
+        """写入有变化的行，删除不再存在的行；返回是否有变化"""
+        now = time.time()
+        changed = [(document, section, key, value, position, now)
+                   for (section, key), (value, position) in new.items() if old.get((section, key)) != (value, position)]
+        removed = [(document, section, key) for section, key in old if (section, key) not in new]
+        if changed:
+            conn.executemany("INSERT OR REPLACE INTO records (document, section, key, value, position, updated_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", changed)
+        if removed:
+            conn.executemany("DELETE FROM records WHERE document = ? AND section = ? AND key = ?", removed)
+        return bool(changed or removed)
@@ -0,0 +1,99 @@
+# GaiZhangYe/core/basic/conversion_manifest.py
+"""
+增量转换清单：记录输出目录中每个PDF对应的源文件摘要、导出参数与输出文件校验和
+- 源文件大小+修改时间未变时直接沿用记录的摘要，避免每次重新读取全部源文件
+- 源文件摘要、导出参数、输出文件校验和均一致时视为最新，可跳过转换
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.core.basic.file_processor import compute_file_hash
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = ".conversion_manifest.json"
+MANIFEST_VERSION = 1
+
+
+class ConversionManifest:
+    """输出目录的转换清单（键为输出PDF文件名）"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+        self.path = output_dir / MANIFEST_NAME
+        self.entries: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("entries", {})
+            else:
+                logger.info(f"转换清单版本不匹配，将全部重新转换：{self.path}")
+        except Exception as e:
+            logger.warning(f"读取转换清单失败，将全部重新转换：{self.path} - {e}")
+
+    def save(self) -> None:
+        """原子写入清单文件"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.output_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_name, self.path)
+        except Exception:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
+
+    def source_hash(self, source: Path, output_name: str) -> str:
+        """源文件摘要（大小与修改时间均与记录一致时沿用记录值）"""
+        stat = source.stat()
+        entry = self.entries.get(output_name)
+        if entry and entry.get("source_size") == stat.st_size and entry.get("source_mtime_ns") == stat.st_mtime_ns:
+            return entry["source_sha256"]
+        return compute_file_hash(source)
+
+    def is_up_to_date(self, source: Path, output: Path, options: dict) -> bool:
+        """输出PDF是否存在且与当前源文件、导出参数对应"""
+        entry = self.entries.get(output.name)
+        if not entry or not output.exists():
+            return False
+        if entry.get("source") != source.name or entry.get("options") != options:
+            return False
+        if entry.get("source_sha256") != self.source_hash(source, output.name):
+            return False
+        # 输出文件被外部修改或损坏时重新生成
+        if output.stat().st_size != entry.get("output_size"):
+            return False
+        return compute_file_hash(output) == entry.get("output_sha256")
+
+    def record(self, source: Path, output: Path, options: dict) -> None:
+        """记录一次成功的转换"""
+        stat = source.stat()
+        self.entries[output.name] = {
+            "source": source.name,
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "source_sha256": self.source_hash(source, output.name),
+            "options": options,
+            "output_size": output.stat().st_size,
+            "output_sha256": compute_file_hash(output),
+            "updated_at": time.time(),
+        }
+
+    def forget(self, output_name: str) -> None:
+        self.entries.pop(output_name, None)
+
+    def orphans(self, current_outputs: List[str]) -> List[str]:
+        """清单中记录、但源文件已不在本次输入中的输出文件名"""
+        current = set(current_outputs)
+        return [name for name in self.entries if name not in current]
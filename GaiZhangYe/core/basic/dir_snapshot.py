@@ -0,0 +1,62 @@
+# GaiZhangYe/core/basic/dir_snapshot.py
+"""
+目录快照：用os.scandir记录目录中文件的（大小, 修改时间），比较前后两次快照得到新增/删除/修改的文件
+只读取目录项，不打开文件，轮询大目录的开销只与目录项数量相关
+"""
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from GaiZhangYe.core.basic.file_processor import sort_files_windows_style
+
+# (大小, 修改时间ns)
+FileStat = Tuple[int, int]
+
+
+@dataclass
+class SnapshotDelta:
+    """两次快照之间的变化（文件名按Windows自然排序）"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+    def to_dict(self) -> dict:
+        return {"added": self.added, "removed": self.removed, "modified": self.modified}
+
+
+def snapshot(directory: Path, extensions: Sequence[str]) -> Dict[str, FileStat]:
+    """目录中指定扩展名文件的快照 {文件名: (大小, 修改时间ns)}，忽略Word临时文件（~$*）；目录不存在时为空"""
+    extensions = tuple(ext.lower() for ext in extensions)
+    result = {}
+    try:
+        entries = os.scandir(directory)
+    except (FileNotFoundError, NotADirectoryError):
+        return result
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("~$") or not name.lower().endswith(extensions):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:  # 扫描期间被删除
+                continue
+            result[name] = (stat.st_size, stat.st_mtime_ns)
+    return result
+
+
+def diff_snapshots(old: Mapping[str, Sequence[int]], new: Mapping[str, Sequence[int]]) -> SnapshotDelta:
+    """比较快照：old的值可带有附加字段（如页数），只比较前两项（大小, 修改时间）"""
+    return SnapshotDelta(
+        added=sort_files_windows_style([name for name in new if name not in old]),
+        removed=sort_files_windows_style([name for name in old if name not in new]),
+        modified=sort_files_windows_style([name for name, stat in new.items()
+                                           if name in old and tuple(old[name][:2]) != tuple(stat)]),
+    )
@@ -56,6 +56,20 @@ class FileManager:
             raise ValueError(f"功能2无此目录类型：{dir_type}")
         return self.func2_dirs[dir_type]
 
+    def get_cache_dir(self, name: Optional[str] = None) -> Path:
+        """获取缓存目录（business_data/.cache[/name]），不存在时自动创建"""
+        cache_dir = self.root_dir / ".cache"
+        if name:
+            cache_dir = cache_dir / name
+        cache_dir.mkdir(exist_ok=True, parents=True)
+        return cache_dir
+
+    def get_jobs_dir(self) -> Path:
+        """获取后台任务记录目录（business_data/.jobs），不存在时自动创建"""
+        jobs_dir = self.root_dir / ".jobs"
+        jobs_dir.mkdir(exist_ok=True, parents=True)
+        return jobs_dir
+
     def clean_dir(self, dir_path: Path, keep_latest: int = 0):
         """清理目录（保留最新N个文件，默认全清）"""
         if not dir_path.exists():
@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import List
 from GaiZhangYe.utils.logger import get_logger
 from GaiZhangYe.core.models.exceptions import FileProcessError
+import hashlib
 import re
 from typing import Union
 
@@ -37,6 +38,20 @@ def sort_dicts_by_name_windows_style(dicts: List[dict], name_key: str = "name")
     return sorted(dicts, key=lambda d: windows_natural_sort_key(d.get(name_key, "")))
 
 
+def compute_file_hash(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算文件内容的SHA-256摘要（分块读取，避免大文件占用内存）
+    :param file_path: 文件路径
+    :param chunk_size: 每次读取的字节数
+    :return: 十六进制摘要字符串
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class FileProcessor:
     """通用文件处理器"""
 
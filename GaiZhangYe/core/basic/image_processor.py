@@ -1,18 +1,230 @@
 # GaiZhangYe/core/image_processor.py
 """
 图片处理核心：基于Pillow实现图片相关操作
+扫描件清理（clean_scan）：去除扫描仪黑边、纠正倾斜、背景漂白，可选二值化（保留红色印章）
+- 安装了NumPy时逐像素运算向量化；打包版本不含NumPy，退回Pillow内置运算（背景按加法校正）
 """
-from PIL import Image
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps
 from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import OperationMetrics
 from GaiZhangYe.core.models.exceptions import ImageProcessError
+from GaiZhangYe.core.basic.pdf_processor import pdf_worker_count
+
+try:
+    import numpy as np
+except ImportError:  # 打包版本不含NumPy
+    np = None
 
 logger = get_logger(__name__)
 
+# 运行指标
+_metrics = OperationMetrics("image_operation", "图片操作")
+
+# 分析（裁边、纠偏）使用的缩略图长边像素数
+_ANALYSIS_SIZE = 1000
+# 行/列平均灰度低于该值视为扫描仪黑边
+_BORDER_LEVEL = 90
+# 背景估计的缩小倍数与最大值滤波尺寸（去除文字笔画，只留纸张底色）
+_BACKGROUND_REDUCE = 8
+_BACKGROUND_FILTER = 5
+# 背景漂白后亮度不低于该值的像素置为纯白
+_WHITE_POINT = 235
+# HSV饱和度高于该值的像素视为彩色（印章），二值化时保留原色
+_COLOR_SATURATION = 70
+
+
+@dataclass
+class ScanCleanResult:
+    """单张扫描件的清理结果"""
+    source: Path
+    output: Optional[Path] = None
+    skew_angle: float = 0.0                      # 纠正的倾斜角度（度，逆时针为正）
+    crop_box: Optional[Tuple[int, int, int, int]] = None  # 去黑边后保留的区域（原图坐标）
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _clean_scan_job(args: tuple) -> ScanCleanResult:
+    """进程池任务：清理一张扫描件，异常记入结果"""
+    source, output, target_width, binarize, max_skew = args
+    try:
+        return ImageProcessor().clean_scan(source, output, target_width, binarize, max_skew)
+    except Exception as e:
+        return ScanCleanResult(source, error=str(e) or type(e).__name__)
+
+
+def _otsu_threshold(histogram: Sequence[int]) -> int:
+    """按灰度直方图计算Otsu阈值（类间方差最大）"""
+    total = sum(histogram)
+    if not total:
+        return 128
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    sum_bg = weight_bg = 0
+    best, threshold = -1.0, 128
+    for level, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += level * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, level
+    return threshold
+
+
+def _profiles(gray: Image.Image) -> Tuple[List[float], List[float]]:
+    """灰度图的行平均值与列平均值"""
+    if np is not None:
+        pixels = np.asarray(gray, dtype=np.float32)
+        return pixels.mean(axis=1).tolist(), pixels.mean(axis=0).tolist()
+    width, height = gray.size
+    # BOX缩放到单列/单行即为逐行/逐列平均（灰度图每像素1字节）
+    return (list(gray.resize((1, height), Image.BOX).tobytes()),
+            list(gray.resize((width, 1), Image.BOX).tobytes()))
+
+
+def _border_box(gray: Image.Image) -> Tuple[int, int, int, int]:
+    """
+    扫描仪黑边：从四边向内跳过平均灰度很低的行/列（每边最多1/4）
+    :return: 保留区域 (left, top, right, bottom)，坐标为gray的像素坐标
+    """
+    rows, cols = _profiles(gray)
+
+    def inner(values: List[float]) -> Tuple[int, int]:
+        limit = len(values) // 4
+        start = 0
+        while start < limit and values[start] < _BORDER_LEVEL:
+            start += 1
+        end = len(values)
+        while len(values) - end < limit and values[end - 1] < _BORDER_LEVEL:
+            end -= 1
+        # 黑边与纸张之间有一段灰色过渡，裁掉黑边时多裁1像素
+        return start + (start > 0), end - (end < len(values))
+
+    top, bottom = inner(rows)
+    left, right = inner(cols)
+    return left, top, right, bottom
+
+
+def _skew_angle(gray: Image.Image, max_skew: float) -> float:
+    """
+    投影法估计倾斜角：在[-max_skew, max_skew]内旋转文字像素，取水平投影最"尖锐"（平方和最大）的角度
+    先以0.5度步长粗搜，再在最优角附近以0.05度步长细搜
+    :return: 使文字行水平所需的逆时针旋转角度（度），与 Image.rotate 一致
+    """
+    if max_skew <= 0:
+        return 0.0
+    threshold = _otsu_threshold(gray.histogram())
+    if np is not None:
+        ys, xs = np.nonzero(np.asarray(gray) < threshold)
+        if len(ys) < 200:
+            return 0.0
+        if len(ys) > 200_000:
+            step = len(ys) // 200_000 + 1
+            ys, xs = ys[::step], xs[::step]
+        ys, xs = ys.astype(np.float32), xs.astype(np.float32)
+        offset = xs.max() * math.tan(math.radians(max_skew)) + 1
+
+        def score(angle: float) -> float:
+            # 逆时针旋转angle度后文字像素所在的行（小角度下用剪切近似旋转）
+            rows = np.rint(ys - xs * math.tan(math.radians(angle)) + offset).astype(np.int64)
+            counts = np.bincount(rows).astype(np.float64)
+            return float((counts * counts).sum())
+    else:
+        ink = gray.point(lambda v: 255 if v < threshold else 0)
+        if ink.histogram()[255] < 200:
+            return 0.0
+
+        def score(angle: float) -> float:
+            rotated = ink.rotate(angle, resample=Image.NEAREST)
+            rows = rotated.resize((1, rotated.height), Image.BOX).tobytes()
+            return float(sum(v * v for v in rows))
+
+    def search(center: float, span: float, step: float) -> float:
+        count = int(round(span / step))
+        angles = [center + i * step for i in range(-count, count + 1) if abs(center + i * step) <= max_skew]
+        return max(angles, key=score)
+
+    angle = search(0.0, max_skew, 0.5)
+    angle = search(angle, 0.5, 0.05)
+    # 与不旋转相比没有明显改善时视为未倾斜（避免对无文字的图片误旋转）
+    if abs(angle) < 0.05 or score(angle) < score(0.0) * 1.02:
+        return 0.0
+    return round(angle, 2)
+
+
+def _flatten_background(image: Image.Image) -> Image.Image:
+    """
+    背景漂白：缩小后用最大值滤波去掉文字，得到纸张底色（含光照不均）的估计，
+    再按底色校正各通道，使纸张变为纯白、文字与印章颜色保持
+    """
+    gray = image.convert("L")
+    small = gray.reduce(_BACKGROUND_REDUCE) if min(gray.size) >= _BACKGROUND_REDUCE * 16 else gray
+    background = small.filter(ImageFilter.MaxFilter(_BACKGROUND_FILTER)).filter(ImageFilter.GaussianBlur(2))
+    # 大面积深色内容（照片、色块）不能当作底色：底色不低于全局底色的3/4
+    levels = sorted(background.tobytes())
+    floor = int(levels[len(levels) // 2] * 0.75)
+    background = background.point(lambda v: max(v, floor, 1)).resize(image.size, Image.BILINEAR)
+
+    if np is not None:
+        pixels = np.asarray(image, dtype=np.float32)
+        scale = 255.0 / (np.asarray(background, dtype=np.float32) * (_WHITE_POINT / 255.0))
+        if pixels.ndim == 3:
+            scale = scale[:, :, None]
+        return Image.fromarray(np.minimum(pixels * scale, 255).astype(np.uint8), image.mode)
+
+    # 无NumPy：加上底色与纯白的差值（加法校正），再拉伸对比度恢复文字深度
+    shade = ImageOps.invert(background)
+    if image.mode == "RGB":
+        shade = Image.merge("RGB", (shade, shade, shade))
+    lifted = ImageChops.add(image, shade)
+    stretch = 255 / _WHITE_POINT
+    return lifted.point([255 if v >= _WHITE_POINT else max(0, int(255 - (_WHITE_POINT - v) * stretch * 1.25))
+                         for v in range(256)] * len(image.getbands()))
+
+
+def _binarize(image: Image.Image) -> Image.Image:
+    """二值化：非彩色像素按Otsu阈值变为纯黑/纯白，彩色像素（印章）保留原色；没有彩色像素时输出1位图"""
+    gray = image.convert("L")
+    threshold = _otsu_threshold(gray.histogram())
+    if np is not None:
+        pixels = np.asarray(image)
+        color = (pixels.max(axis=2).astype(np.int16) - pixels.min(axis=2)) > _COLOR_SATURATION \
+            if pixels.ndim == 3 else np.zeros(pixels.shape[:2], dtype=bool)
+        if not color.any():
+            return Image.fromarray(np.asarray(gray) > threshold)
+        bw = np.where(np.asarray(gray) > threshold, 255, 0).astype(np.uint8)
+        return Image.fromarray(np.where(color[:, :, None], pixels, bw[:, :, None]).astype(np.uint8), "RGB")
+
+    bw = gray.point(lambda v: 255 if v > threshold else 0)
+    if image.mode != "RGB":
+        return bw.convert("1")
+    saturation = image.convert("HSV").getchannel("S").point(lambda v: 255 if v > _COLOR_SATURATION else 0)
+    if not saturation.getbbox():
+        return bw.convert("1")
+    return Image.composite(image, bw.convert("RGB"), saturation)
+
 
 class ImageProcessor:
     """图片处理器"""
 
+    @_metrics.timed("resize_image")
     def resize_image(self, input_image: Path, output_image: Path, target_width: int = None,
                     target_height: int = None, keep_ratio: bool = True) -> None:
         """
@@ -49,8 +261,12 @@ class ImageProcessor:
                 new_size = (target_width, target_height)
                 logger.debug(f"缩放后图片尺寸：{new_size}")
 
-                # 缩放图片（使用ANTIALIAS滤镜保持质量）
-                resized_img = img.resize(new_size, Image.LANCZOS)
+                # 缩小时JPEG按缩小的尺寸解码（DCT域缩放，得到的尺寸不小于目标尺寸），省去大部分解码耗时
+                if target_width < original_width and target_height < original_height:
+                    img.draft(img.mode, new_size)
+
+                # 缩放图片（先整数倍reduce再LANCZOS，质量与直接LANCZOS相当）
+                resized_img = img.resize(new_size, Image.LANCZOS, reducing_gap=3.0)
 
                 # 保存图片
                 resized_img.save(output_image)
@@ -59,6 +275,7 @@ class ImageProcessor:
             logger.error(f"图片缩放失败：{input_image}", exc_info=True)
             raise ImageProcessError(f"缩放失败：{str(e)}") from e
 
+    @_metrics.timed("convert_image_format")
     def convert_image_format(self, input_image: Path, output_image: Path, format: str) -> None:
         """
         转换图片格式
@@ -96,3 +313,87 @@ class ImageProcessor:
             return True
         except Exception:
             return False
+
+    @_metrics.timed("clean_scan")
+    def clean_scan(self, input_image: Path, output_image: Path, target_width: Optional[int] = None,
+                   binarize: Optional[bool] = None, max_skew: Optional[float] = None) -> ScanCleanResult:
+        """
+        清理扫描的盖章页：去黑边 → 纠偏 → 背景漂白 →（可选）二值化 →（可选）缩放，只解码/编码一次
+        :param target_width: 输出宽度（像素，等比缩放），为空时不缩放
+        :param binarize: 是否二值化，默认读取配置 SCAN_BINARIZE（印章等彩色像素保留原色）
+        :param max_skew: 最大纠偏角度（度），默认读取配置 SCAN_MAX_SKEW，0表示不纠偏
+        :return: 清理结果（纠偏角度、裁剪区域）
+        """
+        if not input_image.exists():
+            raise ImageProcessError(f"图片不存在：{input_image}")
+        settings = get_settings()
+        binarize = settings.scan_binarize if binarize is None else binarize
+        max_skew = settings.scan_max_skew if max_skew is None else max_skew
+
+        try:
+            with Image.open(input_image) as img:
+                dpi = img.info.get("dpi")
+                source_size = img.size
+                if target_width and img.width > target_width * 2:
+                    # 需要缩小时JPEG按缩小的尺寸解码（DCT域缩放），保留约2倍于目标宽度的分辨率
+                    img.draft(img.mode, (target_width * 2, img.height * target_width * 2 // img.width))
+                image = ImageOps.exif_transpose(img)
+                if image.mode in ("RGBA", "LA", "P"):
+                    # 透明部分按白色纸张处理
+                    rgba = image.convert("RGBA")
+                    image = Image.new("RGB", rgba.size, "white")
+                    image.paste(rgba, mask=rgba.getchannel("A"))
+                elif image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+            decode_scale = source_size[0] / image.width if image.size != source_size else 1.0
+
+            # 在缩略图上分析，结果换算回原图坐标
+            factor = max(1, max(image.size) // _ANALYSIS_SIZE)
+            analysis = image.convert("L").reduce(factor)
+            left, top, right, bottom = _border_box(analysis)
+            box = (left * factor, top * factor, min(image.width, right * factor), min(image.height, bottom * factor))
+            crop_box = tuple(round(v * decode_scale) for v in box)
+            if box != (0, 0, image.width, image.height):
+                image = image.crop(box)
+                analysis = analysis.crop((left, top, right, bottom))
+            angle = _skew_angle(analysis, max_skew)
+
+            if target_width and image.width != target_width:
+                # 先缩放再旋转、漂白，逐像素处理量随之减少
+                target_height = max(1, round(image.height * target_width / image.width))
+                image = image.resize((target_width, target_height), Image.LANCZOS, reducing_gap=3.0)
+                if dpi:
+                    dpi = tuple(d * target_width / (crop_box[2] - crop_box[0]) for d in dpi)
+
+            if angle:
+                image = image.rotate(angle, resample=Image.BICUBIC,
+                                     fillcolor="white" if image.mode == "RGB" else 255)
+            image = _flatten_background(image)
+            if binarize:
+                image = _binarize(image)
+
+            output_image.parent.mkdir(parents=True, exist_ok=True)
+            options = {"dpi": dpi} if dpi else {}
+            if output_image.suffix.lower() in (".jpg", ".jpeg"):
+                image = image.convert("RGB" if image.mode != "L" else "L")
+            image.save(output_image, **options)
+            logger.info(f"扫描件清理完成（纠偏{angle}度）：{input_image} → {output_image}")
+            return ScanCleanResult(input_image, output_image, angle, crop_box)
+        except Exception as e:
+            logger.error(f"扫描件清理失败：{input_image}", exc_info=True)
+            raise ImageProcessError(f"扫描件清理失败：{str(e)}") from e
+
+    def clean_scans(self, jobs: List[Tuple[Path, Path]], target_width: Optional[int] = None,
+                    binarize: Optional[bool] = None, max_skew: Optional[float] = None,
+                    workers: Optional[int] = None) -> List[ScanCleanResult]:
+        """
+        批量清理扫描件：多张图片且有多个CPU时在进程池中并行（单张300DPI扫描件即需数百毫秒CPU时间）
+        :param jobs: (输入图片, 输出图片) 列表
+        :return: 按输入顺序的结果，单张失败时error记录原因
+        """
+        args = [(Path(src), Path(out), target_width, binarize, max_skew) for src, out in jobs]
+        workers = min(workers or pdf_worker_count(), len(args))
+        if workers <= 1:
+            return [_clean_scan_job(job) for job in args]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return list(pool.map(_clean_scan_job, args))
@@ -0,0 +1,160 @@
+# GaiZhangYe/core/basic/ooxml_reader.py
+"""
+OOXML元数据读取：不启动Word，直接从.docx压缩包中读取页数、分页标记、节页面尺寸及修订/批注信息
+"""
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Union
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.core.models.exceptions import WordProcessError
+
+logger = get_logger(__name__)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+EP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+# ST_TwipsMeasure：缇（允许小数），或带单位的长度（ST_PositiveUniversalMeasure）；单位 -> 每单位的缇数
+_TWIPS_PER_UNIT = {"mm": 1440 / 25.4, "cm": 1440 / 2.54, "in": 1440, "pt": 20, "pc": 240, "pi": 240}
+_MEASURE_RE = re.compile(r"\s*(\d+(?:\.\d*)?|\.\d+)\s*(mm|cm|in|pt|pc|pi)?\s*")
+
+
+def parse_twips_measure(value: Optional[str], default: Union[int, float]) -> float:
+    """
+    解析长度属性（如页面尺寸w:pgSz的w:w/w:h）为缇：支持"11906"、"11906.5"及"210mm"等带单位的写法
+    :param default: 属性缺失时的取值
+    :raises ValueError: 无法识别的取值
+    """
+    if value is None:
+        return float(default)
+    match = _MEASURE_RE.fullmatch(value)
+    if not match:
+        raise ValueError(f"无效的长度值：{value!r}")
+    number, unit = match.groups()
+    return float(number) * (_TWIPS_PER_UNIT[unit] if unit else 1)
+
+
+# 表示修订（修订模式下的插入/删除/格式变更）的元素
+_REVISION_TAGS = {
+    _w(t) for t in (
+        "ins", "del", "moveFrom", "moveTo", "rPrChange", "pPrChange",
+        "sectPrChange", "tblPrChange", "trPrChange", "tcPrChange", "numberingChange",
+    )
+}
+# 能够计算页数并写入docProps/app.xml的应用程序（其他生成器/模板中的统计值往往是陈旧的）
+_TRUSTED_APPLICATIONS = ("Microsoft", "LibreOffice", "WPS")
+
+
+@dataclass
+class SectionInfo:
+    """节的页面设置（单位：磅）"""
+    page_width: float
+    page_height: float
+
+    @property
+    def landscape(self) -> bool:
+        return self.page_width > self.page_height
+
+
+@dataclass
+class DocxMetadata:
+    """.docx元数据
+    confident为True表示page_count来自Word保存时写入的统计信息且与正文分页标记一致，可直接使用；
+    否则应回退为通过Word计算页数
+    """
+    page_count: Optional[int] = None
+    application: str = ""
+    rendered_page_breaks: int = 0
+    explicit_page_breaks: int = 0
+    sections: List[SectionInfo] = field(default_factory=list)
+    has_revisions: bool = False
+    has_comments: bool = False
+    confident: bool = False
+    reason: str = ""
+
+
+def read_docx_metadata(docx_path: Path) -> DocxMetadata:
+    """
+    读取.docx元数据
+    :param docx_path: .docx文件路径
+    :return: DocxMetadata
+    """
+    if docx_path.suffix.lower() != ".docx":
+        raise WordProcessError(f"仅支持.docx文件：{docx_path}")
+
+    try:
+        with zipfile.ZipFile(docx_path) as package:
+            names = set(package.namelist())
+            meta = DocxMetadata()
+
+            if "docProps/app.xml" in names:
+                app_root = ET.fromstring(package.read("docProps/app.xml"))
+                pages = app_root.findtext(f"{{{EP_NS}}}Pages")
+                meta.application = app_root.findtext(f"{{{EP_NS}}}Application") or ""
+                if pages and pages.strip().isdigit():
+                    meta.page_count = int(pages.strip())
+
+            with package.open("word/document.xml") as document_xml:
+                _scan_document(document_xml, meta)
+
+            if "word/comments.xml" in names and not meta.has_comments:
+                comments_root = ET.fromstring(package.read("word/comments.xml"))
+                meta.has_comments = comments_root.find(_w("comment")) is not None
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, ValueError) as e:
+        raise WordProcessError(f"无法解析.docx文件：{docx_path} - {e}") from e
+
+    meta.confident, meta.reason = _assess_confidence(meta)
+    logger.debug(f"读取.docx元数据：{docx_path} - {meta}")
+    return meta
+
+
+def _scan_document(document_xml, meta: DocxMetadata) -> None:
+    """流式扫描word/document.xml，统计分页标记、节设置、修订与批注"""
+    for _, elem in ET.iterparse(document_xml, events=("end",)):
+        tag = elem.tag
+        if tag == _w("lastRenderedPageBreak"):
+            meta.rendered_page_breaks += 1
+        elif tag == _w("br"):
+            if elem.get(_w("type")) == "page":
+                meta.explicit_page_breaks += 1
+        elif tag == _w("pageBreakBefore"):
+            if elem.get(_w("val"), "true") not in ("0", "false", "off"):
+                meta.explicit_page_breaks += 1
+        elif tag == _w("pgSz"):
+            # w:w/w:h 单位为缇（1/20磅）
+            width = parse_twips_measure(elem.get(_w("w")), 11906)
+            height = parse_twips_measure(elem.get(_w("h")), 16838)
+            meta.sections.append(SectionInfo(width / 20, height / 20))
+        elif tag in _REVISION_TAGS:
+            meta.has_revisions = True
+        elif tag == _w("commentReference"):
+            meta.has_comments = True
+        elif tag == _w("p") or tag == _w("tbl"):
+            # 段落/表格处理完毕后释放子元素，控制大文档的内存占用
+            elem.clear()
+
+
+def _assess_confidence(meta: DocxMetadata):
+    """判断app.xml中的页数是否可信，返回(是否可信, 原因)"""
+    if not meta.page_count:
+        return False, "缺少页数统计"
+    if not meta.application.startswith(_TRUSTED_APPLICATIONS):
+        return False, f"统计信息由{meta.application or '未知程序'}生成，可能已过期"
+    if meta.has_revisions:
+        # Word统计页数前会接受所有修订，修订可能改变分页
+        return False, "文档包含修订"
+    if meta.explicit_page_breaks + 1 > meta.page_count:
+        return False, "分页符数量超过统计页数，统计信息已过期"
+    if meta.rendered_page_breaks and abs(meta.rendered_page_breaks + 1 - meta.page_count) > 1:
+        return False, "统计页数与渲染分页标记不一致"
+    if meta.page_count > 1 and not meta.rendered_page_breaks:
+        return False, "多页文档缺少渲染分页标记"
+    return True, ""
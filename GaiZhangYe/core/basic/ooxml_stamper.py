@@ -0,0 +1,447 @@
+# GaiZhangYe/core/basic/ooxml_stamper.py
+"""
+OOXML盖章页插入引擎：不调用Word，直接编辑.docx压缩包插入整页图片
+- 图片写入 word/media，并登记关系与内容类型
+- 在目标页起始处插入以页面为参照、居中铺满整页的浮动图片（wp:anchor）
+- 目标页通过渲染分页标记（w:lastRenderedPageBreak）定位；无渲染标记时使用显式分页符/分节符
+文档XML按原文本定位并插入片段，不做整体解析重写，保证其余内容（命名空间声明、兼容性标记等）原样保留
+"""
+import os
+import re
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.core.models.exceptions import WordProcessError
+from GaiZhangYe.core.basic.ooxml_reader import parse_twips_measure
+
+logger = get_logger(__name__)
+
+DOCUMENT_PART = "word/document.xml"
+RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+IMAGE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+
+# 1磅 = 12700 EMU；1缇(1/20磅) = 635 EMU
+EMU_PER_TWIP = 635
+# 未设置页面尺寸时按A4纵向处理（单位：缇）
+DEFAULT_PAGE_SIZE = (11906, 16838)
+
+_IMAGE_CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "bmp": "image/bmp",
+    "gif": "image/gif",
+    "tif": "image/tiff",
+    "tiff": "image/tiff",
+}
+
+_TAG_RE = re.compile(r"<(/?)([A-Za-z_][\w.\-]*:[\w.\-]+|[A-Za-z_][\w.\-]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*?)(/?)>")
+_ATTR_RE = re.compile(r"([\w:]+)\s*=\s*\"([^\"]*)\"")
+_EMPTY_PARAGRAPH_RE = re.compile(r"<w:p(\s[^>]*?)?/>")
+# 这些元素内部的段落属于文本框/兼容性回退内容，不参与正文分页
+_SKIP_CONTAINERS = {"w:txbxContent", "mc:Fallback", "w:drawing", "w:pict", "w:object"}
+
+
+@dataclass
+class _Paragraph:
+    """正文段落的定位信息（偏移量均指向document.xml文本）"""
+    content_start: int
+    page_break_before: bool = False
+    section_break: Optional[str] = None  # 段落内分节符的类型（None表示无分节符）
+    page_size: Optional[Tuple[int, int]] = None  # 分节符中的页面尺寸（缇）
+    rendered_breaks: List[int] = field(default_factory=list)
+    explicit_breaks: List[Tuple[int, bool]] = field(default_factory=list)  # (插入偏移, 其后是否还有文字块)
+
+
+@dataclass
+class _DocumentLayout:
+    paragraphs: List[_Paragraph]
+    body_page_size: Optional[Tuple[int, int]]
+    max_docpr_id: int
+
+
+def _parse_attrs(attr_text: str) -> dict:
+    return dict(_ATTR_RE.findall(attr_text))
+
+
+def _page_size_from_attrs(attrs: dict) -> Tuple[int, int]:
+    width = round(parse_twips_measure(attrs.get("w:w"), DEFAULT_PAGE_SIZE[0]))
+    height = round(parse_twips_measure(attrs.get("w:h"), DEFAULT_PAGE_SIZE[1]))
+    return width, height
+
+
+def _expand_empty_paragraphs(xml: str) -> str:
+    """将空段落<w:p/>展开为成对标签，以便定位并在其中插入文字块"""
+    return _EMPTY_PARAGRAPH_RE.sub(r"<w:p\1></w:p>", xml)
+
+
+def _scan_layout(xml: str) -> _DocumentLayout:
+    """按标签流扫描document.xml，收集段落起点、分页标记与分节页面尺寸"""
+    paragraphs: List[_Paragraph] = []
+    body_page_size = None
+    max_docpr_id = 0
+
+    skip_depth = 0
+    para: Optional[_Paragraph] = None
+    para_depth = 0
+    in_ppr = False
+    sectpr_depth = 0  # 分节符可能嵌套（w:sectPrChange 中保存修订前的分节设置），只处理最外层
+    sectpr_in_para = False
+    sect_type = "nextPage"
+    sect_size = None
+    run_has_rendered = False
+    run_has_page_br = False
+    run_content_after_br = False
+    pending_explicit = None  # 段落内最近一个显式分页符的插入偏移（等待确认其后是否还有文字块）
+
+    for m in _TAG_RE.finditer(xml):
+        closing, name, attr_text, self_closing = m.group(1), m.group(2), m.group(3), m.group(4)
+
+        if name == "wp:docPr":
+            docpr_id = _parse_attrs(attr_text).get("id", "0")
+            if docpr_id.isdigit():
+                max_docpr_id = max(max_docpr_id, int(docpr_id))
+
+        if name in _SKIP_CONTAINERS:
+            if closing:
+                skip_depth -= 1
+            elif not self_closing:
+                skip_depth += 1
+            continue
+        if skip_depth:
+            continue
+
+        if name == "w:p":
+            if self_closing:
+                # 空段落应先经 _expand_empty_paragraphs 展开为成对标签
+                continue
+            if not closing:
+                para_depth += 1
+                if para_depth == 1:
+                    para = _Paragraph(content_start=m.end())
+                    pending_explicit = None
+            else:
+                para_depth -= 1
+                if para_depth == 0 and para is not None:
+                    if pending_explicit is not None:
+                        para.explicit_breaks.append((pending_explicit, False))
+                    paragraphs.append(para)
+                    para = None
+            continue
+
+        if name == "w:pPr" and para is not None:
+            if closing:
+                in_ppr = False
+                para.content_start = m.end()
+            elif not self_closing:
+                in_ppr = True
+            else:
+                para.content_start = m.end()
+            continue
+
+        if name == "w:pageBreakBefore" and in_ppr and para is not None:
+            val = _parse_attrs(attr_text).get("w:val", "true")
+            para.page_break_before = val not in ("0", "false", "off")
+            continue
+
+        if name == "w:sectPr":
+            if not closing:
+                sectpr_depth += 1
+                if sectpr_depth == 1:
+                    sectpr_in_para = in_ppr
+                    sect_type = "nextPage"
+                    sect_size = None
+            if closing or self_closing:
+                sectpr_depth -= 1
+                if sectpr_depth == 0:
+                    if sectpr_in_para and para is not None:
+                        para.section_break = sect_type
+                        para.page_size = sect_size
+                    else:
+                        body_page_size = sect_size
+            continue
+
+        if sectpr_depth:
+            if sectpr_depth > 1:
+                continue
+            if name == "w:type":
+                sect_type = _parse_attrs(attr_text).get("w:val", "nextPage")
+            elif name == "w:pgSz":
+                sect_size = _page_size_from_attrs(_parse_attrs(attr_text))
+            continue
+
+        if para is None:
+            continue
+
+        if name == "w:r":
+            if not closing and not self_closing:
+                if pending_explicit is not None:
+                    # 显式分页符之后还有文字块：分页发生在段落中间
+                    para.explicit_breaks.append((pending_explicit, True))
+                    pending_explicit = None
+                run_has_rendered = False
+                run_has_page_br = False
+                run_content_after_br = False
+            elif closing:
+                if run_has_rendered:
+                    para.rendered_breaks.append(m.end())
+                if run_has_page_br:
+                    if run_content_after_br:
+                        # 同一文字块内分页符之后还有内容
+                        para.explicit_breaks.append((m.end(), True))
+                    else:
+                        pending_explicit = m.end()
+            continue
+
+        if name == "w:lastRenderedPageBreak":
+            run_has_rendered = True
+        elif name == "w:br" and _parse_attrs(attr_text).get("w:type") == "page":
+            run_has_page_br = True
+            run_content_after_br = False
+        elif run_has_page_br and not closing:
+            run_content_after_br = True
+
+    return _DocumentLayout(paragraphs, body_page_size, max_docpr_id)
+
+
+def _page_starts(layout: _DocumentLayout) -> List[Tuple[int, int]]:
+    """计算每一页的起始插入点，返回 [(插入偏移, 所在段落序号)]"""
+    paragraphs = layout.paragraphs
+    if not paragraphs:
+        raise WordProcessError("文档正文中没有段落，无法定位插入位置")
+
+    starts = [(paragraphs[0].content_start, 0)]
+    use_rendered = any(p.rendered_breaks for p in paragraphs)
+    for index, para in enumerate(paragraphs):
+        if use_rendered:
+            # 渲染分页标记记录了Word上次排版的真实分页（已包含显式分页符与分节符造成的分页）
+            starts.extend((offset, index) for offset in para.rendered_breaks)
+            continue
+
+        previous = paragraphs[index - 1] if index > 0 else None
+        if index > 0 and (para.page_break_before or
+                          (previous.section_break and previous.section_break != "continuous")):
+            starts.append((para.content_start, index))
+        for offset, has_following_runs in para.explicit_breaks:
+            if has_following_runs:
+                starts.append((offset, index))
+            elif index + 1 < len(paragraphs):
+                # 分页符位于段末：新页从下一段开始
+                starts.append((paragraphs[index + 1].content_start, index + 1))
+
+    # 去重（段末分页符与下一段的分节/段前分页可能指向同一位置）
+    deduped = []
+    for start in starts:
+        if not deduped or start[0] != deduped[-1][0]:
+            deduped.append(start)
+    return deduped
+
+
+def _section_page_size(layout: _DocumentLayout, para_index: int) -> Tuple[int, int]:
+    """段落所在节的页面尺寸：该段落及其后第一个带分节符的段落决定所属节，否则取正文末尾的节设置"""
+    for para in layout.paragraphs[para_index:]:
+        if para.section_break is not None:
+            return para.page_size or DEFAULT_PAGE_SIZE
+    return layout.body_page_size or DEFAULT_PAGE_SIZE
+
+
+def _anchor_run_xml(rel_id: str, docpr_id: int, name: str, page_size: Tuple[int, int], behind: bool) -> str:
+    """生成以页面为参照、居中铺满整页的浮动图片文字块
+    与Word方式一致：纵向页直接铺满；横向页将图片按纵向尺寸放置后旋转90度
+    """
+    page_width, page_height = page_size
+    if page_height > page_width:
+        cx, cy, rotation = page_width * EMU_PER_TWIP, page_height * EMU_PER_TWIP, 0
+    else:
+        cx, cy, rotation = page_height * EMU_PER_TWIP, page_width * EMU_PER_TWIP, 5400000
+    rot_attr = f' rot="{rotation}"' if rotation else ""
+    relative_height = 251658240 + docpr_id
+    return (
+        '<w:r><w:drawing '
+        'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<wp:anchor distT="0" distB="0" distL="0" distR="0" simplePos="0" relativeHeight="{relative_height}" '
+        f'behindDoc="{1 if behind else 0}" locked="0" layoutInCell="0" allowOverlap="1">'
+        '<wp:simplePos x="0" y="0"/>'
+        '<wp:positionH relativeFrom="page"><wp:align>center</wp:align></wp:positionH>'
+        '<wp:positionV relativeFrom="page"><wp:align>center</wp:align></wp:positionV>'
+        f'<wp:extent cx="{cx}" cy="{cy}"/>'
+        '<wp:effectExtent l="0" t="0" r="0" b="0"/>'
+        '<wp:wrapNone/>'
+        f'<wp:docPr id="{docpr_id}" name="Stamp {docpr_id}"/>'
+        '<wp:cNvGraphicFramePr/>'
+        '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+        '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        f'<pic:nvPicPr><pic:cNvPr id="0" name="{_escape_attr(name)}"/><pic:cNvPicPr/></pic:nvPicPr>'
+        f'<pic:blipFill><a:blip r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        f'<pic:spPr><a:xfrm{rot_attr}><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>'
+        '</pic:pic></a:graphicData></a:graphic>'
+        '</wp:anchor></w:drawing></w:r>'
+    )
+
+
+def _escape_attr(value: str) -> str:
+    return (value.replace("&", "&amp;").replace("<", "&lt;")
+            .replace(">", "&gt;").replace('"', "&quot;"))
+
+
+class OoxmlStamper:
+    """基于OOXML的盖章页插入（接口与 WordProcessor.insert_image_to_word 一致，可在无Word环境及多进程中使用）"""
+
+    def __init__(self, behind_text: bool = False):
+        """
+        :param behind_text: True时图片衬于文字下方，默认浮于文字上方（与Word方式一致）
+        """
+        self.behind_text = behind_text
+
+    def get_page_count(self, word_path: Path) -> int:
+        """按分页标记估算的页数（即可定位的页数）"""
+        with zipfile.ZipFile(word_path) as package:
+            xml = _expand_empty_paragraphs(package.read(DOCUMENT_PART).decode("utf-8"))
+        return len(_page_starts(_scan_layout(xml)))
+
+    def insert_image_to_word(self, word_path: Path, image_path: Path, image_location, output_path: Path) -> None:
+        """
+        向Word插入整页图片
+        :param image_location: 目标页码（超出范围时修正到[1, 页数]）
+        """
+        self.insert_images(word_path, [(image_path, image_location)], output_path)
+
+    def insert_images(self, word_path: Path, images: List[Tuple[Path, object]], output_path: Path) -> None:
+        """
+        一次性向Word插入多张整页图片（只读写一次压缩包）
+        :param word_path: 源.docx路径
+        :param images: [(图片路径, 目标页码)]
+        :param output_path: 输出.docx路径（可与源路径相同）
+        """
+        if not word_path.exists():
+            raise FileNotFoundError(f"Word文件不存在：{word_path}")
+        if word_path.suffix.lower() != ".docx":
+            raise WordProcessError(f"OOXML方式仅支持.docx文件：{word_path}")
+        for image_path, _ in images:
+            if not image_path.exists():
+                raise FileNotFoundError(f"图片文件不存在：{image_path}")
+
+        try:
+            with zipfile.ZipFile(word_path) as package:
+                names = package.namelist()
+                document_xml = package.read(DOCUMENT_PART).decode("utf-8")
+                rels_xml = (package.read(RELS_PART).decode("utf-8") if RELS_PART in names else
+                            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                            '</Relationships>')
+                content_types_xml = package.read(CONTENT_TYPES_PART).decode("utf-8")
+
+                document_xml = _expand_empty_paragraphs(document_xml)
+                layout = _scan_layout(document_xml)
+                starts = _page_starts(layout)
+                used_rel_ids = set(re.findall(r'Id="([^"]+)"', rels_xml))
+                next_docpr_id = layout.max_docpr_id + 1
+
+                new_media = {}
+                insertions = []
+                for order, (image_path, image_location) in enumerate(images):
+                    try:
+                        page_num = int(image_location)
+                    except Exception:
+                        raise WordProcessError(f"image_location must be an integer page number, got: {image_location}")
+                    final_target_page = max(1, min(page_num, len(starts)))
+                    offset, para_index = starts[final_target_page - 1]
+                    logger.info(f"图片将插入的目标页: {final_target_page}")
+
+                    ext = image_path.suffix.lower().lstrip(".")
+                    if ext not in _IMAGE_CONTENT_TYPES:
+                        raise WordProcessError(f"不支持的图片格式：{image_path}")
+                    media_name = self._unique_media_name(names, new_media, ext)
+                    rel_id = self._unique_rel_id(used_rel_ids)
+                    new_media[media_name] = image_path
+                    rels_xml = rels_xml.replace(
+                        "</Relationships>",
+                        f'<Relationship Id="{rel_id}" Type="{IMAGE_REL_TYPE}" '
+                        f'Target="media/{media_name.rsplit("/", 1)[-1]}"/></Relationships>',
+                    )
+                    content_types_xml = self._ensure_default_content_type(content_types_xml, ext)
+
+                    page_size = _section_page_size(layout, para_index)
+                    run_xml = _anchor_run_xml(rel_id, next_docpr_id, image_path.name, page_size, self.behind_text)
+                    next_docpr_id += 1
+                    insertions.append((offset, order, run_xml))
+
+                # 从后往前插入，避免前面的插入改变后续偏移量；同一偏移处保持配置顺序
+                for offset, _, run_xml in sorted(insertions, reverse=True):
+                    document_xml = document_xml[:offset] + run_xml + document_xml[offset:]
+
+                replaced = {
+                    DOCUMENT_PART: document_xml.encode("utf-8"),
+                    RELS_PART: rels_xml.encode("utf-8"),
+                    CONTENT_TYPES_PART: content_types_xml.encode("utf-8"),
+                }
+                temp_name = self._write_package(package, replaced, new_media, output_path.parent)
+            # 源文件关闭后再替换（输出路径可与源路径相同）
+            os.replace(temp_name, output_path)
+            logger.info(f"图片插入Word成功（OOXML方式）：{[str(p) for p, _ in images]} → {output_path}")
+        except (FileNotFoundError, WordProcessError):
+            raise
+        except Exception as e:
+            logger.error(f"插入图片失败（OOXML方式）：{word_path}", exc_info=True)
+            raise WordProcessError(f"插入失败：{str(e)}") from e
+
+    @staticmethod
+    def _unique_media_name(existing: List[str], new_media: dict, ext: str) -> str:
+        index = 1
+        while True:
+            name = f"word/media/stamp{index}.{ext}"
+            if name not in existing and name not in new_media:
+                return name
+            index += 1
+
+    @staticmethod
+    def _unique_rel_id(used: set) -> str:
+        index = 1
+        while f"rIdStamp{index}" in used:
+            index += 1
+        rel_id = f"rIdStamp{index}"
+        used.add(rel_id)
+        return rel_id
+
+    @staticmethod
+    def _ensure_default_content_type(content_types_xml: str, ext: str) -> str:
+        if re.search(rf'<Default\s+Extension="{ext}"', content_types_xml, re.IGNORECASE):
+            return content_types_xml
+        return content_types_xml.replace(
+            "</Types>",
+            f'<Default Extension="{ext}" ContentType="{_IMAGE_CONTENT_TYPES[ext]}"/></Types>',
+        )
+
+    @staticmethod
+    def _write_package(source: zipfile.ZipFile, replaced: dict, new_media: dict, output_dir: Path) -> str:
+        """将新的.docx写入输出目录下的临时文件，返回临时文件路径（由调用方原子替换到最终位置）"""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(suffix=".docx", dir=output_dir)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(temp_name, "w", zipfile.ZIP_DEFLATED) as target:
+                written = set()
+                for item in source.infolist():
+                    if item.filename in replaced:
+                        target.writestr(item, replaced[item.filename])
+                    else:
+                        target.writestr(item, source.read(item.filename))
+                    written.add(item.filename)
+                for name, data in replaced.items():
+                    if name not in written:
+                        target.writestr(name, data)
+                for name, image_path in new_media.items():
+                    target.write(image_path, name)
+            return temp_name
+        except Exception:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
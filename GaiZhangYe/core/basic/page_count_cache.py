@@ -0,0 +1,136 @@
+# GaiZhangYe/core/basic/page_count_cache.py
+"""
+Word页数持久化缓存：基于SQLite，键为（路径、大小、修改时间、内容摘要）
+- 路径+大小+修改时间均未变化时直接命中，无需读取文件内容
+- 仅修改时间变化（复制/重新保存但内容相同）时按内容摘要命中
+- 文件内容变化后摘要不同，自动失效
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.metrics import record_cache_lookup
+from GaiZhangYe.core.basic.file_manager import get_file_manager
+from GaiZhangYe.core.basic.file_processor import compute_file_hash
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_counts (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_page_counts_sha256 ON page_counts (sha256);
+"""
+
+
+class PageCountCache:
+    """Word页数缓存（进程间共享，每次操作使用独立连接，WAL模式支持并发读写）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在退出时提交、关闭"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _stat_key(file_path: Path):
+        stat = file_path.stat()
+        return str(file_path.resolve()), stat.st_size, stat.st_mtime_ns
+
+    def get(self, file_path: Path) -> Optional[int]:
+        """
+        查询缓存的页数
+        :param file_path: Word文件路径
+        :return: 命中返回页数，未命中返回None
+        """
+        page_count = self._lookup(file_path)
+        record_cache_lookup("page_count", page_count is not None)
+        return page_count
+
+    def _lookup(self, file_path: Path) -> Optional[int]:
+        try:
+            path, size, mtime_ns = self._stat_key(file_path)
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT size, mtime_ns, page_count FROM page_counts WHERE path = ?", (path,)
+                ).fetchone()
+                if row and row[0] == size and row[1] == mtime_ns:
+                    return row[2]
+
+                # 修改时间变化（或新路径）：按内容摘要查找，内容未变则沿用并刷新该路径的记录
+                sha256 = compute_file_hash(file_path)
+                row = conn.execute(
+                    "SELECT page_count FROM page_counts WHERE sha256 = ? AND size = ? LIMIT 1", (sha256, size)
+                ).fetchone()
+                if row:
+                    self._upsert(conn, path, size, mtime_ns, sha256, row[0])
+                    return row[0]
+            return None
+        except Exception as e:
+            logger.warning(f"读取页数缓存失败：{file_path} - {e}")
+            return None
+
+    def put(self, file_path: Path, page_count: int) -> None:
+        """
+        写入页数缓存（页数<=0视为无效结果，不缓存）
+        :param file_path: Word文件路径
+        :param page_count: 页数
+        """
+        if not page_count or page_count <= 0:
+            return
+        try:
+            path, size, mtime_ns = self._stat_key(file_path)
+            sha256 = compute_file_hash(file_path)
+            with self._connect() as conn:
+                self._upsert(conn, path, size, mtime_ns, sha256, int(page_count))
+        except Exception as e:
+            logger.warning(f"写入页数缓存失败：{file_path} - {e}")
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, path: str, size: int, mtime_ns: int, sha256: str, page_count: int) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO page_counts (path, size, mtime_ns, sha256, page_count, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, sha256, page_count, time.time()),
+        )
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM page_counts")
+
+
+# 模块级单例
+_page_count_cache: Optional[PageCountCache] = None
+_page_count_cache_lock = threading.Lock()
+
+
+def get_page_count_cache() -> PageCountCache:
+    """返回模块级单例的页数缓存（business_data/.cache/page_counts.sqlite3）"""
+    global _page_count_cache
+    if _page_count_cache is None:
+        with _page_count_cache_lock:
+            if _page_count_cache is None:
+                cache_dir = get_file_manager().get_cache_dir()
+                _page_count_cache = PageCountCache(cache_dir / "page_counts.sqlite3")
+    return _page_count_cache
@@ -2,18 +2,220 @@
 """
 PDF处理核心：基于pymupdf实现PDF相关操作
 """
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 import pymupdf as fitz  # pymupdf
+from PIL import Image
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import OperationMetrics
 from GaiZhangYe.core.models.exceptions import PdfProcessError
 
 logger = get_logger(__name__)
 
+# 运行指标（批量处理在进程池中执行时，只由主进程统计失败的文件数）
+_metrics = OperationMetrics("pdf_operation", "PDF操作")
+
+IMAGE_EXTRACT_MODES = ("extract", "render", "auto")
+# 可直接写出的图片格式；其他格式（如jpx、jb2）转换为PNG，便于后续插入Word
+_PORTABLE_IMAGE_EXTS = ("png", "jpeg", "jpg", "bmp")
+
+
+def group_contiguous_pages(pages: List[int]) -> List[Tuple[int, int]]:
+    """
+    将页码列表合并为连续区间（去重并排序）
+    示例：[5, 1, 2, 3, 9, 10] → [(1, 3), (5, 5), (9, 10)]
+    :param pages: 页码列表（1-based）
+    :return: (起始页, 结束页) 区间列表，包含两端
+    """
+    ranges: List[Tuple[int, int]] = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+    return ranges
+
+
+def pdf_worker_count() -> int:
+    """PDF并行处理的进程数：配置 PDF_WORKERS，为0时取CPU核数（最多4个）"""
+    configured = get_settings().pdf_workers
+    if configured > 0:
+        return configured
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _split_page_range(page_count: int, workers: int, min_pages: int) -> List[Tuple[int, int]]:
+    """将 1~page_count 均分为最多 workers 个连续区间；页数少于 min_pages 时不拆分"""
+    if page_count <= 0:
+        return []
+    if workers <= 1 or page_count < min_pages:
+        return [(1, page_count)]
+    size = -(-page_count // workers)
+    return [(start, min(start + size - 1, page_count)) for start in range(1, page_count + 1, size)]
+
+
+def _image_bytes(doc: fitz.Document, xref: int) -> Tuple[bytes, str]:
+    """读取内嵌图片的原始数据；非常用格式转换为PNG"""
+    base_image = doc.extract_image(xref)
+    if base_image["ext"] in _PORTABLE_IMAGE_EXTS:
+        return base_image["image"], base_image["ext"]
+    pix = fitz.Pixmap(doc, xref)
+    if pix.colorspace and pix.colorspace.n > 3:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    return pix.tobytes("png"), "png"
+
+
+def _extract_page_range(pdf_path: str, output_dir: str, start: int, end: int, mode: str,
+                        dpi: int) -> List[Tuple[int, List[Tuple[str, str]]]]:
+    """
+    提取 start~end 页（1-based，包含两端）的图片并写入输出目录（可在工作进程中执行）
+    区间内相同xref或相同内容的图片只写出一次
+    :return: [(页码, [(文件名, 内容摘要)])]
+    """
+    output_path = Path(output_dir)
+    stem = Path(pdf_path).stem
+    by_xref: Dict[int, Tuple[str, str]] = {}
+    by_digest: Dict[str, str] = {}
+    pages: List[Tuple[int, List[Tuple[str, str]]]] = []
+
+    def write(page_num: int, data: bytes, ext: str, new_on_page: int) -> Tuple[str, str]:
+        digest = hashlib.sha256(data).hexdigest()
+        name = by_digest.get(digest)
+        if name is None:
+            suffix = f"_{new_on_page + 1}" if new_on_page else ""
+            name = f"{stem}_{page_num}{suffix}.{ext}"
+            with open(output_path / name, "wb") as f:
+                f.write(data)
+            by_digest[digest] = name
+            logger.debug(f"从PDF提取图片：{output_path / name}")
+        return name, digest
+
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, end + 1):
+            page = doc[page_num - 1]
+            entries: List[Tuple[str, str]] = []
+            written = len(by_digest)
+            if mode != "render":
+                # 同一页重复引用的图片只取一次
+                for xref in dict.fromkeys(img[0] for img in page.get_images(full=True)):
+                    if xref not in by_xref:
+                        data, ext = _image_bytes(doc, xref)
+                        by_xref[xref] = write(page_num, data, ext, len(by_digest) - written)
+                    entries.append(by_xref[xref])
+            if mode == "render" or (mode == "auto" and not entries):
+                pix = page.get_pixmap(dpi=dpi)
+                entries.append(write(page_num, pix.tobytes("png"), "png", len(by_digest) - written))
+            pages.append((page_num, list(dict.fromkeys(entries))))
+    return pages
+
+
+@dataclass
+class PdfBatchResult:
+    """批量处理中单个文件的结果"""
+    source: Path
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class PdfOptimizeResult:
+    """单个PDF的优化结果"""
+    source: Path
+    original_bytes: int
+    optimized_bytes: int
+    images_resampled: int = 0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.optimized_bytes
+
+
+def _run_batch_chunk(method: str, jobs: List[tuple]) -> List[Tuple[Any, Optional[str]]]:
+    """依次执行一组 PdfProcessor.<method>(*args)（可在工作进程中执行），单个文件的异常不影响其他文件"""
+    processor = PdfProcessor()
+    results = []
+    for args in jobs:
+        try:
+            results.append((getattr(processor, method)(*args), None))
+        except Exception as e:
+            results.append((None, str(e) or type(e).__name__))
+    return results
+
+
+class IncrementalPdfWriter:
+    """
+    分批写出PDF：追加的页面每满 flush_pages 页增量保存到磁盘并重新打开文档，
+    内存占用只与一批的页数有关，与总页数无关（适用于数千页的合并输出）
+    先写入同目录下的临时文件，close() 时替换为目标文件；出错时调用 discard() 删除临时文件
+    """
+
+    def __init__(self, output_pdf: Path, flush_pages: Optional[int] = None):
+        self.output_pdf = output_pdf
+        self.flush_pages = max(1, flush_pages or get_settings().pdf_flush_pages)
+        self.page_count = 0
+        self._temp_pdf = output_pdf.with_name(f"{output_pdf.stem}.writing.pdf")
+        self._doc = fitz.open()
+        self._saved = False
+        self._pending = 0
+
+    def append(self, source: fitz.Document, from_page: int, to_page: int) -> None:
+        """追加源文档的 from_page~to_page 页（0-based，包含两端）"""
+        self._doc.insert_pdf(source, from_page=from_page, to_page=to_page)
+        added = to_page - from_page + 1
+        self.page_count += added
+        self._pending += added
+        if self._pending >= self.flush_pages:
+            self._flush()
+            # 重新打开后已写出的页面只在访问时才从磁盘加载
+            self._doc.close()
+            self._doc = fitz.open(self._temp_pdf)
+
+    def _flush(self) -> None:
+        if self._saved:
+            self._doc.saveIncr()
+        else:
+            self.output_pdf.parent.mkdir(parents=True, exist_ok=True)
+            self._doc.save(self._temp_pdf, deflate=True)
+            self._saved = True
+        self._pending = 0
+
+    def close(self) -> int:
+        """写出剩余页面并生成目标文件（没有页面时不生成）；返回总页数"""
+        try:
+            if self.page_count and self._pending:
+                self._flush()
+        finally:
+            self._doc.close()
+        if self.page_count:
+            os.replace(self._temp_pdf, self.output_pdf)
+        return self.page_count
+
+    def discard(self) -> None:
+        """放弃输出并删除临时文件"""
+        if not self._doc.is_closed:
+            self._doc.close()
+        self._temp_pdf.unlink(missing_ok=True)
+
 
 class PdfProcessor:
     """PDF处理器"""
 
+    @_metrics.timed("extract_pages")
     def extract_pages(self, source_pdf: Path, target_pages: List[int], output_pdf: Path) -> None:
         """
         从PDF中提取指定页面生成新的PDF
@@ -45,50 +247,106 @@ class PdfProcessor:
             logger.error(f"PDF页面提取失败：{source_pdf}", exc_info=True)
             raise PdfProcessError(f"提取失败：{str(e)}") from e
 
-    def extract_images(self, pdf_path: Path, output_dir: Path, dpi: int = 300) -> List[Path]:
+    @_metrics.timed("extract_images")
+    def extract_images(self, pdf_path: Path, output_dir: Path, dpi: int = 300, mode: Optional[str] = None,
+                       workers: Optional[int] = None) -> List[Path]:
         """
-        从PDF中提取所有图片
+        从PDF中提取所有图片，并在输出目录写入页码→图片文件的清单（{PDF名}_images.json）
+        - 同一图片（相同xref或相同内容）只写出一次，清单中各页引用同一个文件
+        - 文件名为 {PDF名}_{页码}.{扩展名}，同一页的第2张起为 {PDF名}_{页码}_{序号}.{扩展名}
+        - 页数较多时按页码区间分配给多个进程并行处理
         :param pdf_path: PDF文件路径
         :param output_dir: 图片输出目录
-        :param dpi: 图片分辨率，默认300
-        :return: 提取的图片路径列表
+        :param dpi: render/auto模式下渲染页面的分辨率，默认300
+        :param mode: extract（提取内嵌图片）/ render（按dpi将整页渲染为图片，适用于印章为矢量内容的扫描件）/
+                     auto（提取内嵌图片，没有图片的页面整页渲染）；默认取配置 PDF_IMAGE_MODE
+        :param workers: 并行进程数，默认取配置 PDF_WORKERS
+        :return: 提取的图片路径列表（按首次出现的页码排序，不含重复）
         """
         if not pdf_path.exists() or pdf_path.suffix.lower() != ".pdf":
             raise PdfProcessError(f"无效的PDF文件：{pdf_path}")
+        settings = get_settings()
+        mode = mode or settings.pdf_image_mode
+        if mode not in IMAGE_EXTRACT_MODES:
+            raise PdfProcessError(f"不支持的图片提取方式：{mode}")
 
         output_dir.mkdir(exist_ok=True, parents=True)
-        extracted_images = []
 
         try:
             with fitz.open(pdf_path) as doc:
-                # 遍历每一页
-                for page_num in range(doc.page_count):
-                    page = doc[page_num]
-                    # 获取页面上的所有图片
-                    image_list = page.get_images(full=True)
-
-                    for img_index, img in enumerate(image_list):
-                        xref = img[0]
-                        base_image = doc.extract_image(xref)
-                        image_data = base_image["image"]
-                        image_ext = base_image["ext"]
-
-                        # 生成图片文件名
-                        image_file = output_dir / f"{pdf_path.stem}_{page_num + 1}.{image_ext}"
-
-                        # 保存图片
-                        with open(image_file, "wb") as f:
-                            f.write(image_data)
-
-                        extracted_images.append(image_file)
-                        logger.debug(f"从PDF提取图片：{image_file}")
-
-                logger.info(f"从PDF提取图片完成：{pdf_path} → 共{len(extracted_images)}张")
-                return extracted_images
+                page_count = doc.page_count
+            ranges = _split_page_range(page_count, workers or pdf_worker_count(), settings.pdf_parallel_min_pages)
+            args = [(str(pdf_path), str(output_dir), start, end, mode, dpi) for start, end in ranges]
+            if len(args) <= 1:
+                chunks = [_extract_page_range(*a) for a in args]
+            else:
+                # 与Word工作池一致使用spawn（Windows下唯一可用的方式）
+                with ProcessPoolExecutor(max_workers=len(args), mp_context=multiprocessing.get_context("spawn")) as pool:
+                    chunks = list(pool.map(_extract_page_range, *zip(*args)))
+
+            # 各区间内已按xref/内容去重，这里再跨区间按内容去重：保留页码最靠前的文件
+            kept: Dict[str, str] = {}
+            manifest: Dict[str, List[str]] = {}
+            extracted_images: List[Path] = []
+            for chunk in chunks:
+                for page_num, entries in chunk:
+                    names: List[str] = []
+                    for name, digest in entries:
+                        first = kept.setdefault(digest, name)
+                        if first != name:
+                            (output_dir / name).unlink(missing_ok=True)
+                        elif output_dir / name not in extracted_images:
+                            extracted_images.append(output_dir / name)
+                        if first not in names:
+                            names.append(first)
+                    manifest[str(page_num)] = names
+
+            manifest_file = output_dir / f"{pdf_path.stem}_images.json"
+            with open(manifest_file, "w", encoding="utf-8") as f:
+                json.dump({"source": str(pdf_path), "mode": mode, "dpi": dpi, "pages": manifest},
+                          f, ensure_ascii=False, indent=2)
+
+            logger.info(f"从PDF提取图片完成：{pdf_path} → 共{len(extracted_images)}张"
+                        f"（{page_count}页，{len(ranges)}个进程，清单：{manifest_file.name}）")
+            return extracted_images
         except Exception as e:
             logger.error(f"PDF图片提取失败：{pdf_path}", exc_info=True)
             raise PdfProcessError(f"提取失败：{str(e)}") from e
 
+    @_metrics.timed("replace_pages")
+    def replace_pages(self, base_pdf: Path, replacements: List[Tuple[Tuple[int, int], Path]], output_pdf: Path) -> None:
+        """
+        用其他PDF的页面替换基准PDF中的指定页码区间（替换后总页数不变）
+        :param base_pdf: 基准PDF文件路径
+        :param replacements: ((起始页, 结束页), 替换用PDF) 列表，页码1-based且包含两端，替换用PDF的页数须等于区间长度
+        :param output_pdf: 输出PDF文件路径
+        """
+        if not base_pdf.exists() or base_pdf.suffix.lower() != ".pdf":
+            raise PdfProcessError(f"无效的PDF文件：{base_pdf}")
+
+        try:
+            with fitz.open(base_pdf) as doc:
+                total = doc.page_count
+                # 从后往前替换，前面区间的页码不受影响
+                for (start, end), source_pdf in sorted(replacements, key=lambda r: r[0][0], reverse=True):
+                    if start < 1 or end > total or start > end:
+                        raise PdfProcessError(f"无效页码区间：{start}-{end}，最大页码：{total}")
+                    with fitz.open(source_pdf) as source:
+                        if source.page_count != end - start + 1:
+                            raise PdfProcessError(f"替换页数不符：{source_pdf}有{source.page_count}页，区间{start}-{end}")
+                        doc.delete_pages(start - 1, end - 1)
+                        doc.insert_pdf(source, start_at=start - 1)
+                if doc.page_count != total:
+                    raise PdfProcessError(f"替换后页数变化：{total} → {doc.page_count}")
+                doc.save(output_pdf, garbage=3, deflate=True)
+            logger.info(f"PDF页面替换成功：{base_pdf} 区间{[r[0] for r in replacements]} → {output_pdf}")
+        except PdfProcessError:
+            raise
+        except Exception as e:
+            logger.error(f"PDF页面替换失败：{base_pdf}", exc_info=True)
+            raise PdfProcessError(f"替换失败：{str(e)}") from e
+
+    @_metrics.timed("get_page_count")
     def get_page_count(self, pdf_path: Path) -> int:
         """
         获取PDF的总页数
@@ -104,3 +362,185 @@ class PdfProcessor:
         except Exception as e:
             logger.error(f"获取PDF页数失败：{pdf_path}", exc_info=True)
             raise PdfProcessError(f"获取失败：{str(e)}") from e
+
+    @_metrics.timed("optimize_pdf")
+    def optimize_pdf(self, pdf_path: Path, target_dpi: Optional[int] = None,
+                     jpeg_quality: Optional[int] = None) -> PdfOptimizeResult:
+        """
+        原地优化PDF体积：将分辨率高于目标DPI的图片降采样并重新压缩为JPEG，合并重复对象，压缩后保存
+        优化后体积没有减小时保留原文件
+        :param pdf_path: PDF文件路径
+        :param target_dpi: 图片目标分辨率（按图片在页面上的最大显示尺寸计算），默认取配置 PDF_OPTIMIZE_DPI
+        :param jpeg_quality: 重新压缩的JPEG质量，默认取配置 PDF_OPTIMIZE_JPEG_QUALITY
+        :return: 优化结果（含节省的字节数）
+        """
+        if not pdf_path.exists() or pdf_path.suffix.lower() != ".pdf":
+            raise PdfProcessError(f"无效的PDF文件：{pdf_path}")
+        settings = get_settings()
+        target_dpi = target_dpi or settings.pdf_optimize_dpi
+        jpeg_quality = jpeg_quality or settings.pdf_optimize_jpeg_quality
+        original_bytes = pdf_path.stat().st_size
+        temp_pdf = pdf_path.with_name(f"{pdf_path.stem}.optimizing.pdf")
+
+        try:
+            with fitz.open(pdf_path) as doc:
+                resampled = self._downsample_images(doc, target_dpi, jpeg_quality)
+                # garbage=4 合并内容相同的对象（如多页重复引用的同一张盖章图片）
+                doc.save(temp_pdf, garbage=4, deflate=True, deflate_images=True, deflate_fonts=True)
+            optimized_bytes = temp_pdf.stat().st_size
+            if optimized_bytes < original_bytes:
+                os.replace(temp_pdf, pdf_path)
+            else:
+                temp_pdf.unlink()
+                optimized_bytes = original_bytes
+            result = PdfOptimizeResult(pdf_path, original_bytes, optimized_bytes, resampled)
+            logger.info(f"PDF优化完成：{pdf_path}，{original_bytes / 1024:.0f}KB → {optimized_bytes / 1024:.0f}KB"
+                        f"（节省{result.saved_bytes / 1024:.0f}KB，降采样图片{resampled}张）")
+            return result
+        except Exception as e:
+            temp_pdf.unlink(missing_ok=True)
+            logger.error(f"PDF优化失败：{pdf_path}", exc_info=True)
+            raise PdfProcessError(f"优化失败：{str(e)}") from e
+
+    @staticmethod
+    def _downsample_images(doc: fitz.Document, target_dpi: int, jpeg_quality: int) -> int:
+        """将分辨率超过目标DPI 20%以上的图片降采样为目标DPI的JPEG；返回处理的图片数"""
+        # 每张图片在各页中的最大显示尺寸（英寸），按最大尺寸计算，保证任何位置的显示分辨率都不低于目标DPI
+        display: Dict[int, Optional[Tuple[float, float]]] = {}
+        owner: Dict[int, fitz.Page] = {}
+        for page in doc:
+            for img in page.get_images(full=True):
+                xref, smask, bpc = img[0], img[1], img[4]
+                if xref in display and display[xref] is None:
+                    continue
+                if smask or bpc == 1:
+                    # 带透明蒙版（JPEG无法保留）或黑白图片不处理
+                    display[xref] = None
+                    continue
+                # 由变换矩阵计算图片自身宽、高方向的显示长度（旋转放置时与外接矩形的宽高不同）
+                for _, matrix in page.get_image_rects(xref, transform=True):
+                    width = math.hypot(matrix.a, matrix.b) / 72
+                    height = math.hypot(matrix.c, matrix.d) / 72
+                    previous = display.get(xref) or (0.0, 0.0)
+                    display[xref] = (max(previous[0], width), max(previous[1], height))
+                    owner[xref] = page
+
+        resampled = 0
+        for xref, size in display.items():
+            if size is None or min(size) <= 0:
+                continue
+            pix = fitz.Pixmap(doc, xref)
+            target = (max(1, round(size[0] * target_dpi)), max(1, round(size[1] * target_dpi)))
+            if pix.width <= target[0] * 1.2 or pix.height <= target[1] * 1.2:
+                continue
+            if pix.alpha:
+                continue
+            if pix.colorspace is None or pix.colorspace.n not in (1, 3):
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            image = Image.frombytes("L" if pix.n == 1 else "RGB", (pix.width, pix.height), pix.samples)
+            buffer = io.BytesIO()
+            image.resize(target, Image.LANCZOS).save(buffer, format="JPEG", quality=jpeg_quality, optimize=True)
+            if len(buffer.getvalue()) >= len(doc.xref_stream_raw(xref)):
+                continue
+            owner[xref].replace_image(xref, stream=buffer.getvalue())
+            resampled += 1
+        return resampled
+
+    # ==================== 批量处理（多文件，进程池执行） ====================
+
+    def get_page_counts(self, pdf_paths: List[Path], workers: Optional[int] = None) -> Iterator[PdfBatchResult]:
+        """
+        批量获取PDF页数
+        :return: 按输入顺序逐个产出的结果（value为页数），单个文件失败时error记录原因
+        """
+        return self._run_batch("get_page_count", [(Path(p),) for p in pdf_paths], workers)
+
+    def extract_pages_batch(self, jobs: List[Tuple[Path, List[int], Path]],
+                            workers: Optional[int] = None) -> Iterator[PdfBatchResult]:
+        """
+        批量提取页面
+        :param jobs: (源PDF, 页码列表, 输出PDF) 列表
+        :return: 按输入顺序逐个产出的结果，单个文件失败时error记录原因
+        """
+        return self._run_batch("extract_pages", [(Path(src), list(pages), Path(out)) for src, pages, out in jobs],
+                               workers)
+
+    def extract_images_batch(self, jobs: List[Tuple[Path, Path]], dpi: int = 300, mode: Optional[str] = None,
+                             workers: Optional[int] = None) -> Iterator[PdfBatchResult]:
+        """
+        批量提取图片（各文件内部不再拆分进程）
+        :param jobs: (PDF, 图片输出目录) 列表
+        :return: 按输入顺序逐个产出的结果（value为图片路径列表），单个文件失败时error记录原因
+        """
+        return self._run_batch("extract_images", [(Path(pdf), Path(out), dpi, mode, 1) for pdf, out in jobs],
+                               workers)
+
+    def optimize_pdfs(self, pdf_paths: List[Path], workers: Optional[int] = None) -> Iterator[PdfBatchResult]:
+        """
+        批量原地优化PDF体积
+        :return: 按输入顺序逐个产出的结果（value为PdfOptimizeResult），单个文件失败时error记录原因
+        """
+        return self._run_batch("optimize_pdf", [(Path(p),) for p in pdf_paths], workers)
+
+    def _run_batch(self, method: str, jobs: List[tuple], workers: Optional[int]) -> Iterator[PdfBatchResult]:
+        """
+        将任务分块派发给进程池，按输入顺序产出结果；同时在途的块数有上限，结果无需全部缓存
+        文件数较少或只有一个进程时在当前进程中执行；工作进程崩溃时该块记为失败，重建进程池后继续
+        """
+        settings = get_settings()
+        workers = workers or pdf_worker_count()
+        if workers <= 1 or len(jobs) < settings.pdf_batch_min_files:
+            for args in jobs:
+                value, error = _run_batch_chunk(method, [args])[0]
+                yield PdfBatchResult(args[0], value, error)
+            return
+
+        chunk_size = max(1, min(64, len(jobs) // (workers * 4)))
+        chunks = iter([jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)])
+
+        def new_pool() -> ProcessPoolExecutor:
+            # 与Word工作池一致使用spawn（Windows下唯一可用的方式）
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+        pool = new_pool()
+        in_flight = deque()  # (块, future, 是否为重试)
+
+        def submit(chunk: List[tuple], retry: bool = False) -> None:
+            in_flight.append((chunk, pool.submit(_run_batch_chunk, method, chunk), retry))
+
+        try:
+            for chunk in chunks:
+                submit(chunk)
+                if len(in_flight) >= workers * 2:
+                    break
+            while in_flight:
+                chunk, future, retry = in_flight[0]
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    # 任一工作进程崩溃都会使整个进程池失效：重建后重新提交在途的块，
+                    # 已重试过仍失败的块（大概率包含导致崩溃的文件）记为失败
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = new_pool()
+                    pending = [(c, r) for c, _, r in in_flight]
+                    in_flight.clear()
+                    for c, r in pending:
+                        if r and c is chunk:
+                            continue
+                        submit(c, retry=True)
+                    if not retry:
+                        continue
+                    logger.error(f"PDF批量处理的工作进程异常退出，{len(chunk)}个文件记为失败")
+                    results = [(None, "工作进程异常退出")] * len(chunk)
+                else:
+                    in_flight.popleft()
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    submit(next_chunk)
+                for args, (value, error) in zip(chunk, results):
+                    if error:
+                        # 工作进程中的指标不回传，失败数由主进程计入
+                        _metrics.failures.labels(method).inc()
+                    yield PdfBatchResult(args[0], value, error)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,81 @@
+# GaiZhangYe/core/basic/pdf_stamper.py
+"""
+PDF盖章页插入引擎：不经过Word，直接在转换好的PDF上放置整页盖章图片
+- overlay：在目标页上方铺满整页插入图片（与Word中"浮于文字上方、铺满整页"的效果一致）
+- replace：删除目标页，插入同尺寸、仅含盖章图片的新页（输出中不保留被盖章页的原文字）
+横向页面的处理与 WordProcessor.insert_image_to_word 一致：图片顺时针旋转90度后铺满页面
+"""
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import pymupdf as fitz  # PyMuPDF
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.core.models.exceptions import PdfProcessError
+
+logger = get_logger(__name__)
+
+STAMP_MODES = ("overlay", "replace")
+
+
+class PdfStamper:
+    """PDF盖章页插入引擎"""
+
+    def __init__(self, mode: str = "overlay"):
+        """
+        :param mode: overlay（覆盖在原页面上方）或 replace（用仅含图片的新页替换原页面）
+        """
+        if mode not in STAMP_MODES:
+            raise PdfProcessError(f"不支持的PDF盖章方式：{mode}")
+        self.mode = mode
+
+    def insert_images(self, pdf_path: Path, images: List[Tuple[Path, object]], output_path: Path) -> None:
+        """
+        在PDF的指定页放置整页图片并另存
+        :param pdf_path: 源PDF（未盖章文档的转换结果）
+        :param images: (图片路径, 页码) 列表，页码为1-based，超出范围时修正到首页/末页
+        :param output_path: 输出PDF路径（可与源PDF相同）
+        """
+        if not pdf_path.exists():
+            raise PdfProcessError(f"PDF文件不存在：{pdf_path}")
+
+        try:
+            with fitz.open(pdf_path) as doc:
+                if doc.page_count == 0:
+                    raise PdfProcessError(f"PDF没有页面：{pdf_path}")
+                for image_path, image_location in images:
+                    if not Path(image_path).exists():
+                        raise FileNotFoundError(f"图片文件不存在：{image_path}")
+                    try:
+                        page_num = int(image_location)
+                    except (TypeError, ValueError):
+                        raise PdfProcessError(f"image_location must be an integer page number, got: {image_location}")
+                    page_index = max(1, min(page_num, doc.page_count)) - 1
+                    self._stamp_page(doc, page_index, Path(image_path))
+                    logger.debug(f"已在PDF第{page_index + 1}页放置图片：{image_path}")
+
+                # 先写入临时文件再替换，输出路径与源PDF相同时也安全
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_output = output_path.with_name(f"{output_path.stem}.stamping.pdf")
+                doc.save(temp_output, garbage=3, deflate=True)
+            os.replace(temp_output, output_path)
+            logger.info(f"PDF盖章完成（{self.mode}，{len(images)}张图片）：{pdf_path} → {output_path}")
+        except (PdfProcessError, FileNotFoundError):
+            raise
+        except Exception as e:
+            logger.error(f"PDF盖章失败：{pdf_path}", exc_info=True)
+            raise PdfProcessError(f"PDF盖章失败：{str(e)}") from e
+
+    def _stamp_page(self, doc: fitz.Document, page_index: int, image_path: Path) -> None:
+        """在指定页铺满整页放置图片；横向页面中图片顺时针旋转90度"""
+        page = doc[page_index]
+        if self.mode == "replace":
+            width, height = page.rect.width, page.rect.height
+            doc.delete_page(page_index)
+            page = doc.new_page(page_index, width=width, height=height)
+
+        rect = page.rect
+        # PyMuPDF的rotate为逆时针角度，Word中Rotation=90为顺时针，因此横向页使用270
+        rotate = 270 if rect.width > rect.height else 0
+        page.insert_image(rect, filename=str(image_path), rotate=rotate, keep_proportion=False, overlay=True)
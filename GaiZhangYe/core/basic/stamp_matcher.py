@@ -0,0 +1,258 @@
+# GaiZhangYe/core/basic/stamp_matcher.py
+"""
+盖章页自动匹配：按版面的感知哈希将扫描回来的盖章图片匹配到（文档, 页码）
+- 候选页（功能1准备的未盖章页面）以低分辨率渲染后计算差值哈希（dHash），扫描图片按4个方向分别计算
+- 距离矩阵为哈希的汉明距离：安装了NumPy时向量化计算，否则逐对计算（打包版本不含NumPy）
+- 分配：先确定互为最近且明显优于次优的配对，剩余部分用匈牙利算法求总距离最小的分配
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import groupby
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import pymupdf as fitz  # PyMuPDF
+from PIL import Image, ImageOps
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.core.basic.pdf_processor import pdf_worker_count
+
+try:
+    import numpy as np
+except ImportError:  # 打包版本不含NumPy，退回逐对计算
+    np = None
+
+logger = get_logger(__name__)
+
+# 差值哈希的边长：HASH_SIZE x HASH_SIZE 位
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+# 最近与次近候选的距离差达到该位数时，认为匹配没有歧义
+_MARGIN_BITS = HASH_BITS // 16
+# 互为最近的配对距离不超过该位数时直接确定，不参与全局分配
+_SURE_BITS = HASH_BITS // 8
+# 参与匈牙利算法的图片数上限，超出部分按距离从小到大贪心分配
+_MAX_ASSIGNMENT = 400
+
+
+@dataclass
+class StampMatch:
+    """一张图片的匹配结果"""
+    image_index: int
+    page_index: int
+    distance: int
+    confidence: float
+
+
+def dhash(image: Image.Image) -> int:
+    """差值哈希：灰度、拉伸对比度后缩放为 (HASH_SIZE+1) x HASH_SIZE，比较水平相邻像素"""
+    gray = ImageOps.autocontrast(image.convert("L"))
+    # 灰度图每像素1字节
+    pixels = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_image_file(image_path: Path) -> List[int]:
+    """扫描图片的哈希：依次为原方向、旋转90/180/270度（扫描件方向可能与页面不同）"""
+    with Image.open(image_path) as img:
+        # JPEG按缩小的尺寸解码，大幅减少解码耗时
+        img.draft("L", (img.width // 8 or 1, img.height // 8 or 1))
+        image = img.convert("L")
+    return [dhash(image.rotate(angle, expand=True)) for angle in (0, 90, 180, 270)]
+
+
+def hash_pdf_pages(pdf_path: Path, page_indexes: Sequence[int], dpi: int) -> List[int]:
+    """以低分辨率渲染PDF的指定页（0-based）并计算哈希"""
+    hashes = []
+    with fitz.open(pdf_path) as doc:
+        for page_index in page_indexes:
+            pix = doc[page_index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            hashes.append(dhash(Image.frombytes("L", (pix.width, pix.height), pix.samples)))
+    return hashes
+
+
+def _hash_page_group(args: Tuple[str, List[int], int]) -> List[int]:
+    pdf_path, page_indexes, dpi = args
+    return hash_pdf_pages(Path(pdf_path), page_indexes, dpi)
+
+
+def _hash_image_group(paths: List[str]) -> List[List[int]]:
+    return [hash_image_file(Path(p)) for p in paths]
+
+
+def _map(func, groups: list, total: int) -> list:
+    """数量较多且有多个CPU时在进程池中执行"""
+    workers = pdf_worker_count()
+    if workers <= 1 or total < get_settings().pdf_batch_min_files or len(groups) <= 1:
+        return [func(group) for group in groups]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(func, groups))
+
+
+class StampMatcher:
+    """盖章图片与候选页的匹配器"""
+
+    def __init__(self, dpi: Optional[int] = None):
+        """
+        :param dpi: 候选页的渲染分辨率，默认取配置 STAMP_MATCH_DPI
+        """
+        self.dpi = dpi or get_settings().stamp_match_dpi
+
+    def hash_pages(self, pages: List[Tuple[Path, int]]) -> List[int]:
+        """
+        计算候选页的哈希
+        :param pages: (PDF路径, 0-based页索引) 列表；同一PDF的相邻页在同一任务中渲染
+        """
+        groups = []
+        for pdf_path, items in groupby(pages, key=lambda item: item[0]):
+            indexes = [page_index for _, page_index in items]
+            for start in range(0, len(indexes), 64):
+                groups.append((str(pdf_path), indexes[start:start + 64], self.dpi))
+        return [h for chunk in _map(_hash_page_group, groups, len(pages)) for h in chunk]
+
+    def hash_images(self, image_paths: List[Path]) -> List[List[int]]:
+        """计算扫描图片的哈希（每张图片4个方向）"""
+        groups = [[str(p) for p in image_paths[i:i + 16]] for i in range(0, len(image_paths), 16)]
+        return [h for chunk in _map(_hash_image_group, groups, len(image_paths)) for h in chunk]
+
+    def match(self, image_hashes: List[List[int]], page_hashes: List[int]) -> List[StampMatch]:
+        """
+        为每张图片分配一个候选页（每页最多分配一张图片），使总距离最小
+        :return: 匹配结果（按图片顺序），图片多于候选页时多出的图片不在结果中
+        """
+        if not image_hashes or not page_hashes:
+            return []
+        distances = distance_matrix(image_hashes, page_hashes)
+        assignment = _assign(distances)
+
+        matches = []
+        for image_index, page_index in sorted(assignment.items()):
+            row = distances[image_index]
+            distance = row[page_index]
+            second = min((d for j, d in enumerate(row) if j != page_index), default=HASH_BITS)
+            matches.append(StampMatch(image_index, page_index, distance, _confidence(distance, second)))
+        return matches
+
+
+def distance_matrix(image_hashes: List[List[int]], page_hashes: List[int]) -> List[List[int]]:
+    """图片 x 候选页的汉明距离矩阵（每张图片取4个方向中的最小距离）"""
+    if np is not None:
+        pages = _to_bits(page_hashes)                       # (页数, 字节数)
+        images = _to_bits([h for hs in image_hashes for h in hs]).reshape(len(image_hashes), 4, -1)
+        popcount = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+        rows = []
+        # 按块计算，控制中间数组的大小
+        for start in range(0, len(images), 256):
+            block = images[start:start + 256]
+            xor = np.bitwise_xor(block[:, :, None, :], pages[None, None, :, :])
+            rows.append(popcount[xor].sum(axis=3).min(axis=1))
+        return np.concatenate(rows).tolist()
+    return [[min((h ^ p).bit_count() for h in hashes) for p in page_hashes] for hashes in image_hashes]
+
+
+def _to_bits(hashes: List[int]):
+    return np.frombuffer(b"".join(h.to_bytes(HASH_BITS // 8, "big") for h in hashes),
+                         dtype=np.uint8).reshape(len(hashes), -1)
+
+
+def _confidence(distance: int, second: int) -> float:
+    """
+    置信度：相似度（距离相对于随机版面的期望距离 HASH_BITS/2）乘以与次优候选的区分度
+    同一模板的签署页彼此相似时，区分度低，置信度随之降低
+    """
+    similarity = max(0.0, 1 - distance / (HASH_BITS / 2))
+    margin = min(1.0, max(0, second - distance) / _MARGIN_BITS)
+    return round(similarity * margin, 3)
+
+
+def _assign(distances: List[List[int]]) -> dict:
+    """返回 {图片索引: 候选页索引}"""
+    n_images, n_pages = len(distances), len(distances[0])
+    assignment = {}
+
+    # 1. 互为最近、距离很小且明显优于次优候选的配对直接确定
+    best_page = [min(range(n_pages), key=row.__getitem__) for row in distances]
+    best_image = {}
+    for i, j in enumerate(best_page):
+        if j not in best_image or distances[i][j] < distances[best_image[j]][j]:
+            best_image[j] = i
+    for j, i in best_image.items():
+        row = distances[i]
+        second = min((d for k, d in enumerate(row) if k != j), default=HASH_BITS)
+        if row[j] <= _SURE_BITS and second - row[j] >= _MARGIN_BITS:
+            assignment[i] = j
+
+    # 2. 剩余部分求全局最优分配（规模过大时先按距离贪心分配一部分）
+    rest_images = [i for i in range(n_images) if i not in assignment]
+    rest_pages = [j for j in range(n_pages) if j not in assignment.values()]
+    if len(rest_images) > _MAX_ASSIGNMENT:
+        logger.warning(f"待分配图片{len(rest_images)}张，超出{_MAX_ASSIGNMENT}张的部分按距离贪心分配")
+        pairs = sorted((distances[i][j], i, j) for i in rest_images for j in rest_pages)
+        used_images, used_pages = set(), set()
+        for _, i, j in pairs:
+            if len(rest_images) - len(used_images) <= _MAX_ASSIGNMENT:
+                break
+            if i not in used_images and j not in used_pages:
+                assignment[i] = j
+                used_images.add(i)
+                used_pages.add(j)
+        rest_images = [i for i in rest_images if i not in used_images]
+        rest_pages = [j for j in rest_pages if j not in used_pages]
+
+    if rest_images and rest_pages:
+        cost = [[distances[i][j] for j in rest_pages] for i in rest_images]
+        for r, c in _hungarian(cost).items():
+            assignment[rest_images[r]] = rest_pages[c]
+    return assignment
+
+
+def _hungarian(cost: List[List[int]]) -> dict:
+    """匈牙利算法（势函数 + 最短增广路，O(n²m)）：矩形代价矩阵的最小代价分配，返回 {行: 列}"""
+    transposed = len(cost) > len(cost[0])
+    if transposed:
+        cost = [list(col) for col in zip(*cost)]
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u, v = [0] * (n + 1), [0] * (m + 1)
+    row_of = [0] * (m + 1)  # 列 -> 分配到的行（1-based，0表示未分配）
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        row_of[0] = i
+        j0 = 0
+        min_to = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = row_of[j0], inf, 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    current = row[j - 1] - u[i0] - v[j]
+                    if current < min_to[j]:
+                        min_to[j], way[j] = current, j0
+                    if min_to[j] < delta:
+                        delta, j1 = min_to[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_to[j] -= delta
+            j0 = j1
+            if row_of[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+    result = {row_of[j] - 1: j - 1 for j in range(1, m + 1) if row_of[j]}
+    if transposed:
+        result = {c: r for r, c in result.items()}
+    return result
@@ -0,0 +1,328 @@
+# GaiZhangYe/core/basic/word_pool.py
+"""
+Word转PDF并行工作池：每个工作进程独占一个Word实例，从共享队列领取任务
+转换器通过可插拔的后端接口（WordBackend）提供，便于在Linux下用模拟后端验证调度与失败处理
+"""
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import OperationMetrics, counter, gauge
+from GaiZhangYe.core.basic.file_processor import windows_natural_sort_key
+from GaiZhangYe.core.models.exceptions import WordProcessError
+
+logger = get_logger(__name__)
+
+# 运行指标：工作进程内的Word操作无法回传，由主进程按每个文件的结果计入
+_metrics = OperationMetrics("word_operation", "Word操作（launch/open/clean/export/page_count/insert/save）")
+_conversions = counter("word_conversions_total", "单文件Word转PDF次数（success/failure/cached）", ("result",))
+# 正在运行的工作池的进程表（pid -> 进程），用于统计存活的工作进程数
+_active_pools: List[dict] = []
+_active_pools_lock = threading.Lock()
+# 连续多少个工作进程未就绪即退出（后端无法在子进程中反序列化、Word初始化使进程崩溃等）后放弃剩余任务
+_MAX_STARTUP_FAILURES = 3
+
+
+def _pool_worker_count() -> int:
+    with _active_pools_lock:
+        return sum(len(processes) for processes in _active_pools)
+
+
+gauge("word_pool_workers", "Word转换工作池中存活的工作进程数（每个进程一个Word实例）", callback=_pool_worker_count)
+
+
+class WordBackend:
+    """Word转换后端接口：每个工作进程创建并持有一个实例"""
+
+    def convert(self, word_path: Path, pdf_path: Path) -> None:
+        """将单个Word文件转换为PDF，失败时抛出异常"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """释放后端资源（如退出Word）"""
+        pass
+
+
+class ComWordBackend(WordBackend):
+    """基于pywin32的Word后端（每个进程一个Word.Application）"""
+
+    def __init__(self):
+        from GaiZhangYe.core.basic.word_processor import WordProcessor
+        self._processor = WordProcessor()
+
+    def convert(self, word_path: Path, pdf_path: Path) -> None:
+        self._processor.word_to_pdf(word_path, pdf_path)
+
+    def close(self) -> None:
+        self._processor.close()
+
+
+class FakeWordBackend(WordBackend):
+    """模拟后端：不依赖Word，按固定耗时生成单页PDF（用于Linux下验证工作池）
+    :param delay: 每个文件的模拟转换耗时（秒）
+    :param fail_marker: 文件名包含该字符串时模拟转换失败
+    :param crash_marker: 文件名包含该字符串时模拟工作进程崩溃（Word进程异常退出）
+    :param crash_on_init: 创建时即模拟进程崩溃（不抛出异常，进程直接退出）
+    """
+
+    def __init__(self, delay: float = 0.0, fail_marker: Optional[str] = None,
+                 crash_marker: Optional[str] = None, crash_on_init: bool = False):
+        if crash_on_init:
+            import os
+            os._exit(1)
+        self.delay = delay
+        self.fail_marker = fail_marker
+        self.crash_marker = crash_marker
+
+    def convert(self, word_path: Path, pdf_path: Path) -> None:
+        import os
+        import pymupdf as fitz
+
+        if not word_path.exists():
+            raise FileNotFoundError(f"Word文件不存在：{word_path}")
+        if self.delay:
+            time.sleep(self.delay)
+        if self.crash_marker and self.crash_marker in word_path.name:
+            os._exit(1)
+        if self.fail_marker and self.fail_marker in word_path.name:
+            raise WordProcessError(f"模拟转换失败：{word_path}")
+
+        pdf_path.parent.mkdir(parents=True, exist_ok=True)
+        with fitz.open() as doc:
+            page = doc.new_page()
+            page.insert_text((72, 72), word_path.name)
+            doc.save(pdf_path)
+
+
+@dataclass
+class ConversionResult:
+    """单个文件的转换结果"""
+    source: Path
+    output: Path
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _worker_main(backend_factory: Callable[[], WordBackend], inbox, result_queue) -> None:
+    """工作进程入口：创建独占后端，循环领取任务直至收到结束标记(None)"""
+    pid = multiprocessing.current_process().pid
+    try:
+        backend = backend_factory()
+    except Exception as e:
+        result_queue.put(("init_error", pid, None, str(e), 0.0))
+        return
+
+    result_queue.put(("ready", pid, None, None, 0.0))
+    try:
+        while True:
+            task = inbox.get()
+            if task is None:
+                break
+            index, word_path, pdf_path = task
+            start = time.perf_counter()
+            try:
+                backend.convert(Path(word_path), Path(pdf_path))
+                error = None
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            result_queue.put(("done", pid, index, error, time.perf_counter() - start))
+    finally:
+        try:
+            backend.close()
+        except Exception:
+            pass
+
+
+class WordConversionPool:
+    """Word转PDF工作池
+    - 每个工作进程独占一个后端实例（即一个Word进程），通过共享队列领取文件
+    - 单个文件失败/超时/工作进程崩溃不影响其余文件，崩溃的进程会被自动替换
+    - 结果按源文件名的Windows自然排序返回
+    """
+
+    def __init__(self, workers: Optional[int] = None,
+                 backend_factory: Callable[[], WordBackend] = ComWordBackend,
+                 timeout: Optional[float] = None):
+        """
+        :param workers: 工作进程数（默认读取配置word_workers）
+        :param backend_factory: 可序列化的后端工厂（类或functools.partial），在工作进程内调用
+        :param timeout: 单个文件的超时时间（秒），默认读取配置word2pdf_timeout
+        """
+        settings = get_settings()
+        self.workers = max(1, workers or settings.word_workers)
+        self.backend_factory = backend_factory
+        self.timeout = timeout if timeout is not None else settings.word2pdf_timeout
+
+    def convert_all(self, jobs: List[Tuple[Path, Path]],
+                    on_result: Optional[Callable[[ConversionResult], None]] = None) -> List[ConversionResult]:
+        """
+        并行转换一组文件
+        :param jobs: (Word路径, PDF输出路径) 列表
+        :param on_result: 每个文件得到结果（成功/失败/超时）时在主进程中调用
+        :return: 每个任务的转换结果（按源文件名自然排序）
+        """
+        if not jobs:
+            return []
+
+        workers = min(self.workers, len(jobs))
+        logger.info(f"Word转换工作池启动：{len(jobs)}个文件，{workers}个工作进程")
+        if workers == 1:
+            results = self._convert_serial(jobs, on_result)
+        else:
+            results = self._convert_parallel(jobs, workers, on_result)
+
+        failed = [r for r in results if not r.ok]
+        logger.info(f"Word转换工作池完成：成功{len(results) - len(failed)}/{len(results)}个文件")
+        for r in failed:
+            logger.warning(f"转换失败 {r.source}：{r.error}")
+        return sorted(results, key=lambda r: windows_natural_sort_key(r.source))
+
+    def _convert_serial(self, jobs: List[Tuple[Path, Path]],
+                        on_result: Optional[Callable[[ConversionResult], None]] = None) -> List[ConversionResult]:
+        """单工作者时在当前进程内串行执行，省去进程启动开销"""
+        results = []
+        backend = self.backend_factory()
+        try:
+            for word_path, pdf_path in jobs:
+                start = time.perf_counter()
+                try:
+                    backend.convert(word_path, pdf_path)
+                    error = None
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                result = ConversionResult(word_path, pdf_path, error, time.perf_counter() - start)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        finally:
+            backend.close()
+        return results
+
+    def _convert_parallel(self, jobs: List[Tuple[Path, Path]], workers: int,
+                          on_result: Optional[Callable[[ConversionResult], None]] = None) -> List[ConversionResult]:
+        """多进程执行：主进程持有待办队列，逐个派发给空闲的工作进程，始终掌握每个进程手上的任务"""
+        # COM对象不支持fork，统一使用spawn（与Windows行为一致）
+        ctx = multiprocessing.get_context("spawn")
+        result_queue = ctx.Queue()
+        pending = deque(range(len(jobs)))
+        results: Dict[int, ConversionResult] = {}
+        processes: Dict[int, Tuple[multiprocessing.Process, object]] = {}  # pid -> (进程, 收件队列)
+        in_flight: Dict[int, Tuple[int, float]] = {}  # pid -> (任务索引, 开始时间)
+        ready_pids = set()  # 已发送"ready"的工作进程
+        startup_failures = 0  # 连续未就绪即退出的工作进程数
+
+        def spawn_worker():
+            inbox = ctx.Queue()
+            p = ctx.Process(target=_worker_main, args=(self.backend_factory, inbox, result_queue), daemon=True)
+            p.start()
+            processes[p.pid] = (p, inbox)
+
+        def dispatch(pid: int):
+            if not pending or pid not in processes:
+                return
+            index = pending.popleft()
+            word_path, pdf_path = jobs[index]
+            processes[pid][1].put((index, str(word_path), str(pdf_path)))
+            in_flight[pid] = (index, time.monotonic())
+
+        def finish(index: int, error: Optional[str], elapsed: float = 0.0):
+            word_path, pdf_path = jobs[index]
+            results[index] = ConversionResult(word_path, pdf_path, error, elapsed)
+            _metrics.seconds.labels("pool_convert").observe(elapsed)
+            if error:
+                _metrics.failures.labels("pool_convert").inc()
+            _conversions.labels("failure" if error else "success").inc()
+            if on_result:
+                on_result(results[index])
+
+        def stop_worker(pid: int):
+            p, _ = processes.pop(pid)
+            p.terminate()
+            p.join(5)
+
+        with _active_pools_lock:
+            _active_pools.append(processes)
+        for _ in range(workers):
+            spawn_worker()
+
+        try:
+            while len(results) < len(jobs):
+                try:
+                    kind, pid, index, error, elapsed = result_queue.get(timeout=0.5)
+                except queue.Empty:
+                    kind = None
+
+                if kind == "ready":
+                    ready_pids.add(pid)
+                    startup_failures = 0
+                    dispatch(pid)
+                elif kind == "done" and in_flight.get(pid, (None,))[0] == index:
+                    in_flight.pop(pid)
+                    finish(index, error, elapsed)
+                    dispatch(pid)
+                elif kind == "init_error":
+                    # 后端无法创建（如Word未安装），剩余任务都无法执行
+                    logger.error(f"Word工作进程初始化失败：{error}")
+                    while pending:
+                        finish(pending.popleft(), f"工作进程初始化失败：{error}")
+                    processes.pop(pid, None)
+
+                now = time.monotonic()
+                # 超时：终止卡死的工作进程（Word弹窗/挂起），由新进程接替
+                for pid, (index, started) in list(in_flight.items()):
+                    if self.timeout and now - started > self.timeout:
+                        logger.warning(f"转换超时（>{self.timeout}秒），终止工作进程{pid}：{jobs[index][0]}")
+                        in_flight.pop(pid)
+                        stop_worker(pid)
+                        finish(index, f"转换超时（>{self.timeout}秒）", now - started)
+
+                # 崩溃：工作进程意外退出时，其手上的任务记为失败
+                for pid, (p, _) in list(processes.items()):
+                    if p.is_alive():
+                        continue
+                    processes.pop(pid)
+                    if pid in in_flight:
+                        index, started = in_flight.pop(pid)
+                        finish(index, f"工作进程异常退出（exitcode={p.exitcode}）", now - started)
+                    elif pid not in ready_pids:
+                        startup_failures += 1
+                        logger.warning(f"Word工作进程{pid}未就绪即退出（exitcode={p.exitcode}），"
+                                       f"连续{startup_failures}次")
+                    ready_pids.discard(pid)
+
+                # 工作进程反复启动失败时不再替换，剩余任务记为失败（与初始化失败相同）
+                if startup_failures >= _MAX_STARTUP_FAILURES and pending:
+                    logger.error(f"Word工作进程连续{startup_failures}次未就绪即退出，放弃剩余{len(pending)}个文件")
+                    while pending:
+                        finish(pending.popleft(), f"工作进程启动失败（连续{startup_failures}次未就绪即退出）")
+
+                # 补充工作进程，保证仍有待办任务时进程数不低于配置
+                while pending and len(processes) < min(workers, len(pending) + len(in_flight)):
+                    spawn_worker()
+
+                if not processes and not in_flight and pending:
+                    # 不应出现：兜底防止死循环
+                    while pending:
+                        finish(pending.popleft(), "无可用的工作进程")
+        finally:
+            for p, inbox in processes.values():
+                inbox.put(None)
+            for p, _ in processes.values():
+                p.join(10)
+                if p.is_alive():
+                    p.terminate()
+            with _active_pools_lock:
+                _active_pools.remove(processes)
+
+        return [results[i] for i in range(len(jobs))]
@@ -1,32 +1,195 @@
 # GaiZhangYe/core/word_processor.py
-import win32com.client
-import pythoncom
-
-# 动态生成常量
-win32 = win32com.client.constants
+try:
+    import win32com.client
+    import pythoncom
+    # 动态生成常量
+    win32 = win32com.client.constants
+except ImportError:  # 非Windows环境（无pywin32），仅在真正调用Word时报错
+    win32com = None
+    pythoncom = None
+    win32 = None
+import importlib
+import threading
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
+
+import pymupdf as fitz  # PyMuPDF
 
 from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import OperationMetrics, counter, gauge
 from GaiZhangYe.core.models.exceptions import WordProcessError
+from GaiZhangYe.core.models.progress import ProgressCallback, report_progress
+from GaiZhangYe.core.basic.page_count_cache import get_page_count_cache
+from GaiZhangYe.core.basic.ooxml_reader import DocxMetadata, read_docx_metadata
+from GaiZhangYe.core.basic.artifact_store import get_conversion_cache, conversion_cache_key
 
 logger = get_logger(__name__)
 
+# 运行指标
+_metrics = OperationMetrics("word_operation", "Word操作（launch/open/clean/export/page_count/insert/save）")
+_conversions = counter("word_conversions_total", "单文件Word转PDF次数（success/failure/cached）", ("result",))
+_word_instances = gauge("word_instances", "当前进程中已启动且尚未退出的Word实例数")
+
+
+def _load_word_app_factory():
+    """解析配置word_app_factory（"模块:属性"），返回可调用对象；未配置时返回None"""
+    spec = get_settings().word_app_factory
+    if not spec:
+        return None
+    module_name, _, attr = spec.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError) as e:
+        raise WordProcessError(f"无法加载Word应用工厂：{spec} - {e}") from e
+
+
+def word_available() -> bool:
+    """当前环境能否调用Word（已安装pywin32或配置了自定义Word应用工厂）"""
+    return win32com is not None or bool(get_settings().word_app_factory)
+
+
+# 线程局部状态：COM单元是否已初始化；COM调度线程的常驻Word实例
+_thread_state = threading.local()
+
+
+def ensure_com_initialized() -> None:
+    """初始化当前线程的COM单元（STA）：每个线程只初始化一次，之后只检查线程局部标记"""
+    if pythoncom is not None and not getattr(_thread_state, "com_initialized", False):
+        pythoncom.CoInitialize()
+        _thread_state.com_initialized = True
+
+
+def _create_word_app():
+    """启动新的Word应用实例（配置了自定义工厂时使用工厂）"""
+    factory = _load_word_app_factory()
+    if factory is None and win32com is None:
+        raise WordProcessError("当前环境未安装pywin32，无法调用Word")
+    with _metrics.track("launch"):
+        if factory is not None:
+            word_app = factory()
+        else:
+            ensure_com_initialized()
+            # 使用DispatchEx避免冲突，后台运行
+            word_app = win32com.client.DispatchEx("Word.Application")
+            word_app.Visible = False
+            word_app.DisplayAlerts = 0  # 抑制弹窗
+    _word_instances.inc()
+    return word_app
+
+
+def enable_resident_word_app() -> None:
+    """
+    将当前线程设为常驻Word线程（由COM调度线程调用）：
+    此后在该线程中创建的WordProcessor共用同一个Word实例（首次使用时启动），close()时不退出Word
+    """
+    ensure_com_initialized()
+    _thread_state.resident = True
+    _thread_state.word_app = None
+
+
+def check_resident_word_app() -> None:
+    """检查当前线程的常驻Word实例是否仍可用（如Word进程已崩溃），不可用时丢弃，下次使用时重新启动"""
+    word_app = getattr(_thread_state, "word_app", None)
+    if word_app is None:
+        return
+    try:
+        word_app.Documents.Count
+    except Exception as e:
+        logger.warning(f"常驻Word实例已不可用，将在下次使用时重新启动：{str(e)}")
+        _thread_state.word_app = None
+        _word_instances.dec()
+
+
+def release_resident_word_app() -> None:
+    """退出当前线程的常驻Word实例（COM调度线程结束时调用）"""
+    word_app = getattr(_thread_state, "word_app", None)
+    _thread_state.resident = False
+    _thread_state.word_app = None
+    if word_app is not None:
+        try:
+            word_app.Quit()
+            logger.info("常驻Word应用已退出")
+        except Exception as e:
+            logger.warning(f"退出常驻Word应用失败：{str(e)}")
+        finally:
+            _word_instances.dec()
+
+
+def _run_with_word(func, *args, **kwargs):
+    """经COM调度器执行一次Word操作（生产服务模式下在调度线程中执行，否则在当前线程执行）"""
+    # 延迟导入：com_dispatcher依赖本模块
+    from GaiZhangYe.core.basic.com_dispatcher import run_with_word
+    return run_with_word(func, *args, **kwargs)
+
+
+def lookup_page_count(word_path: Path) -> Tuple[Optional[int], str, Optional[DocxMetadata]]:
+    """
+    不启动Word获取页数：持久化页数缓存 → .docx内置统计信息（可信时）→ 转换缓存中的整篇PDF
+    :return: (页数, 来源cache/docx/pdf, .docx元数据)；页数为None时需要通过Word计算，元数据可作为不可信的回退值
+    """
+    cache = get_page_count_cache()
+    page_count = cache.get(word_path)
+    if page_count is not None:
+        logger.debug(f"页数缓存命中：{word_path} - {page_count}页")
+        return page_count, "cache", None
+
+    # .docx快速路径：直接读取压缩包中的统计信息，无需启动Word
+    metadata = None
+    if word_path.suffix.lower() == ".docx":
+        try:
+            metadata = read_docx_metadata(word_path)
+        except WordProcessError as e:
+            logger.warning(f"读取.docx元数据失败，改用其他方式获取页数：{e}")
+        if metadata and metadata.confident:
+            logger.info(f"通过.docx统计信息获取页数成功：{word_path} - {metadata.page_count}页")
+            cache.put(word_path, metadata.page_count)
+            return metadata.page_count, "docx", metadata
+        if metadata:
+            logger.debug(f".docx统计信息不可信（{metadata.reason}）：{word_path}")
+
+    # 文档整篇转换过PDF时，PDF页数即Word分页结果
+    conversion_cache = get_conversion_cache()
+    pdf_path = conversion_cache.open_path(conversion_cache_key(word_path)) if conversion_cache else None
+    if pdf_path is not None:
+        try:
+            with fitz.open(pdf_path) as pdf:
+                page_count = pdf.page_count
+        except Exception as e:  # 缓存产物可能恰好被淘汰
+            logger.debug(f"读取转换缓存中的PDF失败：{pdf_path} - {e}")
+            page_count = 0
+        if page_count > 0:
+            logger.info(f"通过转换缓存中的PDF获取页数成功：{word_path} - {page_count}页")
+            cache.put(word_path, page_count)
+            return page_count, "pdf", metadata
+    return None, "", metadata
+
+
 class WordProcessor:
     """Word处理器：封装pywin32的Word操作"""
     def __init__(self):
-        self._word_app = None
+        self._word_app = None  # 自行启动的Word实例（COM调度线程的常驻实例不记录在此，由调度线程负责退出）
 
-    def _get_word_app(self) -> win32com.client.CDispatch:
-        """获取Word应用实例（单例）"""
-        pythoncom.CoInitialize()
+    def _get_word_app(self):
+        """获取Word应用实例（单例）；在COM调度线程中始终使用所在线程的常驻Word实例
+        （同一个WordProcessor的各次操作可能由不同的调度线程执行，COM对象不能跨线程使用）
+        """
+        ensure_com_initialized()
+        if getattr(_thread_state, "resident", False):
+            if _thread_state.word_app is None:
+                _thread_state.word_app = _create_word_app()
+            return _thread_state.word_app
         if not self._word_app:
-            # 使用DispatchEx避免冲突，后台运行
-            self._word_app = win32com.client.DispatchEx("Word.Application")
-            self._word_app.Visible = False
-            self._word_app.DisplayAlerts = 0  # 抑制弹窗
+            self._word_app = _create_word_app()
         return self._word_app
 
+    @staticmethod
+    def _open_doc(word_app, *args, **kwargs):
+        """打开文档（参数同Documents.Open），计入open耗时"""
+        with _metrics.track("open"):
+            return word_app.Documents.Open(*args, **kwargs)
+
+    @_metrics.timed("clean")
     def _clean_doc(self, doc):
         """清理文档：接受所有修订 + 删除所有注释"""
         try:
@@ -52,39 +215,102 @@ class WordProcessor:
             raise FileNotFoundError(f"Word文件不存在：{word_path}")
         if word_path.suffix.lower() not in [".docx", ".doc"]:
             raise WordProcessError(f"非Word文件（仅支持.doc/.docx）：{word_path}")
-        
+
+        # 相同内容的文档已转换过时直接复用缓存的PDF，不启动Word
+        cache = get_conversion_cache()
+        cache_key = conversion_cache_key(word_path) if cache else None
+        if cache and cache.fetch(cache_key, pdf_path):
+            logger.info(f"Word转PDF命中缓存：{word_path} → {pdf_path}")
+            _conversions.labels("cached").inc()
+            return
+
+        _run_with_word(self._convert_with_word, word_path, pdf_path, cache, cache_key)
+
+    def _convert_with_word(self, word_path: Path, pdf_path: Path, cache, cache_key: Optional[str]) -> None:
+        """通过Word打开文档、清理修订/注释并导出PDF，启用转换缓存时写入缓存"""
         doc = None
         try:
             word_app = self._get_word_app()
             # 打开文档（绝对路径避免解析问题）
-            doc = word_app.Documents.Open(str(word_path.absolute()))
+            doc = self._open_doc(word_app, str(word_path.absolute()))
             
             # 清理修订和注释
             self._clean_doc(doc)
 
-            # 确保输出目录存在
-            pdf_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 导出PDF（使用直接常量值以避免AttributeError）
-            doc.ExportAsFixedFormat(
-                OutputFileName=str(pdf_path.absolute()),
-                ExportFormat=17,  # wdExportFormatPDF = 17
-                OpenAfterExport=False,  # 导出后不打开PDF
-                Item=0,  # wdExportDocument = 0 (仅导出正文)
-                CreateBookmarks=1  # wdExportCreateHeadingBookmarks = 1
-            )
+            self._export_pdf(doc, pdf_path)
             
             logger.info(f"Word转PDF成功：{word_path} → {pdf_path}")
+            _conversions.labels("success").inc()
+            if cache:
+                cache.put(cache_key, pdf_path)
         except Exception as e:
             logger.error(f"Word转PDF失败：{word_path}", exc_info=True)
+            _conversions.labels("failure").inc()
             raise WordProcessError(f"转换失败：{str(e)}") from e
         finally:
             # 确保文档关闭，释放资源
             if doc:
                 doc.Close(SaveChanges=False)  # 不保存原文档的修改
 
-    def batch_word_to_pdf(self, input_dir: Path, output_dir: Path) -> List[Path]:
-        """批量Word转PDF"""
+    @_metrics.timed("export")
+    def _export_pdf(self, doc, pdf_path: Path, page_range: Optional[Tuple[int, int]] = None) -> None:
+        """将已打开的文档导出为PDF
+        :param page_range: 仅导出的页码范围(起始页, 结束页)，1-based且包含两端；默认导出整篇文档
+        """
+        # 确保输出目录存在
+        pdf_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 导出PDF（使用直接常量值以避免AttributeError）
+        if page_range:
+            doc.ExportAsFixedFormat(
+                OutputFileName=str(pdf_path.absolute()),
+                ExportFormat=17,  # wdExportFormatPDF = 17
+                OpenAfterExport=False,  # 导出后不打开PDF
+                Range=3,  # wdExportFromTo = 3 (仅导出From~To页)
+                From=page_range[0],
+                To=page_range[1],
+                Item=0,  # wdExportDocument = 0 (仅导出正文)
+                CreateBookmarks=1  # wdExportCreateHeadingBookmarks = 1
+            )
+        else:
+            doc.ExportAsFixedFormat(
+                OutputFileName=str(pdf_path.absolute()),
+                ExportFormat=17,  # wdExportFormatPDF = 17
+                OpenAfterExport=False,  # 导出后不打开PDF
+                Item=0,  # wdExportDocument = 0 (仅导出正文)
+                CreateBookmarks=1  # wdExportCreateHeadingBookmarks = 1
+            )
+
+    def open_document(self, word_path: Path) -> "WordDocumentSession":
+        """
+        打开文档并返回会话：在一次打开中完成多次图片插入、保存Word与导出PDF
+        会话中的文档只能在打开它的线程中使用：生产服务模式下调用方应将整个会话放在一次run_with_word中执行
+        用法：
+            with word_processor.open_document(path) as session:
+                session.insert_image(image, 3)
+                session.save_as(output_word)
+                session.export_pdf(output_pdf)
+        """
+        if not word_path.exists():
+            raise FileNotFoundError(f"Word文件不存在：{word_path}")
+        if word_path.suffix.lower() not in [".docx", ".doc"]:
+            raise WordProcessError(f"非Word文件（仅支持.doc/.docx）：{word_path}")
+
+        try:
+            word_app = self._get_word_app()
+            doc = self._open_doc(word_app, str(word_path.absolute()))
+            doc.Activate()
+        except Exception as e:
+            logger.error(f"打开Word文档失败：{word_path}", exc_info=True)
+            raise WordProcessError(f"打开失败：{str(e)}") from e
+        logger.debug(f"已打开Word文档会话：{word_path}")
+        return WordDocumentSession(self, doc, word_path)
+
+    def batch_word_to_pdf(self, input_dir: Path, output_dir: Path,
+                          progress_callback: Optional[ProgressCallback] = None) -> List[Path]:
+        """批量Word转PDF
+        :param progress_callback: 进度回调，每个文件转换完成/失败后调用
+        """
         # 校验输入目录
         if not input_dir.exists():
             raise WordProcessError(f"输入目录不存在：{input_dir}")
@@ -99,23 +325,25 @@ class WordProcessor:
             raise WordProcessError(f"目录{input_dir}无Word文件（.doc/.docx）")
 
         pdf_paths = []
-        for word_file in word_files:
+        for index, word_file in enumerate(word_files, start=1):
             try:
                 # 构造PDF输出路径
                 pdf_path = output_dir / f"{word_file.stem}.pdf"
                 # 调用单文件转换（已包含修订/注释清理）
                 self.word_to_pdf(word_file, pdf_path)
                 pdf_paths.append(pdf_path)
+                report_progress(progress_callback, word_file.name, "done", index, len(word_files), output=str(pdf_path))
             except (FileNotFoundError, WordProcessError) as e:
                 # 单个文件失败不中断批量流程，仅记录日志
                 logger.warning(f"跳过文件{word_file}：{str(e)}")
+                report_progress(progress_callback, word_file.name, "failed", index, len(word_files), str(e))
                 continue
 
         logger.info(f"批量转换完成，成功生成{len(pdf_paths)}/{len(word_files)}个PDF文件")
         return pdf_paths
 
     def close(self):
-        """手动关闭Word应用，释放资源"""
+        """手动关闭Word应用，释放资源（不影响COM调度线程的常驻Word实例）"""
         if self._word_app:
             try:
                 self._word_app.Quit()
@@ -124,13 +352,16 @@ class WordProcessor:
                 logger.warning(f"退出Word应用失败：{str(e)}")
             finally:
                 self._word_app = None
+                _word_instances.dec()
 
     def __del__(self):
         """析构函数：自动关闭Word应用"""
         self.close()
 
     def get_word_page_count(self, word_path: Path) -> int:
-        """获取Word文件的页数"""
+        """获取Word文件的页数
+        查找顺序：持久化页数缓存 → .docx内置统计信息（可信时）→ 转换缓存中的整篇PDF → 通过Word计算
+        """
         # 跳过Word的临时文件（以~$开头）
         if word_path.name.startswith("~$"):
             raise WordProcessError(f"临时文件，跳过获取页数：{word_path}")
@@ -142,16 +373,38 @@ class WordProcessor:
         if word_path.suffix.lower() not in [".docx", ".doc"]:
             raise WordProcessError(f"非Word文件：{word_path}")
 
+        page_count, _, metadata = lookup_page_count(word_path)
+        if page_count is not None:
+            return page_count
+
+        # 无法使用Word时（如非Windows主机或Word计算失败），退而使用不可信的统计值，但不写入缓存
+        fallback_count = metadata.page_count if metadata else None
+        if not word_available() and fallback_count:
+            logger.warning(f"Word不可用，使用.docx统计页数（{metadata.reason}）：{word_path} - {fallback_count}页")
+            return fallback_count
+        try:
+            page_count = _run_with_word(self._count_pages_with_word, word_path)
+        except WordProcessError:
+            if fallback_count:
+                logger.warning(f"Word计算页数失败，使用.docx统计页数（{metadata.reason}）：{word_path} - {fallback_count}页")
+                return fallback_count
+            raise
+        get_page_count_cache().put(word_path, page_count)
+        return page_count
+
+    @_metrics.timed("page_count")
+    def _count_pages_with_word(self, word_path: Path) -> int:
+        """通过Word打开文档统计页数（失败时回退为转PDF后统计）"""
         try:
             word_app = self._get_word_app()
             abs_path = str(word_path.absolute())
 
             # 以只读方式打开，避免弹窗和写锁
             try:
-                doc = word_app.Documents.Open(FileName=abs_path, ReadOnly=True)
+                doc = self._open_doc(word_app, FileName=abs_path, ReadOnly=True)
             except Exception:
                 # 有些Word在打开时对参数敏感，重试更简单的调用
-                doc = word_app.Documents.Open(abs_path)
+                doc = self._open_doc(word_app, abs_path)
 
             # 清理修订与注释，保证页数统计一致
             try:
@@ -228,190 +481,270 @@ class WordProcessor:
         if not image_path.exists():
             raise FileNotFoundError(f"图片文件不存在：{image_path}")
 
-        try:
-            # 获取Word应用实例
-            if not self._word_app:
-                self._word_app = self._get_word_app()
+        _run_with_word(self._insert_and_save, word_path, image_path, image_location, output_path)
 
-            doc = self._word_app.Documents.Open(str(word_path))
+    def _insert_and_save(self, word_path: Path, image_path: Path, image_location, output_path: Path) -> None:
+        """打开文档插入图片后另存为output_path"""
+        doc = None
+        try:
+            word_app = self._get_word_app()
+            doc = self._open_doc(word_app, str(word_path))
             doc.Activate()
+            self._insert_image_into_doc(doc, image_path, image_location)
 
-            # image_location expected to be an integer page number provided by frontend
-            try:
-                page_num = int(image_location)
-            except Exception:
-                raise WordProcessError(f"image_location must be an integer page number, got: {image_location}")
+            # 保存并关闭文档
+            with _metrics.track("save"):
+                doc.SaveAs(str(output_path))
+            logger.info(f"图片插入Word成功（Range方式，浮动/覆盖尝试）：{image_path} → {output_path}")
+        except Exception as e:
+            logger.error(f"插入图片失败：{word_path}", exc_info=True)
+            raise WordProcessError(f"插入失败：{str(e)}") from e
+        finally:
+            if doc:
+                try:
+                    doc.Close(SaveChanges=False)
+                except Exception:
+                    pass
 
-            # 计算目标页：根据文档页数进行边界修正
-            try:
-                max_pages = doc.ComputeStatistics(2)
-            except Exception:
-                max_pages = None
+    @_metrics.timed("insert")
+    def _insert_image_into_doc(self, doc, image_path: Path, image_location) -> None:
+        """在已打开的文档中插入整页图片：定位到目标页开头，转为浮于文字上方的形状并铺满整页"""
+        # image_location expected to be an integer page number provided by frontend
+        try:
+            page_num = int(image_location)
+        except Exception:
+            raise WordProcessError(f"image_location must be an integer page number, got: {image_location}")
 
-            if max_pages is not None:
-                final_target_page = max(1, min(page_num, max_pages))
-            else:
-                final_target_page = max(1, page_num)
+        # 计算目标页：根据文档页数进行边界修正
+        try:
+            max_pages = doc.ComputeStatistics(2)
+        except Exception:
+            max_pages = None
 
-            logger.info(f"图片将插入的目标页: {final_target_page}")
+        if max_pages is not None:
+            final_target_page = max(1, min(page_num, max_pages))
+        else:
+            final_target_page = max(1, page_num)
 
-            # 使用 Range/GoTo 来定位到目标页的开头（更稳定，避免依赖 ActiveWindow.Selection）
-            rng = None
-            try:
-                if final_target_page is not None:
-                    try:
-                        rng = doc.GoTo(What=win32.wdGoToPage, Which=win32.wdGoToAbsolute, Count=final_target_page)
-                    except Exception:
-                        try:
-                            rng = doc.GoTo(1, 1, final_target_page)
-                        except Exception:
-                            rng = None
-                if rng is None:
-                    # 回退到文档末尾作为锚点
-                    rng = doc.Content
+        logger.info(f"图片将插入的目标页: {final_target_page}")
+
+        # 使用 Range/GoTo 来定位到目标页的开头（更稳定，避免依赖 ActiveWindow.Selection）
+        rng = None
+        try:
+            if final_target_page is not None:
+                try:
+                    rng = doc.GoTo(What=win32.wdGoToPage, Which=win32.wdGoToAbsolute, Count=final_target_page)
+                except Exception:
                     try:
-                        rng.Collapse(Direction=win32.wdCollapseEnd)
+                        rng = doc.GoTo(1, 1, final_target_page)
                     except Exception:
-                        pass
-            except Exception as e:
-                logger.warning(f"基于 Range 的定位失败，将使用文档末尾作为插入点：{e}")
+                        rng = None
+            if rng is None:
+                # 回退到文档末尾作为锚点
                 rng = doc.Content
                 try:
                     rng.Collapse(Direction=win32.wdCollapseEnd)
                 except Exception:
                     pass
+        except Exception as e:
+            logger.warning(f"基于 Range 的定位失败，将使用文档末尾作为插入点：{e}")
+            rng = doc.Content
+            try:
+                rng.Collapse(Direction=win32.wdCollapseEnd)
+            except Exception:
+                pass
+
+        # 在定位 Range 上插入图片为 InlineShape（直接使用 Range 的 InlineShapes）
+        # 如果GoTo返回的是Selection对象，尝试从中获取Range
+        try:
+            # 一些Word版本会返回 Selection 而非 Range
+            test_range = getattr(rng, 'Range', None)
+            if test_range is not None:
+                rng = test_range
+        except Exception:
+            pass
+
+        inline_shapes = rng.InlineShapes
+        inline_shape = inline_shapes.AddPicture(str(image_path))
+
+        # 首选：将插入的 inline shape 转为浮于文字上的 Shape，并铺满整页
+        try:
+            shp = inline_shape.ConvertToShape()
+
+            # 禁止锁定纵横比以便铺满整页
+            try:
+                shp.LockAspectRatio = False
+            except Exception:
+                pass
 
-            # 在定位 Range 上插入图片为 InlineShape（直接使用 Range 的 InlineShapes）
+            # 获取目标页的尺寸（优先使用 rng 的 section）
+            current_section = None
             try:
-                # 如果GoTo返回的是Selection对象，尝试从中获取Range
+                current_section = rng.Sections(1)
+            except Exception:
                 try:
-                    # 一些Word版本会返回 Selection 而非 Range
-                    test_range = getattr(rng, 'Range', None)
-                    if test_range is not None:
-                        rng = test_range
+                    current_section = doc.Sections(doc.Sections.Count)
                 except Exception:
-                    pass
-
-                inline_shapes = rng.InlineShapes
-                inline_shape = inline_shapes.AddPicture(str(image_path))
+                    current_section = None
 
-                # 首选：将插入的 inline shape 转为浮于文字上的 Shape，并铺满整页
+            if current_section is not None:
+                page_height = current_section.PageSetup.PageHeight
+                page_width = current_section.PageSetup.PageWidth
+                # 设置图片格式（浮于文字上方并铺满整页，参考前端/用户配置）
                 try:
-                    shp = inline_shape.ConvertToShape()
-
-                    # 禁止锁定纵横比以便铺满整页
-                    try:
-                        shp.LockAspectRatio = False
-                    except Exception:
-                        pass
+                    # 使用数值常量以避免依赖命名常量差异
+                    shp.WrapFormat.Type = 3
+                    shp.RelativeHorizontalPosition = 1
+                    shp.RelativeVerticalPosition = 1
 
-                    # 获取目标页的尺寸（优先使用 rng 的 section）
-                    current_section = None
+                    # 尝试使用当前窗口的 Selection 对应的 section
                     try:
-                        current_section = rng.Sections(1)
+                        current_section = doc.ActiveWindow.Selection.Sections(1)
                     except Exception:
-                        try:
-                            current_section = doc.Sections(doc.Sections.Count)
-                        except Exception:
-                            current_section = None
-
-                    if current_section is not None:
-                        page_height = current_section.PageSetup.PageHeight
-                        page_width = current_section.PageSetup.PageWidth
-                        # 设置图片格式（浮于文字上方并铺满整页，参考前端/用户配置）
-                        try:
-                            # 使用数值常量以避免依赖命名常量差异
-                            shp.WrapFormat.Type = 3
-                            shp.RelativeHorizontalPosition = 1
-                            shp.RelativeVerticalPosition = 1
+                        current_section = current_section
 
-                            # 尝试使用当前窗口的 Selection 对应的 section
-                            try:
-                                current_section = doc.ActiveWindow.Selection.Sections(1)
-                            except Exception:
-                                current_section = current_section
-
-                            page_height = current_section.PageSetup.PageHeight
-                            page_width = current_section.PageSetup.PageWidth
-
-                            if page_height > page_width:
-                                shp.Width = page_width
-                                shp.Height = page_height
-                            else:
-                                shp.Width = page_height
-                                shp.Height = page_width
-                                try:
-                                    shp.Rotation = 90
-                                except Exception:
-                                    try:
-                                        shp.rotation = 90
-                                    except Exception:
-                                        pass
-
-                            # 将Left/Top设置为较大的负值，确保在页面左上角覆盖
-                            try:
-                                shp.Left = -999995
-                                shp.Top = -999995
-                            except Exception:
-                                pass
+                    page_height = current_section.PageSetup.PageHeight
+                    page_width = current_section.PageSetup.PageWidth
 
-                            try:
-                                shp.ZOrder(1)  # wdBringToFront = 1
-                            except Exception:
-                                pass
-                        except Exception:
-                            pass
+                    if page_height > page_width:
+                        shp.Width = page_width
+                        shp.Height = page_height
                     else:
-                        # 无法获取页设置时，回退为按比例缩放的 inline 插入
-                        try:
-                            if inline_shape.Width > 400:
-                                ratio = 400 / inline_shape.Width
-                                inline_shape.Width = 400
-                                inline_shape.Height = int(inline_shape.Height * ratio)
-                        except Exception:
-                            pass
-
-                except Exception as e:
-                    # 如果 ConvertToShape 或属性设置失败，回退为 inline 插入并按可用宽度缩放
-                    logger.warning(f"ConvertToShape 或浮动设置失败，回退到 inline 方式: {e}")
-                    try:
-                        current_section = None
+                        shp.Width = page_height
+                        shp.Height = page_width
                         try:
-                            current_section = rng.Sections(1)
+                            shp.Rotation = 90
                         except Exception:
                             try:
-                                current_section = doc.Sections(doc.Sections.Count)
-                            except Exception:
-                                current_section = None
-
-                        if current_section is not None:
-                            page_height = current_section.PageSetup.PageHeight
-                            page_width = current_section.PageSetup.PageWidth
-                            left_margin = current_section.PageSetup.LeftMargin
-                            right_margin = current_section.PageSetup.RightMargin
-                            usable_width = max(1, page_width - left_margin - right_margin)
-                            try:
-                                if inline_shape.Width > usable_width:
-                                    ratio = usable_width / inline_shape.Width
-                                    inline_shape.Width = usable_width
-                                    inline_shape.Height = int(inline_shape.Height * ratio)
+                                shp.rotation = 90
                             except Exception:
                                 pass
+
+                    # 将Left/Top设置为较大的负值，确保在页面左上角覆盖
+                    try:
+                        shp.Left = -999995
+                        shp.Top = -999995
                     except Exception:
                         pass
 
-                # 保存并关闭文档
-                doc.SaveAs(str(output_path))
-                doc.Close()
-                logger.info(f"图片插入Word成功（Range方式，浮动/覆盖尝试）：{image_path} → {output_path}")
-            except Exception as e:
-                logger.error(f"通过 Range 插入图片失败：{e}", exc_info=True)
+                    try:
+                        shp.ZOrder(1)  # wdBringToFront = 1
+                    except Exception:
+                        pass
+                except Exception:
+                    pass
+            else:
+                # 无法获取页设置时，回退为按比例缩放的 inline 插入
                 try:
-                    doc.Close(SaveChanges=False)
+                    if inline_shape.Width > 400:
+                        ratio = 400 / inline_shape.Width
+                        inline_shape.Width = 400
+                        inline_shape.Height = int(inline_shape.Height * ratio)
                 except Exception:
                     pass
-                raise
+
         except Exception as e:
-            logger.error(f"插入图片失败：{word_path}", exc_info=True)
+            # 如果 ConvertToShape 或属性设置失败，回退为 inline 插入并按可用宽度缩放
+            logger.warning(f"ConvertToShape 或浮动设置失败，回退到 inline 方式: {e}")
+            try:
+                current_section = None
+                try:
+                    current_section = rng.Sections(1)
+                except Exception:
+                    try:
+                        current_section = doc.Sections(doc.Sections.Count)
+                    except Exception:
+                        current_section = None
+
+                if current_section is not None:
+                    page_height = current_section.PageSetup.PageHeight
+                    page_width = current_section.PageSetup.PageWidth
+                    left_margin = current_section.PageSetup.LeftMargin
+                    right_margin = current_section.PageSetup.RightMargin
+                    usable_width = max(1, page_width - left_margin - right_margin)
+                    try:
+                        if inline_shape.Width > usable_width:
+                            ratio = usable_width / inline_shape.Width
+                            inline_shape.Width = usable_width
+                            inline_shape.Height = int(inline_shape.Height * ratio)
+                    except Exception:
+                        pass
+            except Exception:
+                pass
+
+
+class WordDocumentSession:
+    """Word文档会话：持有一个已打开的文档，避免每次操作都重复打开/关闭"""
+
+    def __init__(self, processor: WordProcessor, doc, word_path: Path):
+        self._processor = processor
+        self._doc = doc
+        self.word_path = word_path
+        self._page_count = None
+
+    @property
+    def page_count(self) -> int:
+        """文档页数（浮于文字上方的整页图片不影响分页，首次计算后复用）"""
+        if self._page_count is None:
+            try:
+                with _metrics.track("page_count"):
+                    self._page_count = int(self._doc.ComputeStatistics(2))  # 2=wdStatisticPages
+            except Exception as e:
+                raise WordProcessError(f"获取页数失败：{str(e)}") from e
+        return self._page_count
+
+    def insert_image(self, image_path: Path, image_location) -> None:
+        """在指定页插入整页图片（同 WordProcessor.insert_image_to_word，但不保存/关闭文档）"""
+        if not image_path.exists():
+            raise FileNotFoundError(f"图片文件不存在：{image_path}")
+        try:
+            self._processor._insert_image_into_doc(self._doc, image_path, image_location)
+            logger.info(f"图片插入Word成功（会话方式）：{image_path} → {self.word_path}")
+        except Exception as e:
+            logger.error(f"插入图片失败：{self.word_path}", exc_info=True)
             raise WordProcessError(f"插入失败：{str(e)}") from e
 
+    def save_as(self, output_path: Path) -> None:
+        """另存为Word文件"""
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with _metrics.track("save"):
+                self._doc.SaveAs(str(output_path.absolute()))
+            logger.info(f"Word文件已保存：{output_path}")
+        except Exception as e:
+            logger.error(f"保存Word文件失败：{output_path}", exc_info=True)
+            raise WordProcessError(f"保存失败：{str(e)}") from e
+
+    def clean(self) -> None:
+        """接受所有修订并删除注释（会改变分页，清理后重新计算页数）"""
+        self._processor._clean_doc(self._doc)
+        self._page_count = None
+
+    def export_pdf(self, pdf_path: Path, page_range: Optional[Tuple[int, int]] = None) -> None:
+        """清理修订/注释后导出PDF（与 WordProcessor.word_to_pdf 输出一致）；应在 save_as 之后调用
+        :param page_range: 仅导出的页码范围(起始页, 结束页)，1-based且包含两端；默认导出整篇文档
+        """
+        try:
+            self.clean()
+            self._processor._export_pdf(self._doc, pdf_path, page_range)
+            range_desc = f"（第{page_range[0]}-{page_range[1]}页）" if page_range else ""
+            logger.info(f"Word转PDF成功{range_desc}：{self.word_path} → {pdf_path}")
+        except Exception as e:
+            logger.error(f"Word转PDF失败：{self.word_path}", exc_info=True)
+            raise WordProcessError(f"转换失败：{str(e)}") from e
+
+    def close(self) -> None:
+        """关闭文档（不保存未另存的修改）"""
+        if self._doc is not None:
+            try:
+                self._doc.Close(SaveChanges=False)
+            except Exception as e:
+                logger.warning(f"关闭Word文档失败：{self.word_path} - {str(e)}")
+            finally:
+                self._doc = None
+
+    def __enter__(self) -> "WordDocumentSession":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -2,28 +2,54 @@
 """
 功能3：批量Word转PDF服务
 """
+from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 from GaiZhangYe.utils.logger import get_logger
-from GaiZhangYe.core.basic.file_processor import FileProcessor
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import SERVICE_RUNS
+from GaiZhangYe.core.basic.file_processor import FileProcessor, windows_natural_sort_key
 from GaiZhangYe.core.basic.word_processor import WordProcessor
+from GaiZhangYe.core.basic.pdf_processor import PdfProcessor, PdfOptimizeResult
+from GaiZhangYe.core.basic.word_pool import WordConversionPool
+from GaiZhangYe.core.basic.conversion_manifest import ConversionManifest
+from GaiZhangYe.core.basic.artifact_store import conversion_options
 from GaiZhangYe.core.models.exceptions import BusinessError
+from GaiZhangYe.core.models.progress import ProgressCallback, report_progress
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class IncrementalReport:
+    """增量转换报告（文件名列表）"""
+    skipped: List[str] = field(default_factory=list)
+    rebuilt: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)  # 源文件名 -> 失败原因
+    deleted: List[str] = field(default_factory=list)
+    saved_bytes: Dict[str, int] = field(default_factory=dict)  # 输出文件名 -> 优化节省的字节数（开启PDF优化时）
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
 class BatchConvertService:
     """批量Word转PDF服务"""
 
     def __init__(self):
         self.file_processor = FileProcessor()
         self.word_processor = WordProcessor()
+        self.pdf_processor = PdfProcessor()
 
-    def run(self, input_dir: Path, output_dir: Path) -> List[Path]:
+    @SERVICE_RUNS.timed("batch_convert")
+    def run(self, input_dir: Path, output_dir: Path, workers: Optional[int] = None,
+            progress_callback: Optional[ProgressCallback] = None) -> List[Path]:
         """
         执行批量Word转PDF
         :param input_dir: 输入目录（包含待转换的Word文件）
         :param output_dir: 输出目录（存放生成的PDF文件）
+        :param workers: 并行工作进程数（默认读取配置word_workers，1表示串行）
+        :param progress_callback: 进度回调，每个文件转换完成/失败后调用
         :return: 生成的PDF文件路径列表
         """
         logger.info("开始执行【功能3：批量Word转PDF】")
@@ -38,10 +64,34 @@ class BatchConvertService:
 
             logger.info(f"找到{len(word_files)}个Word文件待转换")
 
-            # 2. 批量转换
-            converted_pdfs = self.word_processor.batch_word_to_pdf(
-                input_dir, output_dir
-            )
+            # 2. 批量转换（多工作进程时由工作池调度，每个进程独占一个Word实例）
+            workers = workers or get_settings().word_workers
+            if workers > 1:
+                jobs = [
+                    (word_file, output_dir / f"{word_file.stem}.pdf")
+                    for word_file in word_files
+                    if not word_file.name.startswith("~$")
+                ]
+                finished = []
+
+                def on_result(result):
+                    finished.append(result)
+                    # 工作进程继续转换后续文件的同时，在主进程中优化已完成的PDF
+                    optimized = self._optimize_output(result.output) if result.ok else None
+                    report_progress(progress_callback, result.source.name, "done" if result.ok else "failed",
+                                    len(finished), len(jobs), result.error or _saved_message(optimized),
+                                    str(result.output) if result.ok else None)
+
+                results = WordConversionPool(workers=workers).convert_all(jobs, on_result=on_result)
+                converted_pdfs = [r.output for r in results if r.ok]
+            else:
+                converted_pdfs = self.word_processor.batch_word_to_pdf(
+                    input_dir, output_dir, progress_callback=progress_callback
+                )
+                if get_settings().pdf_optimize:
+                    for result in self.pdf_processor.optimize_pdfs(converted_pdfs):
+                        if not result.ok:
+                            logger.warning(f"PDF优化失败，保留未优化的文件 {result.source.name}：{result.error}")
 
             logger.info(
                 f"【功能3】批量转换完成，成功生成{len(converted_pdfs)}个PDF文件"
@@ -50,3 +100,112 @@ class BatchConvertService:
         except Exception as e:
             logger.error("【功能3】批量转换失败", exc_info=True)
             raise BusinessError(f"批量转PDF失败：{str(e)}") from e
+
+    @SERVICE_RUNS.timed("batch_convert_incremental")
+    def run_incremental(self, input_dir: Path, output_dir: Path, workers: Optional[int] = None,
+                        delete_orphans: bool = False,
+                        progress_callback: Optional[ProgressCallback] = None) -> IncrementalReport:
+        """
+        增量批量Word转PDF：仅转换新增或内容变化的文件
+        :param input_dir: 输入目录（包含待转换的Word文件）
+        :param output_dir: 输出目录（存放生成的PDF文件及转换清单）
+        :param workers: 并行工作进程数（默认读取配置word_workers）
+        :param delete_orphans: 是否删除源文件已不存在的输出PDF（仅限清单中记录的文件）
+        :param progress_callback: 进度回调，每个文件跳过/转换完成/失败后调用
+        :return: 增量转换报告
+        """
+        logger.info("开始执行【功能3：增量批量Word转PDF】")
+        try:
+            output_dir.mkdir(exist_ok=True, parents=True)
+            word_files = sorted(
+                (f for f in self.file_processor.list_files(input_dir, [".docx", ".doc"])
+                 if not f.name.startswith("~$")),
+                key=windows_natural_sort_key,
+            )
+            if not word_files:
+                raise BusinessError(f"目录{input_dir}中未找到Word文件")
+
+            manifest = ConversionManifest(output_dir)
+            options = self._manifest_options()
+            report = IncrementalReport()
+            total = len(word_files)
+
+            # 1. 判断哪些文件需要重新转换
+            jobs = []
+            for word_file in word_files:
+                pdf_path = output_dir / f"{word_file.stem}.pdf"
+                if manifest.is_up_to_date(word_file, pdf_path, options):
+                    report.skipped.append(word_file.name)
+                    report_progress(progress_callback, word_file.name, "skipped", len(report.skipped), total,
+                                    "已是最新", str(pdf_path))
+                else:
+                    jobs.append((word_file, pdf_path))
+            logger.info(f"增量转换：{len(report.skipped)}个文件已是最新，{len(jobs)}个文件需要转换")
+
+            # 2. 转换缺失或过期的文件，成功后更新清单
+            def on_result(result):
+                optimized = None
+                if result.ok:
+                    # 先优化再记录清单（清单中记录的是最终输出的摘要）
+                    optimized = self._optimize_output(result.output)
+                    if optimized is not None:
+                        report.saved_bytes[result.output.name] = optimized.saved_bytes
+                    manifest.record(result.source, result.output, options)
+                    report.rebuilt.append(result.source.name)
+                else:
+                    manifest.forget(result.output.name)
+                    report.failed[result.source.name] = result.error
+                report_progress(progress_callback, result.source.name, "done" if result.ok else "failed",
+                                len(report.skipped) + len(report.rebuilt) + len(report.failed), total,
+                                result.error or _saved_message(optimized), str(result.output) if result.ok else None)
+
+            try:
+                if jobs:
+                    WordConversionPool(workers=workers).convert_all(jobs, on_result=on_result)
+
+                # 3. 清理源文件已删除的输出
+                for orphan in manifest.orphans([f"{f.stem}.pdf" for f in word_files]):
+                    if delete_orphans:
+                        orphan_path = output_dir / orphan
+                        if orphan_path.exists():
+                            orphan_path.unlink()
+                        report.deleted.append(orphan)
+                        manifest.forget(orphan)
+                        logger.info(f"已删除源文件不存在的输出：{orphan_path}")
+            finally:
+                manifest.save()
+
+            logger.info(
+                f"【功能3】增量转换完成：跳过{len(report.skipped)}个，重新生成{len(report.rebuilt)}个，"
+                f"失败{len(report.failed)}个，删除{len(report.deleted)}个"
+            )
+            return report
+        except Exception as e:
+            logger.error("【功能3】增量转换失败", exc_info=True)
+            raise BusinessError(f"增量转PDF失败：{str(e)}") from e
+
+    @staticmethod
+    def _manifest_options() -> dict:
+        """增量转换清单中记录的参数：导出参数，开启PDF优化时加上优化参数（参数变化后重新生成）"""
+        options = conversion_options()
+        settings = get_settings()
+        if settings.pdf_optimize:
+            options["optimize"] = {"dpi": settings.pdf_optimize_dpi, "jpeg_quality": settings.pdf_optimize_jpeg_quality}
+        return options
+
+    def _optimize_output(self, pdf_path: Path) -> Optional[PdfOptimizeResult]:
+        """按配置（PDF_OPTIMIZE）优化转换输出的PDF；未开启或优化失败时返回None（保留未优化的PDF）"""
+        if not get_settings().pdf_optimize:
+            return None
+        try:
+            return self.pdf_processor.optimize_pdf(pdf_path)
+        except Exception as e:
+            logger.warning(f"PDF优化失败，保留未优化的文件 {pdf_path.name}：{str(e)}")
+            return None
+
+
+def _saved_message(optimized: Optional[PdfOptimizeResult]) -> str:
+    """进度消息：PDF优化节省的体积"""
+    if optimized is None:
+        return ""
+    return f"已优化：{optimized.original_bytes / 1024:.0f}KB → {optimized.optimized_bytes / 1024:.0f}KB"
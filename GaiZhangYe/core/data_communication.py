@@ -2,74 +2,149 @@
 # -*- coding: utf-8 -*-
 """
 core层数据沟通模块
-实现前后端通过文件进行数据交换的功能
+实现前后端通过配置存储进行数据交换的功能（SQLite按文件逐行存储，兼容旧版本JSON数据文件的导入/导出）
 """
 
 import json
+import os
+import re
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from GaiZhangYe.core.basic.file_manager import get_file_manager
 from GaiZhangYe.core.basic.file_processor import FileProcessor
-from GaiZhangYe.core.basic.file_processor import windows_natural_sort_key
+from GaiZhangYe.core.basic.file_processor import windows_natural_sort_key, sort_files_windows_style
+from GaiZhangYe.core.basic.dir_snapshot import SnapshotDelta, diff_snapshots, snapshot
+from GaiZhangYe.core.basic.config_store import ConfigStore
+from GaiZhangYe.utils.config import get_settings
+
+# 配置存储中的文档名
+FUNC1_DOCUMENT = 'func1'
+FUNC2_DOCUMENT = 'func2'
+FUNC1_STATE = 'func1.state'
+FUNC2_STATE = 'func2.state'
+
+FUNC1_WORD_EXTENSIONS = ('.docx', '.doc')
+FUNC2_TARGET_EXTENSIONS = ('.docx',)
+FUNC2_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
 
 
 class DataCommunicationService:
     """数据沟通服务类"""
     
     def __init__(self):
-        # 定义数据文件路径
+        # 兼容旧版本的JSON数据文件路径（首次使用存储时导入，也用于导入/导出）
         self.func1_data_file = Path(__file__).parent.parent / 'business_data' / 'func1' / '.temp' / 'target_pages.json'
         self.func2_data_file = Path(__file__).parent.parent / 'business_data' / 'func2' / '.temp' / 'stamp_config.json'
-        
+
+        # 同一时间只进行一次刷新（页数统计可能较慢）
+        self._refresh_lock = threading.Lock()
+        self._watcher: Optional["BusinessDataWatcher"] = None
+
         # 创建文件管理器和处理器实例（使用单例）
         self.file_manager = get_file_manager()
         self.file_processor = FileProcessor()
-    
+
+        # 配置存储：func1按文档、func2的config按文件逐行存储；目录快照（{文件名: [大小, 修改时间ns, 页数]}）与数据在同一事务中更新
+        self.store = ConfigStore(self.file_manager.root_dir / 'config.sqlite3', split_fields={
+            FUNC1_DOCUMENT: (),
+            FUNC2_DOCUMENT: ('config',),
+            FUNC1_STATE: ('files',),
+            FUNC2_STATE: ('target_files', 'images'),
+        })
+        self._import_legacy_json()
+
     def get_func1_data(self) -> Dict[str, Any]:
         """获取func1的target_pages数据"""
-        try:
-            if self.func1_data_file.exists():
-                with open(self.func1_data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            # 处理异常
-            return {}
-    
+        return self.store.get(FUNC1_DOCUMENT)
+
     def save_func1_data(self, data: Dict[str, Any]) -> bool:
-        """保存func1的target_pages数据"""
+        """保存func1的target_pages数据（只写入有变化的文档）"""
         try:
-            # 确保目录存在
-            self.func1_data_file.parent.mkdir(exist_ok=True)
-            with open(self.func1_data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.store.replace(FUNC1_DOCUMENT, data)
             return True
         except Exception as e:
+            print(f"保存func1数据失败: {str(e)}")
             return False
-    
+
     def get_func2_data(self) -> Dict[str, Any]:
         """获取func2的stamp_config数据"""
-        try:
-            if self.func2_data_file.exists():
-                with open(self.func2_data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            return {}
-    
+        return self.store.get(FUNC2_DOCUMENT)
+
     def save_func2_data(self, data: Dict[str, Any]) -> bool:
-        """保存func2的stamp_config数据"""
+        """保存func2的stamp_config数据（只写入有变化的文件配置）"""
         try:
-            # 确保目录存在
-            self.func2_data_file.parent.mkdir(exist_ok=True)
-            with open(self.func2_data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.store.replace(FUNC2_DOCUMENT, data)
             return True
         except Exception as e:
+            print(f"保存func2数据失败: {str(e)}")
             return False
-    
+
+    def get_data_with_version(self, func: str) -> Tuple[Dict[str, Any], int]:
+        """数据及其版本号（每次有变化的保存递增），func为func1/func2"""
+        return self.store.get_with_version(_document(func))
+
+    def patch_func1_entry(self, stem: str, entry: Any) -> int:
+        """修改一个Word文档的页码选择（entry为None时删除），返回新的数据版本号"""
+        return self.store.patch(FUNC1_DOCUMENT, stem, entry)
+
+    def patch_func2_config(self, file_name: str, entry: Any) -> int:
+        """修改一个目标文件的盖章配置（entry为None时删除），返回新的数据版本号"""
+        return self.store.patch(FUNC2_DOCUMENT, file_name, entry, field='config')
+
+    def export_json(self, output_dir: Optional[Path] = None) -> List[Path]:
+        """
+        导出为旧版本的JSON数据文件
+        :param output_dir: 输出目录，默认导出到原数据文件位置（target_pages.json / stamp_config.json）
+        """
+        paths = []
+        for document, data_file in ((FUNC1_DOCUMENT, self.func1_data_file), (FUNC2_DOCUMENT, self.func2_data_file)):
+            path = output_dir / data_file.name if output_dir else data_file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，读取方不会读到写了一半的文件
+            temp_path = path.with_name(path.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.store.get(document), f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+            paths.append(path)
+        return paths
+
+    def import_json(self, input_dir: Optional[Path] = None) -> List[str]:
+        """
+        从JSON数据文件导入（覆盖当前数据），文件不存在的部分跳过
+        :param input_dir: 输入目录，默认为原数据文件位置
+        :return: 导入的文档（func1/func2）
+        """
+        imported = []
+        for func, document, data_file in (('func1', FUNC1_DOCUMENT, self.func1_data_file),
+                                          ('func2', FUNC2_DOCUMENT, self.func2_data_file)):
+            path = input_dir / data_file.name if input_dir else data_file
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError(f"数据文件格式错误（应为对象）：{path}")
+            self.store.replace(document, data)
+            imported.append(func)
+        return imported
+
+    def _import_legacy_json(self) -> None:
+        """存储中从未写入过的文档，从旧版本的JSON数据文件导入；文件损坏时保留原文件并跳过"""
+        for document, data_file in ((FUNC1_DOCUMENT, self.func1_data_file), (FUNC2_DOCUMENT, self.func2_data_file)):
+            if self.store.version(document) or not data_file.exists():
+                continue
+            try:
+                with open(data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict) and data:
+                    self.store.replace(document, data)
+                    print(f"已从 {data_file.name} 导入数据")
+            except (OSError, ValueError) as e:
+                print(f"导入数据文件失败，已跳过 {data_file}: {str(e)}")
+
     def scan_business_data(self) -> bool:
-        """扫描business_data目录并生成默认数据（调用具体子方法）"""
+        """重新扫描business_data目录并生成默认数据（丢弃已有配置，调用具体子方法）"""
         try:
             ok1 = self.scan_func1()
             ok2 = self.scan_func2()
@@ -79,122 +154,406 @@ class DataCommunicationService:
             return False
 
     def scan_func1(self) -> bool:
-        """扫描 func1 目录并生成 target_pages.json"""
+        """扫描 func1 目录并重新生成 target_pages 数据"""
         try:
-            func1_word_dir = self.file_manager.get_func1_dir('nostamped_word')
-            word_files = self.file_processor.list_files(func1_word_dir, ['.docx', '.doc'])
-
-            from GaiZhangYe.core.basic.word_processor import WordProcessor
-            wp = WordProcessor()
-
-            func1_data = {}
-            for word_file in word_files:
-                try:
-                    page_count = wp.get_word_page_count(word_file)
-                except Exception as e:
-                    print(f"获取文件页数失败 {word_file.name}: {e}")
-                    page_count = 0
-
-                func1_data[word_file.stem] = {
-                    'pages': [],
-                    'total_pages': page_count
-                }
-
-            self.save_func1_data(func1_data)
-            print(f"扫描到 {len(word_files)} 个Word文件，已生成func1默认数据")
+            delta = self.refresh_func1(rebuild=True)
+            print(f"扫描到 {len(delta.added)} 个Word文件，已生成func1默认数据")
             return True
         except Exception as e:
             print(f"扫描func1失败: {str(e)}")
             return False
 
     def scan_func2(self) -> bool:
-        """扫描 func2 目录并生成 stamp_config.json"""
+        """扫描 func2 目录并重新生成 stamp_config 数据"""
         try:
-            func2_target_dir = self.file_manager.get_func2_dir('target_files')
-            func2_image_dir = self.file_manager.get_func2_dir('images')
-
-            target_files = self.file_processor.list_files(func2_target_dir, ['.docx'])
-            image_files = self.file_processor.list_files(func2_image_dir, ['.png', '.jpg', '.jpeg'])
-
-            # 对文件和图片进行排序 (使用Windows自然排序)
-            sorted_target_files = sorted(target_files, key=lambda f: windows_natural_sort_key(f.name))
-            sorted_image_files = sorted(image_files, key=lambda f: windows_natural_sort_key(f.name))
-
-            func2_config = {}
-
-            from GaiZhangYe.core.basic.word_processor import WordProcessor
-            wp = WordProcessor()
-
-            for i, target_file in enumerate(sorted_target_files):
-                assigned_images = [sorted_image_files[i].name] if i < len(sorted_image_files) else []
-
-                try:
-                    total_pages = wp.get_word_page_count(target_file)
-                    total_pages = total_pages if total_pages > 0 else 1
-                except Exception as e:
-                    print(f"获取文件页数失败 {target_file.name}: {e}")
-                    total_pages = 1
-
-                func2_config[target_file.name] = {
-                    'total_pages': total_pages,
-                    'images': assigned_images,
-                    'positions': [{
-                        'page': total_pages,
-                        'x': 100,
-                        'y': 100
-                    } for _ in assigned_images]
-                }
-
-            func2_new_data = {
-                "target_files": [f.name for f in sorted_target_files],
-                "images": [f.name for f in sorted_image_files],
-                "config": func2_config
-            }
-
-            self.save_func2_data(func2_new_data)
-            print(f"扫描到 {len(target_files)} 个目标文件和 {len(image_files)} 个图片文件，已生成func2默认数据")
+            deltas = self.refresh_func2(rebuild=True)
+            print(f"扫描到 {len(deltas['target_files'].added)} 个目标文件和 {len(deltas['images'].added)} 个图片文件，"
+                  f"已生成func2默认数据")
             return True
         except Exception as e:
             print(f"扫描func2失败: {str(e)}")
             return False
-    
+
+    def refresh_business_data(self) -> Dict[str, Dict[str, dict]]:
+        """按目录快照增量更新func1/func2数据，只处理新增/删除/修改的文件，返回各目录的变化"""
+        return {
+            'func1': {'word_files': self.refresh_func1().to_dict()},
+            'func2': {name: delta.to_dict() for name, delta in self.refresh_func2().items()},
+        }
+
+    def refresh_func1(self, rebuild: bool = False) -> SnapshotDelta:
+        """
+        增量更新func1数据（target_pages）：新增的Word文件生成默认数据，删除的文件移除，
+        修改的文件重新统计页数（已选页码中超出新页数的被去掉），未变化文件的数据（用户选择的页码）保持不变
+        :param rebuild: 丢弃已有数据与快照，重新生成
+        """
+        word_dir = self.file_manager.get_func1_dir('nostamped_word')
+        with self._refresh_lock:
+            current = snapshot(word_dir, FUNC1_WORD_EXTENSIONS)
+            known = {}
+            if not rebuild:
+                state, version = self.store.get_with_version(FUNC1_STATE)
+                if version:
+                    known = state.get('files', {})
+                else:
+                    # 没有快照（首次运行或旧版本生成的数据）：数据中已有的文件视为未变化
+                    data = self.get_func1_data()
+                    known = {name: [*stat, _entry_total_pages(data.get(Path(name).stem))]
+                             for name, stat in current.items() if Path(name).stem in data}
+            delta = diff_snapshots(known, current)
+            if not delta.changed and not rebuild:
+                return delta
+
+            page_counts = self._page_counts(word_dir, delta.added + delta.modified)
+            with self.store.edit(FUNC1_DOCUMENT, FUNC1_STATE) as (data, state):
+                if rebuild:
+                    data.clear()
+                for name in delta.removed:
+                    data.pop(Path(name).stem, None)
+                for name in delta.added + delta.modified:
+                    stem = Path(name).stem
+                    total_pages = page_counts.get(name) or 0
+                    if stem in data:
+                        data[stem] = _resize_func1_entry(data[stem], total_pages)
+                    else:
+                        data[stem] = {'pages': [], 'total_pages': total_pages}
+                _sort_by_name(data)
+                state.clear()
+                state['files'] = _state_entries(current, known, page_counts)
+            print(f"func1数据已更新：新增{len(delta.added)}个，删除{len(delta.removed)}个，修改{len(delta.modified)}个Word文件")
+            return delta
+
+    def refresh_func2(self, rebuild: bool = False) -> Dict[str, SnapshotDelta]:
+        """
+        增量更新func2数据（stamp_config）：
+        - 新增的目标文件生成默认配置（分配一张尚未被使用的图片，插入最后一页），删除的文件移除
+        - 修改的目标文件重新统计页数，原先插入在最后一页（默认值）的图片跟随新的最后一页，超出新页数的修正为最后一页
+        - 删除的图片从所有配置中移除；未变化文件的配置（用户指定的图片与页码）保持不变
+        :param rebuild: 丢弃已有数据与快照，重新生成
+        :return: {"target_files": 目标文件的变化, "images": 图片的变化}
+        """
+        target_dir = self.file_manager.get_func2_dir('target_files')
+        image_dir = self.file_manager.get_func2_dir('images')
+        with self._refresh_lock:
+            current_targets = snapshot(target_dir, FUNC2_TARGET_EXTENSIONS)
+            current_images = snapshot(image_dir, FUNC2_IMAGE_EXTENSIONS)
+            known_targets, known_images = {}, {}
+            if not rebuild:
+                state, version = self.store.get_with_version(FUNC2_STATE)
+                if version:
+                    known_targets, known_images = state.get('target_files', {}), state.get('images', {})
+                else:
+                    # 没有快照（首次运行或旧版本生成的数据）：数据中已有的文件视为未变化
+                    data = self.get_func2_data()
+                    config = data.get('config') or {}
+                    known_targets = {name: [*stat, _entry_total_pages(config.get(name))]
+                                     for name, stat in current_targets.items() if name in config}
+                    known_images = {name: list(stat) for name, stat in current_images.items()
+                                    if name in (data.get('images') or [])}
+            target_delta = diff_snapshots(known_targets, current_targets)
+            image_delta = diff_snapshots(known_images, current_images)
+            deltas = {'target_files': target_delta, 'images': image_delta}
+            if not (target_delta.changed or image_delta.changed or rebuild):
+                return deltas
+
+            page_counts = self._page_counts(target_dir, target_delta.added + target_delta.modified)
+            with self.store.edit(FUNC2_DOCUMENT, FUNC2_STATE) as (data, state):
+                if rebuild:
+                    data.clear()
+                config = data.get('config') or {}
+                for name in target_delta.removed:
+                    config.pop(name, None)
+                if image_delta.removed:
+                    removed_images = set(image_delta.removed)
+                    config = {name: _remove_images(entry, removed_images) for name, entry in config.items()}
+
+                # 新增的目标文件按自然排序依次分配尚未被任何配置使用的图片
+                used_images = {image for entry in config.values() for image in _entry_images(entry)}
+                free_images = [image for image in sort_files_windows_style(list(current_images))
+                               if image not in used_images]
+                for name in target_delta.added + target_delta.modified:
+                    # 页数获取失败时按1页处理
+                    total_pages = page_counts.get(name) or 1
+                    if name in config:
+                        config[name] = _resize_func2_entry(config[name], _known_pages(known_targets, name), total_pages)
+                        continue
+                    assigned_images = [free_images.pop(0)] if free_images else []
+                    config[name] = {
+                        'total_pages': total_pages,
+                        'images': assigned_images,
+                        'positions': [{
+                            'page': total_pages,
+                            'x': 100,
+                            'y': 100
+                        } for _ in assigned_images]
+                    }
+
+                data['target_files'] = _apply_delta(data.get('target_files') or [], target_delta)
+                data['images'] = _apply_delta(data.get('images') or [], image_delta)
+                data['config'] = _sort_by_name(config)
+                state.clear()
+                state.update({
+                    'target_files': _state_entries(current_targets, known_targets, page_counts),
+                    'images': {name: list(stat) for name, stat in current_images.items()},
+                })
+            print(f"func2数据已更新：目标文件新增{len(target_delta.added)}个、删除{len(target_delta.removed)}个、"
+                  f"修改{len(target_delta.modified)}个，图片新增{len(image_delta.added)}张、删除{len(image_delta.removed)}张")
+            return deltas
+
+    def _page_counts(self, folder: Path, names: List[str]) -> Dict[str, Optional[int]]:
+        """统计一组文件的页数（缓存/.docx统计信息优先，其余由Word工作线程并行计算）"""
+        from GaiZhangYe.core.folder_scan import iter_page_counts
+
+        return {result.name: result.page_count for result in iter_page_counts(folder, names)}
+
+    def start_watcher(self, interval: Optional[float] = None) -> None:
+        """启动业务目录监视线程（间隔默认读取配置data_watch_interval，不大于0时不启动）"""
+        interval = get_settings().data_watch_interval if interval is None else interval
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = BusinessDataWatcher(self, interval)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def auto_match_func2(self, word_dir: Optional[Path] = None, image_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        按版面自动匹配盖章图片与目标文件的页码，结果写入 stamp_config
+        候选页为功能1提取的未盖章页面（Nostamped_PDF），仅保留在目标文件中存在的文档
+        只替换匹配到的目标文件的配置，其余文件的配置（含手工设置的图片与页码）保持不变
+        :param word_dir: 目标Word目录（默认func2 TargetFiles）
+        :param image_dir: 盖章图片目录（默认func2 Images）
+        :return: {"config": 写入的配置（仅匹配到的文件）, "matched": 匹配数, "unmatched_images": [...], "low_confidence": [...]}
+        """
+        from GaiZhangYe.core.basic.stamp_matcher import StampMatcher
+        from GaiZhangYe.core.models.exceptions import BusinessError
+        from GaiZhangYe.utils.config import get_settings
+
+        word_dir = word_dir or self.file_manager.get_func2_dir('target_files')
+        image_dir = image_dir or self.file_manager.get_func2_dir('images')
+        target_files = sorted(self.file_processor.list_files(word_dir, list(FUNC2_TARGET_EXTENSIONS)),
+                              key=lambda f: windows_natural_sort_key(f.name))
+        targets = {f.stem: f.name for f in target_files if not f.name.startswith('~$')}
+        images = sorted(self.file_processor.list_files(image_dir, list(FUNC2_IMAGE_EXTENSIONS)),
+                        key=lambda f: windows_natural_sort_key(f.name))
+        candidates = [c for c in self._stamp_page_candidates() if c[0] in targets]
+        if not images:
+            raise BusinessError(f"目录{image_dir}中没有盖章图片")
+        if not candidates:
+            raise BusinessError("没有可匹配的候选页，请先在功能1中提取目标文件的盖章页")
+
+        matcher = StampMatcher()
+        page_hashes = matcher.hash_pages([(pdf, page_index) for _, _, pdf, page_index in candidates])
+        image_hashes = matcher.hash_images(images)
+        matches = matcher.match(image_hashes, page_hashes)
+
+        min_confidence = get_settings().stamp_match_min_confidence
+        config: Dict[str, list] = {}
+        low_confidence = []
+        for m in matches:
+            stem, page, _, _ = candidates[m.page_index]
+            item = {'image': images[m.image_index].name, 'position': page,
+                    'confidence': m.confidence, 'distance': m.distance}
+            if m.confidence < min_confidence:
+                low_confidence.append(dict(item, file=targets[stem]))
+                continue
+            config.setdefault(targets[stem], []).append(item)
+        for items in config.values():
+            items.sort(key=lambda item: item['position'])
+        matched_images = {m.image_index for m in matches}
+        summary = {
+            'matched': sum(len(items) for items in config.values()),
+            'unmatched_images': [img.name for i, img in enumerate(images) if i not in matched_images],
+            'low_confidence': low_confidence,
+        }
+
+        with self.store.edit(FUNC2_DOCUMENT) as (data,):
+            merged = data.get('config') or {}
+            merged.update(config)
+            data['config'] = _sort_by_name(merged)
+            data['auto_match'] = summary
+        print(f"自动匹配 {len(images)} 张图片与 {len(candidates)} 个候选页，写入 {summary['matched']} 条配置")
+        return dict(summary, config=config)
+
+    def _stamp_page_candidates(self) -> List[Tuple[str, int, Path, int]]:
+        """
+        功能1提取的候选页：(文档名, 页码, PDF路径, PDF中的0-based页索引)
+        逐页PDF延迟生成时直接使用合并PDF中的对应页
+        """
+        from GaiZhangYe.core.stamp_prepare import PAGE_INDEX_NAME
+
+        nostamped_pdf_dir = self.file_manager.get_func1_dir('nostamped_pdf')
+        pattern = re.compile(r"^(?P<stem>.+)_第(?P<page>\d+)页\.pdf$")
+        found: Dict[str, Tuple[str, int, Path, int]] = {}
+
+        index_file = nostamped_pdf_dir / PAGE_INDEX_NAME
+        if index_file.exists():
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            for name, page_index in index.get('pages', {}).items():
+                match = pattern.match(name)
+                if match:
+                    found[name] = (match['stem'], int(match['page']), Path(index['source']), page_index)
+        for pdf in self.file_processor.list_files(nostamped_pdf_dir, ['.pdf']):
+            match = pattern.match(pdf.name)
+            if match and pdf.name not in found:
+                found[pdf.name] = (match['stem'], int(match['page']), pdf, 0)
+        return sorted(found.values(), key=lambda c: (windows_natural_sort_key(c[0]), c[1]))
+
     def auto_generate_data(self) -> bool:
-        """项目启动时自动生成数据文件"""
+        """项目启动时自动生成数据：从未生成过时扫描生成，否则按目录变化增量更新（用户清空的数据不会被重新生成）"""
         try:
-            # 检查并生成func1数据文件
-            if not self.func1_data_file.exists():
-                # 如果数据文件不存在，自动扫描生成
-                self.scan_business_data()
+            if not self.store.version(FUNC1_DOCUMENT):
+                self.scan_func1()
             else:
-                # 数据文件已存在，检查是否为空
-                data = self.get_func1_data()
-                if not data:
-                    # 如果数据为空，重新扫描生成
-                    self.scan_business_data()
-            
-            # 检查并生成func2数据文件
-            if not self.func2_data_file.exists():
-                self.scan_business_data()
+                self.refresh_func1()
+
+            if not self.store.version(FUNC2_DOCUMENT):
+                self.scan_func2()
             else:
-                data = self.get_func2_data()
-                if not data:
-                    self.scan_business_data()
-            
+                self.refresh_func2()
+
             return True
         except Exception as e:
             return False
 
 
+class BusinessDataWatcher:
+    """轮询业务目录（os.scandir快照），有文件增删改时增量更新数据；目录未变化时不写入任何数据"""
+
+    def __init__(self, service: DataCommunicationService, interval: float):
+        self.service = service
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='business-data-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.service.refresh_business_data()
+            except Exception as e:
+                print(f"增量更新业务数据失败: {str(e)}")
+
+
+def _entry_total_pages(entry: Any) -> Optional[int]:
+    """数据项中记录的总页数（扫描生成的字典格式才有）"""
+    if isinstance(entry, dict) and isinstance(entry.get('total_pages'), int):
+        return entry['total_pages']
+    return None
+
+
+def _document(func: str) -> str:
+    if func not in (FUNC1_DOCUMENT, FUNC2_DOCUMENT):
+        raise ValueError(f"不支持的数据类型：{func}")
+    return func
+
+
+def _sort_by_name(mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """按键的Windows自然排序原地重排"""
+    items = sorted(mapping.items(), key=lambda item: windows_natural_sort_key(item[0]))
+    mapping.clear()
+    mapping.update(items)
+    return mapping
+
+
+def _known_pages(known: Dict[str, list], name: str) -> Optional[int]:
+    """快照中记录的页数：[大小, 修改时间ns, 页数]"""
+    stat = known.get(name) or []
+    return stat[2] if len(stat) > 2 else None
+
+
+def _state_entries(current: Dict[str, Tuple[int, int]], known: Dict[str, list],
+                   page_counts: Dict[str, Optional[int]]) -> Dict[str, list]:
+    """新快照：未变化的文件沿用已知页数，变化的文件使用本次统计的页数"""
+    return {name: [*stat, page_counts[name] if name in page_counts else _known_pages(known, name)]
+            for name, stat in current.items()}
+
+
+def _apply_delta(names: List[str], delta: SnapshotDelta) -> List[str]:
+    """在已有的文件名列表上应用变化（列表中不在目录里的文件名保持不变）"""
+    removed = set(delta.removed)
+    names = [name for name in names if name not in removed]
+    names += [name for name in delta.added if name not in names]
+    return sort_files_windows_style(names)
+
+
+def _resize_func1_entry(entry: Any, total_pages: int) -> Any:
+    """页数变化：更新总页数，去掉超出新页数的已选页码（页数未知时保持不变）"""
+    if total_pages <= 0:
+        return entry
+    if isinstance(entry, dict):
+        pages = [p for p in entry.get('pages') or [] if not isinstance(p, int) or p <= total_pages]
+        return dict(entry, pages=pages, total_pages=total_pages)
+    if isinstance(entry, list):
+        return [p for p in entry if not isinstance(p, int) or p <= total_pages]
+    return entry
+
+
+def _entry_images(entry: Any) -> List[str]:
+    """配置项引用的图片：扫描生成的字典格式（images列表）或页面保存的列表格式（[{image, position}]）"""
+    if isinstance(entry, dict):
+        return list(entry.get('images') or [])
+    if isinstance(entry, list):
+        return [item.get('image') for item in entry if isinstance(item, dict) and item.get('image')]
+    return []
+
+
+def _remove_images(entry: Any, removed: set) -> Any:
+    """从配置项中移除已删除的图片（字典格式中images与positions一一对应）"""
+    if isinstance(entry, dict):
+        images = entry.get('images') or []
+        positions = entry.get('positions') or []
+        keep = [i for i, image in enumerate(images) if image not in removed]
+        return dict(entry, images=[images[i] for i in keep],
+                    positions=[positions[i] for i in keep if i < len(positions)])
+    if isinstance(entry, list):
+        return [item for item in entry if not (isinstance(item, dict) and item.get('image') in removed)]
+    return entry
+
+
+def _resize_func2_entry(entry: Any, old_pages: Optional[int], total_pages: int) -> Any:
+    """页数变化：插入在原最后一页的图片跟随新的最后一页，超出新页数的修正为最后一页"""
+    def move(page):
+        if not isinstance(page, int):
+            return page
+        if page == old_pages or page > total_pages:
+            return total_pages
+        return page
+
+    if isinstance(entry, dict):
+        positions = [dict(p, page=move(p.get('page'))) if isinstance(p, dict) else p
+                     for p in entry.get('positions') or []]
+        return dict(entry, total_pages=total_pages, positions=positions)
+    if isinstance(entry, list):
+        return [dict(item, position=move(item.get('position'))) if isinstance(item, dict) else item
+                for item in entry]
+    return entry
+
+
 # 单例模式
 _data_service = None
+_data_service_lock = threading.Lock()
 
 
 def get_data_service() -> DataCommunicationService:
-    """获取数据服务实例"""
+    """获取数据服务实例（首次获取时生成/增量更新数据文件，并启动业务目录监视）"""
     global _data_service
     if _data_service is None:
-        _data_service = DataCommunicationService()
-        # 应用启动时自动生成数据
-        _data_service.auto_generate_data()
+        with _data_service_lock:
+            if _data_service is None:
+                service = DataCommunicationService()
+                # 应用启动时自动生成数据
+                service.auto_generate_data()
+                service.start_watcher()
+                _data_service = service
     return _data_service
-
@@ -92,6 +92,7 @@ def start_service():
 
     try:
         from GaiZhangYe.web.app import app
+        from GaiZhangYe.web.server import serve
 
         print("服务将在 http://localhost:5001 启动")
 
@@ -105,12 +106,8 @@ def start_service():
         browser_thread.daemon = True
         browser_thread.start()
 
-        # 启动服务
-        app.run(
-            host='0.0.0.0',
-            port=5001,
-            debug=False
-        )
+        # 启动服务（配置WEB_SERVER：production为多线程服务器+COM调度线程，development为Flask开发服务器）
+        serve(app, host='0.0.0.0', port=5001)
 
     except Exception as e:
         print("启动服务失败:", str(e))
@@ -0,0 +1,150 @@
+# GaiZhangYe/core/folder_scan.py
+"""
+文件夹扫描：立即得到Word文件列表，页数随后逐个产生
+- 先在当前线程中不启动Word查找页数（页数缓存 → .docx统计信息 → 转换缓存中的PDF），通常可覆盖绝大多数文件
+- 剩余文件由多个Word工作线程计算（每个线程独占一个Word实例，领取到任务时才启动），结果按完成顺序产生
+- 调用方停止迭代（如客户端断开连接）时，工作线程处理完手上的文件后退出
+- 生产服务模式（已启动COM调度器）下不另起Word线程，每个文件作为一个任务交给COM调度线程的常驻Word实例
+"""
+import os
+import queue
+import threading
+from concurrent.futures import as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.core.basic.file_processor import sort_files_windows_style
+from GaiZhangYe.core.basic.word_processor import WordProcessor, lookup_page_count
+from GaiZhangYe.core.basic.com_dispatcher import ComDispatcher, get_com_dispatcher
+
+logger = get_logger(__name__)
+
+WORD_EXTENSIONS = (".docx", ".doc")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+@dataclass
+class PageCountResult:
+    """单个文件的页数；source为cache/docx/pdf/word，获取失败时为error"""
+    name: str
+    page_count: Optional[int]
+    source: str
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def list_word_files(folder: Path) -> List[str]:
+    """文件夹中的Word文件名（不含Word临时文件~$*），按Windows自然排序"""
+    names = [name for name in os.listdir(folder)
+             if name.lower().endswith(WORD_EXTENSIONS) and not name.startswith("~$")]
+    return sort_files_windows_style(names)
+
+
+def list_image_files(folder: Path) -> List[str]:
+    """文件夹中的图片文件名，按Windows自然排序"""
+    return sort_files_windows_style([name for name in os.listdir(folder) if name.lower().endswith(IMAGE_EXTENSIONS)])
+
+
+def iter_page_counts(folder: Path, names: List[str], workers: Optional[int] = None) -> Iterator[PageCountResult]:
+    """
+    逐个产生文件页数：不需要Word的结果先产生，其余按Word工作线程完成的顺序产生
+    :param workers: Word工作线程数，默认读取配置word_workers
+    """
+    pending = []
+    for name in names:
+        path = folder / name
+        try:
+            page_count, source, _ = lookup_page_count(path)
+        except Exception as e:
+            logger.warning(f"获取文件页数失败 {name}：{e}")
+            yield PageCountResult(name, None, "error", str(e))
+            continue
+        if page_count is None:
+            pending.append(path)
+        else:
+            yield PageCountResult(name, page_count, source)
+
+    if not pending:
+        return
+
+    dispatcher = get_com_dispatcher()
+    if dispatcher is not None and not dispatcher.in_worker_thread():
+        yield from _dispatch_page_counts(dispatcher, pending)
+        return
+
+    tasks: "queue.Queue[Path]" = queue.Queue()
+    for path in pending:
+        tasks.put(path)
+    results: "queue.Queue[Optional[PageCountResult]]" = queue.Queue()
+    stop = threading.Event()
+    workers = max(1, min(workers or get_settings().word_workers, len(pending)))
+    logger.info(f"{len(pending)}个文件需要通过Word计算页数，启动{workers}个Word工作线程")
+    for i in range(workers):
+        threading.Thread(target=_word_worker, args=(tasks, results, stop),
+                         name=f"page-count-{i}", daemon=True).start()
+
+    running = workers
+    try:
+        while running:
+            result = results.get()
+            if result is None:
+                running -= 1
+            else:
+                yield result
+    finally:
+        stop.set()
+
+
+def _word_worker(tasks: "queue.Queue[Path]", results: "queue.Queue", stop: threading.Event) -> None:
+    """Word工作线程：领取文件计算页数，队列为空或收到停止信号时退出Word"""
+    processor = None
+    try:
+        while not stop.is_set():
+            try:
+                path = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if processor is None:
+                processor = WordProcessor()
+            try:
+                results.put(PageCountResult(path.name, processor.get_word_page_count(path), "word"))
+            except Exception as e:
+                logger.warning(f"获取文件页数失败 {path.name}：{e}")
+                results.put(PageCountResult(path.name, None, "error", str(e)))
+    finally:
+        try:
+            if processor is not None:
+                processor.close()
+        finally:
+            results.put(None)
+
+
+def _dispatch_page_counts(dispatcher: ComDispatcher, pending: List[Path]) -> Iterator[PageCountResult]:
+    """每个文件作为一个任务提交到COM调度器，按完成顺序产生结果；停止迭代时取消尚未开始的任务"""
+    logger.info(f"{len(pending)}个文件需要通过Word计算页数，提交到COM调度器（{dispatcher.threads}个线程）")
+    futures = {dispatcher.submit(_word_page_count, path): path for path in pending}
+    try:
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                yield PageCountResult(path.name, future.result(), "word")
+            except Exception as e:
+                logger.warning(f"获取文件页数失败 {path.name}：{e}")
+                yield PageCountResult(path.name, None, "error", str(e))
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _word_page_count(path: Path) -> int:
+    """在COM调度线程中计算页数（WordProcessor使用该线程的常驻Word实例）"""
+    processor = WordProcessor()
+    try:
+        return processor.get_word_page_count(path)
+    finally:
+        processor.close()
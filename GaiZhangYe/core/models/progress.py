@@ -0,0 +1,38 @@
+# GaiZhangYe/core/models/progress.py
+"""
+进度事件模型：业务服务通过回调逐文件上报处理进度（供Web后台任务推送给前端）
+"""
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+
+from GaiZhangYe.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ProgressEvent:
+    """单个文件的处理进度"""
+    file: str
+    status: str  # started / done / failed / skipped
+    current: int  # 已处理完成的文件数（含本文件）
+    total: int
+    message: str = ""
+    output: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+def report_progress(callback: Optional[ProgressCallback], file: str, status: str, current: int, total: int,
+                    message: str = "", output: Optional[str] = None) -> None:
+    """调用进度回调（回调异常只记录日志，不影响业务流程）"""
+    if callback is None:
+        return
+    try:
+        callback(ProgressEvent(file, status, current, total, message, output))
+    except Exception as e:
+        logger.warning(f"进度回调执行失败：{file} - {e}")
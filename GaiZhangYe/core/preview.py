@@ -0,0 +1,339 @@
+# GaiZhangYe/core/preview.py
+"""
+页面缩略图与预览服务：为PDF页面、Word文档页面与盖章图片生成低分辨率缩略图
+- Word文档使用Word→PDF转换缓存中的PDF；未转换过的文档在后台线程中转换一次（结果写入转换缓存）
+- 缩略图按"源内容摘要 + 页码/尺寸 + 分辨率"缓存在磁盘（previews命名空间），缓存键同时作为HTTP ETag
+- 渲染在常驻的进程池中执行，不占用Web服务进程；同一缩略图的并发请求合并为一次渲染
+"""
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pymupdf as fitz  # PyMuPDF
+from PIL import Image, ImageOps
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import gauge
+from GaiZhangYe.core.basic.artifact_store import (ArtifactStore, get_artifact_store, get_conversion_cache,
+                                                   conversion_cache_key, make_cache_key)
+from GaiZhangYe.core.basic.file_processor import compute_file_hash
+from GaiZhangYe.core.basic.pdf_processor import pdf_worker_count
+from GaiZhangYe.core.models.exceptions import BusinessError
+
+logger = get_logger(__name__)
+
+PDF_EXTENSIONS = (".pdf",)
+WORD_EXTENSIONS = (".docx", ".doc")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff")
+
+# 缩略图分辨率与宽度的允许范围
+_DPI_RANGE = (12, 150)
+_WIDTH_RANGE = (32, 1024)
+# 等待单个缩略图渲染的最长时间（秒）
+_RENDER_TIMEOUT = 60
+# 工作进程中保持打开的PDF数量（滚动浏览同一文档时无需重复解析）
+_WORKER_OPEN_DOCS = 4
+
+
+@dataclass
+class Preview:
+    """一张缩略图；与请求的ETag一致时不携带数据（not_modified）"""
+    etag: str
+    version: str          # 源文件的内容版本（URL中携带该值时可长期缓存）
+    data: Optional[bytes] = None
+
+    @property
+    def mimetype(self) -> str:
+        return _mimetype(self.data or b"")
+
+    @property
+    def not_modified(self) -> bool:
+        return self.data is None
+
+
+def _mimetype(data: bytes) -> str:
+    return "image/png" if data.startswith(b"\x89PNG") else "image/jpeg"
+
+
+# ==================== 工作进程中执行的渲染函数 ====================
+
+_worker_docs: "OrderedDict[Tuple[str, int], fitz.Document]" = OrderedDict()
+
+
+def _open_worker_doc(pdf_path: str) -> fitz.Document:
+    """打开PDF（按路径+修改时间复用已打开的文档）"""
+    key = (pdf_path, os.stat(pdf_path).st_mtime_ns)
+    doc = _worker_docs.pop(key, None)
+    if doc is None:
+        doc = fitz.open(pdf_path)
+    _worker_docs[key] = doc
+    while len(_worker_docs) > _WORKER_OPEN_DOCS:
+        _worker_docs.popitem(last=False)[1].close()
+    return doc
+
+
+def _render_page(pdf_path: str, page_index: int, dpi: int) -> bytes:
+    """渲染PDF的一页（0-based）：文字页为PNG；扫描件等图片页PNG过大，JPEG小一半以上时用JPEG"""
+    doc = _open_worker_doc(pdf_path)
+    if not 0 <= page_index < doc.page_count:
+        raise BusinessError(f"页码超出范围：第{page_index + 1}页（共{doc.page_count}页）")
+    pix = doc[page_index].get_pixmap(dpi=dpi, alpha=False)
+    png = pix.tobytes("png")
+    jpeg = pix.tobytes("jpeg", jpg_quality=80)
+    return jpeg if len(jpeg) * 2 < len(png) else png
+
+
+def _render_image(image_path: str, width: int) -> bytes:
+    """将图片缩小到指定宽度，输出JPEG（JPEG按缩小的尺寸解码）"""
+    with Image.open(image_path) as img:
+        img.draft("RGB", (width, max(1, img.height * width // max(1, img.width))))
+        image = ImageOps.exif_transpose(img).convert("RGB")
+    image.thumbnail((width, image.height * width // max(1, image.width) or 1), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+# ==================== 预览服务 ====================
+
+class PreviewService:
+    """缩略图服务（进程内单例，线程安全）"""
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        :param workers: 渲染进程数，默认按CPU核数（最多4个）
+        """
+        self.workers = workers or pdf_worker_count()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}                 # 缩略图缓存键 -> 渲染中的任务
+        self._hashes: Dict[Path, Tuple[int, int, str]] = {}    # 文件 -> (大小, 修改时间, 摘要)
+        # Word转换（启动Word）在单独的后台线程中逐个执行
+        self._converter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-word")
+        self._word_processor = None
+        self._converting: set = set()
+        self._convert_errors: Dict[str, str] = {}
+
+    # ---------- 源文件 ----------
+
+    @staticmethod
+    def source_kind(path: Path) -> str:
+        suffix = path.suffix.lower()
+        if suffix in PDF_EXTENSIONS:
+            return "pdf"
+        if suffix in WORD_EXTENSIONS:
+            return "word"
+        if suffix in IMAGE_EXTENSIONS:
+            return "image"
+        raise BusinessError(f"不支持预览的文件类型：{path.name}")
+
+    def content_hash(self, path: Path) -> str:
+        """文件内容摘要（按大小与修改时间复用，滚动浏览时不重复读取文件）"""
+        stat = path.stat()
+        cached = self._hashes.get(path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        digest = compute_file_hash(path)
+        if len(self._hashes) >= 4096:
+            self._hashes.clear()
+        self._hashes[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def _store(self) -> ArtifactStore:
+        return get_artifact_store("previews", get_settings().preview_cache_max_bytes)
+
+    def resolve_pdf(self, path: Path) -> Optional[Tuple[Path, str]]:
+        """
+        可渲染页面的PDF与其内容版本；Word文档取转换缓存中的PDF
+        :return: (PDF路径, 内容版本)；Word文档尚未转换时在后台开始转换并返回None
+        """
+        if not path.is_file():
+            raise BusinessError(f"文件不存在：{path}")
+        kind = self.source_kind(path)
+        if kind == "pdf":
+            return path, self.content_hash(path)
+        if kind != "word":
+            raise BusinessError(f"不是PDF或Word文档：{path.name}")
+
+        key = conversion_cache_key(path, content_hash=self.content_hash(path))
+        cache = get_conversion_cache()
+        # 转换缓存关闭时，预览自行转换的PDF保存在预览缓存中
+        pdf = (cache.open_path(key) if cache is not None else None) or self._store().open_path(key)
+        if pdf is not None:
+            return pdf, key
+        self._convert_in_background(path, key)
+        return None
+
+    def info(self, path: Path) -> dict:
+        """源文件信息：类型、是否可预览、页数与内容版本（Word文档未转换时ready为False）"""
+        kind = self.source_kind(path)
+        if kind == "image":
+            if not path.is_file():
+                raise BusinessError(f"文件不存在：{path}")
+            return {"kind": kind, "ready": True, "page_count": 1, "version": self.content_hash(path)[:16]}
+        resolved = self.resolve_pdf(path)
+        if resolved is None:
+            key = conversion_cache_key(path, content_hash=self.content_hash(path))
+            return {"kind": kind, "ready": False, "converting": key in self._converting,
+                    "error": self._convert_errors.get(key)}
+        pdf, version = resolved
+        with fitz.open(pdf) as doc:
+            page_count = doc.page_count
+        return {"kind": kind, "ready": True, "page_count": page_count, "version": version[:16]}
+
+    # ---------- 缩略图 ----------
+
+    def page_thumbnail(self, path: Path, page: int, dpi: Optional[int] = None,
+                       if_none_match=None) -> Optional[Preview]:
+        """
+        PDF/Word文档一页的缩略图（PNG或JPEG）
+        :param page: 页码（1-based）
+        :param if_none_match: 请求中的ETag集合（支持 `in`），命中时不渲染、不读取缓存
+        :return: 缩略图；Word文档尚未转换时返回None（已在后台开始转换）
+        """
+        dpi = min(max(dpi or get_settings().preview_dpi, _DPI_RANGE[0]), _DPI_RANGE[1])
+        resolved = self.resolve_pdf(path)
+        if resolved is None:
+            return None
+        pdf, version = resolved
+        key = make_cache_key(version, {"op": "page", "page": page, "dpi": dpi})
+        return self._thumbnail(key, version, if_none_match, _render_page, str(pdf), page - 1, dpi)
+
+    def image_thumbnail(self, path: Path, width: Optional[int] = None, if_none_match=None) -> Preview:
+        """盖章图片的缩略图（JPEG）"""
+        if not path.is_file():
+            raise BusinessError(f"文件不存在：{path}")
+        if self.source_kind(path) != "image":
+            raise BusinessError(f"不是图片文件：{path.name}")
+        width = min(max(width or get_settings().preview_image_width, _WIDTH_RANGE[0]), _WIDTH_RANGE[1])
+        version = self.content_hash(path)
+        key = make_cache_key(version, {"op": "image", "width": width})
+        return self._thumbnail(key, version, if_none_match, _render_image, str(path), width)
+
+    def _thumbnail(self, key: str, version: str, if_none_match, render, *args) -> Preview:
+        """按缓存键取缩略图：ETag命中 → 磁盘缓存 → 合并到进行中的渲染 → 提交新的渲染"""
+        if if_none_match is not None and key in if_none_match:
+            return Preview(key, version[:16])
+        store = self._store()
+        cached = store.open_path(key)
+        if cached is not None:
+            try:
+                return Preview(key, version[:16], cached.read_bytes())
+            except FileNotFoundError:
+                pass  # 刚被淘汰，重新渲染
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._submit(key, store, render, *args)
+        try:
+            data = future.result(timeout=_RENDER_TIMEOUT)
+        except BrokenProcessPool as e:
+            raise BusinessError("缩略图渲染进程异常退出") from e
+        return Preview(key, version[:16], data)
+
+    def _submit(self, key: str, store: ArtifactStore, render, *args) -> Future:
+        """提交渲染（调用方持有锁）；完成后写入磁盘缓存并移出进行中列表"""
+        if self._pool is None:
+            # 与其他工作池一致使用spawn（Windows下唯一可用的方式）
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        pool = self._pool
+        future = pool.submit(render, *args)
+        self._inflight[key] = future
+
+        def done(finished: Future) -> None:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if finished.cancelled():
+                    return
+                if isinstance(finished.exception(), BrokenProcessPool) and self._pool is pool:
+                    # 进程池已失效：下次请求时重建
+                    self._pool = None
+                    pool.shutdown(wait=False, cancel_futures=True)
+            if finished.exception() is None:
+                store.put_bytes(key, finished.result())
+
+        future.add_done_callback(done)
+        return future
+
+    # ---------- Word转换 ----------
+
+    def _convert_in_background(self, word_path: Path, key: str) -> None:
+        """在后台线程中将Word文档转换为PDF（同一内容只转换一次；转换失败后内容不变时不再重试）"""
+        with self._lock:
+            if key in self._converting or key in self._convert_errors:
+                return
+            self._converting.add(key)
+        self._converter.submit(self._convert_word, word_path, key)
+
+    def _convert_word(self, word_path: Path, key: str) -> None:
+        from GaiZhangYe.core.basic.word_processor import WordProcessor
+
+        try:
+            if self._word_processor is None:
+                # 在转换线程中创建（COM对象只能在创建它的线程中使用）
+                self._word_processor = WordProcessor()
+            with tempfile.TemporaryDirectory(prefix="preview_") as temp_dir:
+                pdf_path = Path(temp_dir) / f"{word_path.stem}.pdf"
+                # 启用转换缓存时，word_to_pdf会把结果写入缓存
+                self._word_processor.word_to_pdf(word_path, pdf_path)
+                if get_conversion_cache() is None:
+                    self._store().put(key, pdf_path)
+            logger.info(f"预览：已将Word文档转换为PDF {word_path.name}")
+        except Exception as e:
+            logger.warning(f"预览：Word文档转换失败 {word_path.name}：{str(e)}")
+            self._convert_errors[key] = str(e)
+        finally:
+            with self._lock:
+                self._converting.discard(key)
+
+    def close(self) -> None:
+        """关闭渲染进程池与转换线程（在转换线程中退出Word）"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self._word_processor is not None:
+            self._converter.submit(self._word_processor.close)
+        self._converter.shutdown(wait=False)
+
+
+# 全局单例
+_preview_service: Optional[PreviewService] = None
+_preview_lock = threading.Lock()
+
+
+def _queue_depths() -> Dict[Tuple[str, ...], float]:
+    service = _preview_service
+    if service is None:
+        return {("convert",): 0, ("render",): 0}
+    return {("convert",): len(service._converting), ("render",): len(service._inflight)}
+
+
+gauge("preview_queue_depth", "预览等待/正在进行的Word转换（convert）与缩略图渲染（render）数", ("kind",),
+      callback=_queue_depths)
+
+
+def get_preview_service() -> PreviewService:
+    global _preview_service
+    if _preview_service is None:
+        with _preview_lock:
+            if _preview_service is None:
+                _preview_service = PreviewService()
+    return _preview_service
+
+
+def shutdown_preview_service() -> None:
+    """退出服务前关闭预览服务（未创建时不做任何事）"""
+    if _preview_service is not None:
+        _preview_service.close()
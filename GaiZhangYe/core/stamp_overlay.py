@@ -3,20 +3,35 @@
 功能2：盖章页覆盖服务
 """
 import re
+import shutil
+import tempfile
+from contextlib import ExitStack
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import SERVICE_RUNS
 from GaiZhangYe.core.basic.file_processor import windows_natural_sort_key
 from GaiZhangYe.core.basic.file_manager import get_file_manager
-from GaiZhangYe.core.basic.file_processor import FileProcessor
-from GaiZhangYe.core.basic.word_processor import WordProcessor
-from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+from GaiZhangYe.core.basic.file_processor import FileProcessor, compute_file_hash
+from GaiZhangYe.core.basic.word_processor import WordProcessor, WordDocumentSession
+from GaiZhangYe.core.basic.com_dispatcher import run_with_word
+from GaiZhangYe.core.basic.pdf_processor import PdfProcessor, group_contiguous_pages
+from GaiZhangYe.core.basic.artifact_store import (get_conversion_cache, conversion_cache_key, get_image_cache,
+                                                   make_cache_key)
 from GaiZhangYe.core.basic.image_processor import ImageProcessor
-from GaiZhangYe.core.models.exceptions import BusinessError
+from GaiZhangYe.core.basic.ooxml_stamper import OoxmlStamper
+from GaiZhangYe.core.basic.pdf_stamper import PdfStamper
+from GaiZhangYe.core.basic.word_pool import WordConversionPool
+from GaiZhangYe.core.models.exceptions import BusinessError, PdfProcessError
+from GaiZhangYe.core.models.progress import ProgressCallback, report_progress
 from GaiZhangYe.core.data_communication import get_data_service
 
 logger = get_logger(__name__)
 
+# 盖章图片处理算法的版本（参与图片缓存键，算法变化时递增使旧缓存失效）
+_IMAGE_VARIANT_VERSION = 1
+
 
 class StampOverlayService:
     """盖章页覆盖服务"""
@@ -27,6 +42,11 @@ class StampOverlayService:
         self.word_processor = WordProcessor()
         self.pdf_processor = PdfProcessor()
         self.image_processor = ImageProcessor()
+        self.ooxml_stamper = OoxmlStamper()
+        self.pdf_stamper = PdfStamper()
+        self._baseline_pages: Dict[Path, int] = {}  # 底稿PDF -> 页数
+        self._stamp_images: Dict[Path, Path] = {}  # 原图片 -> 插入用的图片（缩放/清理后）
+        self._stamp_image_dir: Optional[Path] = None  # 本次运行的插入用图片目录
 
     def _extract_image_from_stamp(self, stamp_file: Path, output_dir: Path) -> List[Path]:
         """
@@ -37,9 +57,12 @@ class StampOverlayService:
         """
         return self.pdf_processor.extract_images(stamp_file, output_dir)
 
+    @SERVICE_RUNS.timed("stamp_overlay")
     def run(self, target_word_dir: Path = None,
             image_width: int = None, image_files: List[Path] = None, configs=None,
-            result_word_dir: Path = None, result_pdf_dir: Path = None) -> List[Path]:
+            result_word_dir: Path = None, result_pdf_dir: Path = None,
+            insert_engine: str = "word", progress_callback: Optional[ProgressCallback] = None,
+            pdf_stamp_mode: Optional[str] = None) -> List[Path]:
         """
         执行功能2流程：
         1. 缩放图片后插入到目标 Word 文件
@@ -50,9 +73,17 @@ class StampOverlayService:
         :param configs: 配置字典
         :param result_word_dir: 输出Word文件目录（可选）
         :param result_pdf_dir: 输出PDF文件目录（可选）
-        :return: 生成的Word文件路径列表
+        :param insert_engine: 插图引擎，"word"（Word COM，默认）、"ooxml"（直接编辑.docx，Word仅用于导出PDF；
+                              .doc文件改用Word插入）或 "pdf"（每个文档只转换一次PDF，再直接在PDF上放置盖章图片，不生成Word）
+        :param progress_callback: 进度回调，每个Word文件处理完成/失败后调用
+        :param pdf_stamp_mode: "pdf"引擎的盖章方式，overlay（覆盖）或 replace（替换整页），默认读取配置
+        :return: 生成的Word文件路径列表（"pdf"引擎为生成的PDF文件路径列表）
         """
         logger.info("开始执行【功能2：盖章页覆盖】")
+        if insert_engine not in ("word", "ooxml", "pdf"):
+            raise BusinessError(f"不支持的插图引擎：{insert_engine}")
+        if insert_engine == "pdf":
+            self.pdf_stamper = PdfStamper(pdf_stamp_mode or get_settings().pdf_stamp_mode)
         try:
             # 1. 初始化目录
             images_dir, final_result_word_dir, final_result_pdf_dir, target_word_dir = self._init_directories(
@@ -82,9 +113,33 @@ class StampOverlayService:
             if image_files:
                 sorted_images = sorted(image_files, key=windows_natural_sort_key)
 
-            # 5. 批量插入图片并转换为PDF
-            result_word_files = self._batch_insert_images_and_convert(
-                sorted_word_files, images_dir, final_result_word_dir, final_result_pdf_dir, image_width, configs, sorted_images)
+            # 4. 插入用图片（缩放/清理结果）与"pdf"引擎的基准PDF写入本次运行独立的临时目录，
+            #    同时执行的多个任务互不干扰，不写入图片目录
+            temp_dir = self.file_manager.get_func2_dir("temp")
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            self._stamp_image_dir = Path(tempfile.mkdtemp(prefix="stamp_images_", dir=temp_dir))
+            baseline_dir = None
+            if insert_engine == "pdf":
+                baseline_dir = Path(tempfile.mkdtemp(prefix="pdf_baseline_", dir=temp_dir))
+
+            try:
+                # 5. "pdf"引擎：先将全部目标文档各转换一次PDF（命中转换缓存时不启动Word，多工作进程时并行转换）
+                baselines = None
+                if baseline_dir is not None:
+                    baselines = self._convert_baselines(sorted_word_files, baseline_dir)
+
+                # 6. 批量插入图片并转换为PDF；启用扫描件清理（SCAN_CLEANUP）时预先批量处理本次用到的全部图片（多张时并行）
+                if get_settings().scan_cleanup:
+                    self._prepare_images(self._collect_images(sorted_images, configs, images_dir), image_width)
+                result_word_files = self._batch_insert_images_and_convert(
+                    sorted_word_files, images_dir, final_result_word_dir, final_result_pdf_dir, image_width, configs,
+                    sorted_images, insert_engine, progress_callback, baselines)
+            finally:
+                if baseline_dir is not None:
+                    shutil.rmtree(baseline_dir, ignore_errors=True)
+                shutil.rmtree(self._stamp_image_dir, ignore_errors=True)
+                self._stamp_image_dir = None
+                self._stamp_images = {}
 
             logger.info(f"【功能2】执行完成，成功处理{len(result_word_files)}个Word文件")
             return result_word_files
@@ -123,14 +178,130 @@ class StampOverlayService:
             raise BusinessError(f"目标Word目录{target_word_dir}中无Word文件")
         return word_files
 
+    def _convert_baselines(self, word_files: List[Path], baseline_dir: Path) -> Dict[str, Path]:
+        """
+        将目标Word文档各转换一次PDF作为盖章底稿（通过Word转换工作池，单个文件失败不影响其余文件）
+        :return: {Word文件名: 底稿PDF路径}，仅包含转换成功的文件
+        """
+        baseline_dir.mkdir(parents=True, exist_ok=True)
+        jobs = [(word, baseline_dir / f"{word.stem}.pdf") for word in word_files if not word.name.startswith("~$")]
+        results = WordConversionPool().convert_all(jobs)
+        converted = []
+        for result in results:
+            if result.ok:
+                converted.append(result)
+            else:
+                logger.warning(f"[PDF盖章] 转换底稿失败 {result.source.name}：{result.error}")
+
+        # 一次性统计全部底稿的页数（多文件时在进程池中执行），无法读取的底稿视为转换失败
+        baselines = {}
+        counts = self.pdf_processor.get_page_counts([result.output for result in converted])
+        for result, count in zip(converted, counts):
+            if count.ok:
+                baselines[result.source.name] = result.output
+                self._baseline_pages[result.output] = count.value
+            else:
+                logger.warning(f"[PDF盖章] 底稿PDF无法读取 {result.source.name}：{count.error}")
+        return baselines
+
+    def _collect_images(self, sorted_images: List[Path], configs: dict, images_dir: Path) -> List[Path]:
+        """默认模式与UI配置中用到的全部图片（去重，忽略不存在的图片）"""
+        images = list(sorted_images)
+        for items in (configs or {}).values():
+            for item in items if isinstance(items, list) else []:
+                if isinstance(item, dict) and item.get("image"):
+                    image = Path(item["image"])
+                    images.append(image if image.exists() else images_dir / item["image"])
+        return [image for image in dict.fromkeys(images) if image.exists()]
+
+    def _stamp_image(self, img_path: Path, image_width: int) -> Path:
+        """插入用的图片：按配置缩放（及清理）后的图片，无需处理时为原图"""
+        if img_path not in self._stamp_images:
+            self._prepare_images([img_path], image_width)
+        return self._stamp_images.get(img_path, img_path)
+
+    def _prepare_images(self, images: List[Path], image_width: int) -> None:
+        """
+        生成插入用的图片：先按"图片内容 + 处理参数"从图片缓存中取，未命中时处理并写入缓存
+        启用扫描件清理时批量清理（清理失败的图片改为只缩放），否则只缩放
+        """
+        cleanup = get_settings().scan_cleanup
+        pending = self._fetch_image_variants(images, image_width, cleanup)
+        if cleanup and pending:
+            results = self.image_processor.clean_scans([(image, dest) for image, dest, _ in pending],
+                                                       target_width=image_width)
+            failed = []
+            for (image, dest, key), result in zip(pending, results):
+                if result.ok:
+                    self._add_image_variant(image, dest, key)
+                else:
+                    logger.warning(f"扫描件清理失败，使用未清理的图片 {image.name}：{result.error}")
+                    failed.append(image)
+            logger.info(f"扫描件清理完成：{len(pending) - len(failed)}/{len(pending)}张")
+            pending = self._fetch_image_variants(failed, image_width, cleanup=False)
+
+        for image, dest, key in pending:
+            self.image_processor.resize_image(image, dest, target_width=image_width, keep_ratio=True)
+            self._add_image_variant(image, dest, key)
+
+    def _fetch_image_variants(self, images: List[Path], image_width: int, cleanup: bool) -> List[tuple]:
+        """
+        从图片缓存取出已处理过的图片（放入本次运行的目录）
+        :return: 未命中的 (原图片, 输出路径, 缓存键) 列表
+        """
+        if not cleanup and not image_width:
+            self._stamp_images.update({image: image for image in images})
+            return []
+        if self._stamp_image_dir is None:
+            self._stamp_image_dir = Path(tempfile.mkdtemp(prefix="stamp_images_"))
+
+        settings = get_settings()
+        cache = get_image_cache()
+        pending = []
+        for image in images:
+            if cleanup:
+                options = {"op": "clean", "width": image_width, "binarize": settings.scan_binarize,
+                           "max_skew": settings.scan_max_skew, "version": _IMAGE_VARIANT_VERSION}
+                # 二值化的图片用PNG无损保存，否则用JPEG
+                suffix = ".png" if settings.scan_binarize else ".jpg"
+            else:
+                options = {"op": "resize", "width": image_width, "resample": "lanczos",
+                           "version": _IMAGE_VARIANT_VERSION}
+                suffix = image.suffix.lower()
+            key = make_cache_key(compute_file_hash(image), options)
+            dest = self._stamp_image_dir / f"{key[:16]}{suffix}"
+            if dest.exists() or (cache is not None and cache.fetch(key, dest)):
+                self._stamp_images[image] = dest
+            else:
+                pending.append((image, dest, key))
+        if len(images) > len(pending):
+            logger.debug(f"图片缓存命中{len(images) - len(pending)}/{len(images)}张")
+        return pending
+
+    def _add_image_variant(self, image: Path, dest: Path, key: str) -> None:
+        self._stamp_images[image] = dest
+        cache = get_image_cache()
+        if cache is not None:
+            cache.put(key, dest)
+
+    def _baseline_page_count(self, baseline_pdf: Path) -> int:
+        """底稿PDF的页数（优先使用转换底稿时统计的结果）"""
+        if baseline_pdf not in self._baseline_pages:
+            self._baseline_pages[baseline_pdf] = self.pdf_processor.get_page_count(baseline_pdf)
+        return self._baseline_pages[baseline_pdf]
+
     def _batch_insert_images_and_convert(self, sorted_word_files: List[Path],
                                          images_dir: Path, result_word_dir: Path, result_pdf_dir: Path,
-                                         image_width: int, configs: dict, sorted_images: List[Path] = None) -> List[Path]:
+                                         image_width: int, configs: dict, sorted_images: List[Path] = None,
+                                         insert_engine: str = "word",
+                                         progress_callback: Optional[ProgressCallback] = None,
+                                         baselines: Optional[Dict[str, Path]] = None) -> List[Path]:
         """批量插入图片并将结果转换为PDF
         核心逻辑：
         1. 将图片按顺序分配给Word文件
         2. 支持一个Word文件对应多张图片
         3. 使用UI层生成的配置控制图片插入位置
+        "pdf"引擎不生成Word，直接在baselines中的底稿PDF上盖章，返回列表中为输出PDF
         示例：
         images_list = [img1, img2, img3, img4, img5]
         文件1需1张 → [img1]
@@ -144,6 +315,9 @@ class StampOverlayService:
 
         for i, word in enumerate(sorted_word_files):
             output_word = result_word_dir / f"{word.stem}.docx"
+            # "pdf"引擎的产物是盖章后的PDF
+            output_result = result_pdf_dir / f"{word.stem}.pdf" if insert_engine == "pdf" else output_word
+            baseline_pdf = baselines.get(word.name) if baselines is not None else None
 
             # 检查是否有配置信息（UI层会传递此配置）
             current_config = self._get_current_config(word.name, configs)
@@ -172,16 +346,15 @@ class StampOverlayService:
                     if hasattr(current_config, '__dict__'):
                         current_config.__dict__['image_files'] = actual_image_paths
 
-                    # 使用配置模式处理
-                    success = self._process_with_config(current_config, word, output_word, images_dir, image_width)
+                    # 使用配置模式处理（同一会话内完成插图、保存Word与导出PDF）
+                    success = self._process_with_config(current_config, word, output_word, images_dir, image_width,
+                                                        result_pdf_dir, insert_engine, baseline_pdf)
                     if success:
-                        result_word_files.append(output_word)
+                        result_word_files.append(output_result)
                         processed_successfully = True
 
-                        # 将结果Word转换为PDF
+                        # 验证PDF是否生成（兼容带/不带 _stamped 后缀的命名），未生成时单独转换一次
                         if output_word.exists():
-                            self._convert_word_to_pdf(output_word, result_pdf_dir)
-                            # 验证PDF是否生成（兼容带/不带 _stamped 后缀的命名）
                             pdf_file = self._find_pdf_file(result_pdf_dir, output_word.stem)
                             if not pdf_file or not pdf_file.exists():
                                 logger.warning(f"PDF文件 {result_pdf_dir / output_word.stem} 未生成，将重新尝试一次")
@@ -197,12 +370,12 @@ class StampOverlayService:
 
                 try:
                     # 使用配置模式处理单张图片的默认情况
-                    import shutil
-                    import os
-
-                    # 计算当前Word的页数，作为默认插入页码
+                    # 计算当前Word的页数，作为默认插入页码（"pdf"引擎以底稿PDF的页数为准）
                     try:
-                        default_page_for_word = self.word_processor.get_word_page_count(word)
+                        if baseline_pdf is not None:
+                            default_page_for_word = self._baseline_page_count(baseline_pdf)
+                        else:
+                            default_page_for_word = self.word_processor.get_word_page_count(word)
                     except Exception:
                         default_page_for_word = 1
 
@@ -213,21 +386,16 @@ class StampOverlayService:
                     })()
                     logger.info(f"[默认模式] 为 {word.name} 使用默认插入页码: {default_page_for_word}")
 
-                    # 创建临时文件并处理
-                    temp_output = output_word.parent / f"{word.stem}_temp.docx"
-                    shutil.copy2(word, temp_output)
-
                     # 插入单张图片
-                    success = self._process_with_config(temp_config, word, output_word, images_dir, image_width)
+                    success = self._process_with_config(temp_config, word, output_word, images_dir, image_width,
+                                                        result_pdf_dir, insert_engine, baseline_pdf)
 
                     if success:
-                        result_word_files.append(output_word)
+                        result_word_files.append(output_result)
                         image_index += 1
 
-                        # 将结果Word转换为PDF
-                            if output_word.exists():
-                            self._convert_word_to_pdf(output_word, result_pdf_dir)
-                            # 验证PDF是否生成（兼容带/不带 _stamped 后缀的命名）
+                        # 验证PDF是否生成（兼容带/不带 _stamped 后缀的命名），未生成时单独转换一次
+                        if output_word.exists():
                             pdf_file = self._find_pdf_file(result_pdf_dir, output_word.stem)
                             if not pdf_file or not pdf_file.exists():
                                 logger.warning(f"PDF文件 {result_pdf_dir / output_word.stem} 未生成，将重新尝试一次")
@@ -243,6 +411,11 @@ class StampOverlayService:
                     logger.warning(f"已无足够图片或配置错误，无法处理 Word 文件 {word.name}")
                 else:
                     logger.warning(f"已无足够图片，无法处理 Word 文件 {word.name}")
+                report_progress(progress_callback, word.name, "failed", i + 1, len(sorted_word_files),
+                                "已无足够图片或处理失败")
+            else:
+                report_progress(progress_callback, word.name, "done", i + 1, len(sorted_word_files),
+                                output=str(output_word))
 
         # 安全检查：确保所有成功处理的Word文件都已转换为PDF
         for word_file in result_word_files:
@@ -293,8 +466,14 @@ class StampOverlayService:
         return None
 
     def _process_with_config(self, current_config: object, word: Path, output_word: Path,
-                            images_dir: Path, image_width: int) -> bool:
-        """使用配置模式处理Word文件"""
+                            images_dir: Path, image_width: int, result_pdf_dir: Path = None,
+                            insert_engine: str = "word", baseline_pdf: Optional[Path] = None) -> bool:
+        """使用配置模式处理Word文件
+        在同一个文档会话中插入全部图片、保存Word，并在提供result_pdf_dir时直接导出PDF（整个流程只打开一次文档）
+        :param insert_engine: 插图引擎，"word"（Word COM）、"ooxml"（直接编辑.docx，无需Word）
+                              或 "pdf"（在底稿PDF上盖章，输出到result_pdf_dir，不生成Word）
+        :param baseline_pdf: "pdf"引擎使用的底稿PDF（未盖章文档的转换结果）
+        """
         logger.info(f"[UI配置模式] 处理 Word 文件 {word.name}")
 
         # 验证配置完整性
@@ -310,19 +489,21 @@ class StampOverlayService:
             logger.warning(f"[UI配置模式] Word 文件 {word.name} 的图片数量和位置数量不一致，将使用默认处理方式")
             return False
 
+        if insert_engine == "pdf" and (baseline_pdf is None or result_pdf_dir is None):
+            logger.warning(f"[PDF盖章] Word 文件 {word.name} 没有可用的底稿PDF，跳过")
+            return False
+
         logger.info(f"[UI配置模式] Word 文件 {word.name} 将插入 {len(current_config.image_files)} 张图片")
 
-        import shutil
         import os
 
-        # 插入所有图片到同一个Word文件
-        temp_output = output_word.parent / f"{word.stem}_temp.docx"
-        shutil.copy2(word, temp_output)
-
         # 规范化插入位置：将 'last_page' 或 非数值项回退为文档总页数（后端强制处理旧配置）
         def _normalize_positions(positions):
             try:
-                total_pages = self.word_processor.get_word_page_count(word)
+                if baseline_pdf is not None:
+                    total_pages = self._baseline_page_count(baseline_pdf)
+                else:
+                    total_pages = self.word_processor.get_word_page_count(word)
             except Exception:
                 total_pages = 1
 
@@ -351,7 +532,8 @@ class StampOverlayService:
 
         normalized_positions = _normalize_positions(current_config.insert_positions)
 
-        # 插入每张图片
+        # 解析并缩放每张图片
+        insertions = []
         for img_input, position in zip(current_config.image_files, normalized_positions):
             logger.info(f"[UI配置模式] 将图片 {img_input} 插入文件 {word.name} 的页码 {position}")
             # 支持两种图片路径格式：直接路径和文件名
@@ -362,32 +544,133 @@ class StampOverlayService:
                 logger.warning(f"图片文件不存在：{img_path}，跳过该图片")
                 continue
 
-            # 缩放图片（如果需要）
-            final_image = img_path
-            if image_width:
-                scaled_image = images_dir / f"scaled_{img_path.name}"
-                self.image_processor.resize_image(img_path, scaled_image,
-                                                target_width=image_width, keep_ratio=True)
-                final_image = scaled_image
+            # 缩放（及清理）图片（如果需要），结果来自图片缓存或本次处理
+            final_image = self._stamp_image(img_path, image_width)
 
-            # 获取插入位置（仅数值）
-            try:
-                # position 可能已经是数字，也可能是字符串数字
-                image_page = int(position)
-            except Exception:
+            # 插入位置已规范化为数值页码
+            insertions.append((final_image, int(position)))
+
+        output_pdf = result_pdf_dir / f"{output_word.stem}.pdf" if result_pdf_dir is not None else None
+        if insert_engine == "pdf":
+            # 直接在底稿PDF的目标页放置图片，无需Word
+            self.pdf_stamper.insert_images(baseline_pdf, insertions, output_pdf)
+            self._optimize_output_pdf(output_pdf)
+            return True
+
+        if insert_engine == "ooxml" and word.suffix.lower() != ".docx":
+            # OOXML方式只能编辑.docx压缩包，.doc等格式改由Word插入
+            logger.info(f"[UI配置模式] {word.name} 不是.docx文件，改用Word插入图片")
+            insert_engine = "word"
+
+        # 插入所有图片到同一个Word文件
+        temp_output = output_word.parent / f"{word.stem}_temp.docx"
+        shutil.copy2(word, temp_output)
+        try:
+            if insert_engine == "ooxml":
+                # 直接编辑.docx压缩包插入图片，Word仅用于导出PDF
+                self.ooxml_stamper.insert_images(temp_output, insertions, output_word)
+                if output_pdf is not None:
+                    try:
+                        run_with_word(self._export_stamped_pdf, word, output_word,
+                                      [page for _, page in insertions], output_pdf)
+                        self._optimize_output_pdf(output_pdf)
+                    except Exception as e:
+                        logger.warning(f"[UI配置模式] 导出PDF失败 {word.name}：{str(e)}")
+            else:
+                # 整个文档会话（插图、保存、导出）作为一次Word操作执行，PDF优化不占用Word
+                if run_with_word(self._stamp_in_session, word, temp_output, insertions, output_word, output_pdf):
+                    self._optimize_output_pdf(output_pdf)
+        finally:
+            if os.path.exists(temp_output):
                 try:
-                    image_page = self.word_processor.get_word_page_count(word)
+                    os.unlink(temp_output)
                 except Exception:
-                    image_page = 1
+                    logger.warning(f"删除临时文件失败：{temp_output}")
 
+        return True
+
+    def _stamp_in_session(self, word: Path, temp_output: Path, insertions: List[tuple], output_word: Path,
+                          output_pdf: Optional[Path]) -> bool:
+        """
+        在同一个文档会话中插入全部图片、另存为output_word，并在提供output_pdf时导出PDF
+        :return: 是否已导出PDF（导出失败时由调用方检测并单独重新转换）
+        """
+        with self.word_processor.open_document(temp_output) as session:
             # 插入图片（传递数值页码）
-            self.word_processor.insert_image_to_word(temp_output, final_image, image_page, temp_output)
+            for final_image, image_page in insertions:
+                session.insert_image(final_image, image_page)
 
-        # 将临时文件重命名为最终输出
-        if os.path.exists(output_word):
-            os.unlink(output_word)
-        os.rename(temp_output, output_word)
+            # 保存为最终输出（覆盖已存在的同名文件）
+            if output_word.exists():
+                output_word.unlink()
+            session.save_as(output_word)
 
+            if output_pdf is None:
+                return False
+            try:
+                self._export_stamped_pdf(word, output_word, [page for _, page in insertions], output_pdf, session)
+                return True
+            except Exception as e:
+                logger.warning(f"[UI配置模式] 会话内导出PDF失败 {word.name}：{str(e)}")
+                return False
+
+    def _export_stamped_pdf(self, source_word: Path, stamped_word: Path, stamped_pages: List[int],
+                            output_pdf: Path, session: Optional[WordDocumentSession] = None) -> None:
+        """
+        导出盖章后文档的PDF：转换缓存中有未盖章原文档的整篇PDF（底稿）时，只导出盖章页所在区间并拼接进底稿
+        盖章图片浮于文字上方不影响分页；若文档页数与底稿不一致或区间导出页数不符，回退为整篇导出
+        :param source_word: 未盖章的原Word文件（用于查找底稿）
+        :param stamped_word: 已盖章的Word文件
+        :param stamped_pages: 插入了图片的页码
+        :param session: 已打开的盖章后文档会话（未提供时按需打开stamped_word）
+        """
+        cache = get_conversion_cache() if get_settings().splice_stamped_export else None
+        # 底稿与区间PDF写入本次调用独立的临时目录，同一目标文件同时执行的多次运行互不覆盖、互不删除
+        work_dir = None
+        if cache is not None:
+            temp_dir = self.file_manager.get_func2_dir("temp")
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            work_dir = Path(tempfile.mkdtemp(prefix="pdf_splice_", dir=temp_dir))
+        try:
+            baseline_pdf = work_dir / "baseline.pdf" if work_dir is not None else None
+            if baseline_pdf is None or not cache.fetch(conversion_cache_key(source_word), baseline_pdf):
+                if session is not None:
+                    session.export_pdf(output_pdf)
+                else:
+                    self.word_processor.word_to_pdf(stamped_word, output_pdf)
+                return
+
+            with ExitStack() as stack:
+                if session is None:
+                    session = stack.enter_context(self.word_processor.open_document(stamped_word))
+                if self._splice_into_baseline(session, baseline_pdf, stamped_pages, output_pdf, work_dir):
+                    return
+                session.export_pdf(output_pdf)
+        finally:
+            if work_dir is not None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _splice_into_baseline(self, session: WordDocumentSession, baseline_pdf: Path, stamped_pages: List[int],
+                              output_pdf: Path, work_dir: Path) -> bool:
+        """只导出盖章页区间并替换底稿中的对应页；分页与底稿不一致时返回False（由调用方整篇导出）"""
+        session.clean()
+        total_pages = session.page_count
+        baseline_pages = self.pdf_processor.get_page_count(baseline_pdf)
+        if total_pages != baseline_pages:
+            logger.info(f"[PDF拼接] {session.word_path.name} 页数与底稿不一致（{total_pages}/{baseline_pages}），改为整篇导出")
+            return False
+
+        replacements = []
+        for start, end in group_contiguous_pages([p for p in stamped_pages if 1 <= p <= total_pages]):
+            range_pdf = work_dir / f"pages_{start}-{end}.pdf"
+            session.export_pdf(range_pdf, page_range=(start, end))
+            if self.pdf_processor.get_page_count(range_pdf) != end - start + 1:
+                logger.info(f"[PDF拼接] {session.word_path.name} 第{start}-{end}页导出页数不符，改为整篇导出")
+                return False
+            replacements.append(((start, end), range_pdf))
+
+        self.pdf_processor.replace_pages(baseline_pdf, replacements, output_pdf)
+        logger.info(f"[PDF拼接] {session.word_path.name} 仅导出第{[r[0] for r in replacements]}页并拼接进底稿：{output_pdf}")
         return True
 
     def _process_with_default_mode(self, sorted_images: List[Path], word: Path, output_word: Path,
@@ -414,13 +697,8 @@ class StampOverlayService:
             logger.warning(f"未找到与Word文件 {word.name} 匹配的图片")
             return False
 
-        # 缩放图片（如果需要）
-        final_image = img_for_word
-        if image_width:
-            scaled_image = images_dir / f"scaled_{img_for_word.name}"
-            self.image_processor.resize_image(img_for_word, scaled_image,
-                                            target_width=image_width, keep_ratio=True)
-            final_image = scaled_image
+        # 缩放（及清理）图片（如果需要），结果来自图片缓存或本次处理
+        final_image = self._stamp_image(img_for_word, image_width)
 
         # 插入图片，计算最后一页的页码并传入数值
         try:
@@ -432,9 +710,19 @@ class StampOverlayService:
 
     def _convert_word_to_pdf(self, output_word: Path, result_pdf_dir: Path) -> None:
         """将Word文件转换为PDF"""
-        output_pdf = result_pdf_dir / f"{output_word.stem}"
+        output_pdf = result_pdf_dir / f"{output_word.stem}.pdf"
         self.word_processor.word_to_pdf(output_word, output_pdf)
         logger.debug(f"生成最终PDF：{output_pdf}")
+        self._optimize_output_pdf(output_pdf)
+
+    def _optimize_output_pdf(self, output_pdf: Path) -> None:
+        """按配置（PDF_OPTIMIZE）压缩输出PDF中的盖章图片；优化失败时保留未优化的PDF"""
+        if not get_settings().pdf_optimize or not output_pdf.exists():
+            return
+        try:
+            self.pdf_processor.optimize_pdf(output_pdf)
+        except PdfProcessError as e:
+            logger.warning(f"PDF优化失败，保留未优化的文件 {output_pdf.name}：{str(e)}")
 
     def _find_pdf_file(self, result_pdf_dir: Path, stem: str) -> Path:
         """在结果目录中查找与给定word stem对应的PDF文件，兼容带或不带 "_stamped" 后缀的命名"""
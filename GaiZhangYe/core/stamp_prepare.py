@@ -1,13 +1,24 @@
 # GaiZhangYe/core/services/stamp_prepare.py
+import json
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
 from GaiZhangYe.utils.logger import get_logger
-from GaiZhangYe.core.basic.file_processor import windows_natural_sort_key
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import SERVICE_RUNS
+from GaiZhangYe.core.basic.file_processor import windows_natural_sort_key, compute_file_hash
 from GaiZhangYe.core.basic.file_manager import get_file_manager
 from GaiZhangYe.core.basic.word_processor import WordProcessor
-from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+from GaiZhangYe.core.basic.com_dispatcher import run_with_word
+from GaiZhangYe.core.basic.pdf_processor import PdfProcessor, IncrementalPdfWriter, group_contiguous_pages
+from GaiZhangYe.core.basic.artifact_store import get_conversion_cache, conversion_cache_key
 from GaiZhangYe.core.basic.file_processor import FileProcessor
 from GaiZhangYe.core.models.exceptions import BusinessError
+from GaiZhangYe.core.models.progress import ProgressCallback, report_progress
 from GaiZhangYe.core.data_communication import get_data_service
 
 import pymupdf as fitz # PyMuPDF
@@ -15,6 +26,13 @@ import os
 
 logger = get_logger(__name__)
 
+# 逐页PDF的输出方式：eager（提取时同时写出）/ lazy（只记录清单，首次打开目录时生成）/ off（不生成）
+PAGE_PDF_MODES = ("eager", "lazy", "off")
+PAGE_INDEX_NAME = ".pending_pages.json"
+
+# ({页码: (所在临时PDF, 0-based页索引)}, 临时PDF列表)
+ExportResult = Tuple[Dict[int, Tuple[Path, int]], List[Path]]
+
 class StampPrepareService:
     """功能1：准备盖章页（整合core所有相关模块）"""
     def __init__(self):
@@ -23,7 +41,9 @@ class StampPrepareService:
         self.pdf_processor = PdfProcessor()
         self.file_processor = FileProcessor()
 
-    def run(self, target_pages: Optional[dict[str, list[int]]] = None, word_dir: Optional[Path] = None, output_dir: Optional[Path] = None) -> list[Path]:
+    @SERVICE_RUNS.timed("stamp_prepare")
+    def run(self, target_pages: Optional[dict[str, list[int]]] = None, word_dir: Optional[Path] = None, output_dir: Optional[Path] = None,
+            progress_callback: Optional[ProgressCallback] = None) -> list[Path]:
         # 如果没有传入target_pages，从数据文件中读取
         if target_pages is None:
             target_pages = get_data_service().get_func1_data()
@@ -34,6 +54,7 @@ class StampPrepareService:
         :param target_pages: 要提取的页面字典，键为Word文件名，值为页面列表
         :param word_dir: 输入Word文件目录（可选）
         :param output_dir: 输出PDF目录（可选，默认为Stamped_Pages）
+        :param progress_callback: 进度回调，每个Word文件的页面提取完成/失败后调用
         """
         """
         执行功能1流程：
@@ -41,6 +62,8 @@ class StampPrepareService:
         2. 从PDF中提取指定页面 → 保存到Stamped_Pages或自定义输出目录
         """
         logger.info("开始执行【功能1：准备盖章页】")
+        current_file = None
+        done_count = total_files = 0
         try:
             # 1. 获取功能1目录（优先用传入的word_dir，否则用默认目录）
             nostamped_word_dir = word_dir or self.file_manager.get_func1_dir("nostamped_word")
@@ -61,63 +84,248 @@ class StampPrepareService:
             if not word_files:
                 raise BusinessError(f"目录{nostamped_word_dir}无Word文件")
 
-            # 3. 为每个Word文件直接转换指定页面为PDF，并合并为一个文件
-            merged_pdf = fitz.open()
+            page_mode = get_settings().prepare_page_pdfs
+            if page_mode not in PAGE_PDF_MODES:
+                raise BusinessError(f"不支持的逐页PDF输出方式：{page_mode}")
+            # 上次运行遗留的延迟生成清单已失效
+            (nostamped_pdf_dir / PAGE_INDEX_NAME).unlink(missing_ok=True)
 
             # 按Word文件名排序 (Windows自然排序)
             sorted_word_files = sorted(word_files, key=lambda x: windows_natural_sort_key(x.name))
+            jobs = [(f, target_pages[f.stem]) for f in sorted_word_files if f.stem in target_pages]
+            total_files = len(jobs)
 
-            for word_file in sorted_word_files:
-                word_filename = word_file.stem
-                if word_filename in target_pages:
-                    pages_to_extract = target_pages[word_filename]
+            # 3. 逐个Word文件导出指定页面，按文件顺序流式写入合并PDF（分批落盘，内存占用与总页数无关）
+            output_pdf = stamped_pages_dir / "stamped_pages.pdf"
+            writer = IncrementalPdfWriter(output_pdf)
+            page_index: Dict[str, int] = {}  # 逐页PDF文件名 -> 合并PDF中的页索引（延迟生成时使用）
+            try:
+                for word_file, pages_to_extract, export in self._export_documents(jobs, temp_dir):
+                    current_file = word_file
                     logger.info(f"正在将 {word_file.name} 的页面 {pages_to_extract} 转换为PDF")
-
-                    # 创建临时文件路径 - 保存到Temp目录
-                    temp_pdf = temp_dir / f"{word_filename}_temp.pdf"
-
+                    located_pages, temp_pdfs = export()
                     try:
-                        # 只转换指定页面
-                        # 这里先转换整个Word到PDF，然后提取页面
-                        # 注意：win32com的Word API没有直接转换指定页面的功能
-                        self.word_processor.word_to_pdf(word_file, temp_pdf)
-
-                        # 打开临时PDF文件并提取指定页面
-                        with fitz.open(temp_pdf) as doc:
-                            for page_num in pages_to_extract:
-                                if 1 <= page_num <= len(doc):
-                                    merged_pdf.insert_pdf(doc, from_page=page_num - 1, to_page=page_num - 1)
-
-                                    # 保存提取的页面到nostamped_PDF目录
-                                    pdf_output = nostamped_pdf_dir / f"{word_filename}_第{page_num}页.pdf"
-                                    with fitz.open() as new_doc:
-                                        new_doc.insert_pdf(doc, from_page=page_num - 1, to_page=page_num - 1)
-                                        new_doc.save(pdf_output)
-                                        logger.info(f"已保存提取的页面：{pdf_output}")
-
-                                else:
-                                    logger.warning(f"页码 {page_num} 超出 {word_file.name} 的范围")
+                        self._stream_pages(word_file, pages_to_extract, located_pages, writer,
+                                           nostamped_pdf_dir if page_mode == "eager" else None,
+                                           page_index if page_mode == "lazy" else None)
                     finally:
-                        # 删除临时PDF文件
-                        if temp_pdf.exists():
-                            try:
-                                temp_pdf.unlink()
-                                logger.info(f"已删除临时PDF文件：{temp_pdf}")
-                            except Exception as e:
-                                logger.error(f"删除临时PDF文件失败：{temp_pdf}", exc_info=True)
-
-            # 保存合并后的PDF文件
-            if merged_pdf.page_count > 0:
-                output_pdf = stamped_pages_dir / "stamped_pages.pdf"
-                merged_pdf.save(output_pdf)
-                merged_pdf.close()
-
-                logger.info(f"【功能1】执行完成，已将所有指定页面合并为一个PDF文件：{output_pdf}")
+                        self._remove_temp_pdfs(temp_pdfs)
+
+                    done_count += 1
+                    current_file = None
+                    report_progress(progress_callback, word_file.name, "done", done_count, total_files,
+                                    f"已提取{len(pages_to_extract)}页")
+                page_count = writer.close()
+            except Exception:
+                writer.discard()
+                raise
+
+            if page_count > 0:
+                if page_index:
+                    self._write_page_index(nostamped_pdf_dir / PAGE_INDEX_NAME, output_pdf, page_index)
+                logger.info(f"【功能1】执行完成，已将所有指定页面（{page_count}页）合并为一个PDF文件：{output_pdf}")
                 return [output_pdf]
             else:
-                merged_pdf.close()
                 logger.warning("【功能1】执行完成，但没有转换到任何页面")
                 return []
         except Exception as e:
             logger.error("【功能1】执行失败", exc_info=True)
-            raise BusinessError(f"准备盖章页失败：{str(e)}") from e
\ No newline at end of file
+            if current_file is not None:
+                report_progress(progress_callback, current_file.name, "failed", done_count + 1,
+                                total_files, str(e))
+            raise BusinessError(f"准备盖章页失败：{str(e)}") from e
+
+    def materialize_page_pdfs(self, nostamped_pdf_dir: Optional[Path] = None) -> List[Path]:
+        """
+        按延迟生成清单从合并PDF中生成逐页PDF（PREPARE_PAGE_PDFS=lazy 时在首次需要时调用），完成后删除清单
+        :return: 生成的逐页PDF列表（没有清单时为空）
+        """
+        nostamped_pdf_dir = nostamped_pdf_dir or self.file_manager.get_func1_dir("nostamped_pdf")
+        index_file = nostamped_pdf_dir / PAGE_INDEX_NAME
+        if not index_file.exists():
+            return []
+        with open(index_file, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        merged_pdf = Path(index["source"])
+        if not merged_pdf.exists():
+            logger.warning(f"合并PDF已不存在，无法生成逐页PDF：{merged_pdf}")
+            index_file.unlink()
+            return []
+
+        written = []
+        with fitz.open(merged_pdf) as doc:
+            for name, page_index in index["pages"].items():
+                written.append(self._save_single_page(doc, page_index, nostamped_pdf_dir / name))
+        index_file.unlink()
+        logger.info(f"已从 {merged_pdf} 生成{len(written)}个逐页PDF")
+        return written
+
+    def _export_documents(self, jobs: List[Tuple[Path, List[int]]], temp_dir: Path
+                          ) -> Iterator[Tuple[Path, List[int], Callable[[], ExportResult]]]:
+        """
+        按顺序产出每个Word文件的导出结果（以可调用对象形式，调用时才取得结果或抛出该文件的异常）
+        配置了多个Word工作进程时，每个进程独占一个Word实例、各自处理整个源文档，结果仍按文件顺序产出；
+        否则每个文档的导出（一次文档会话）经COM调度器执行
+        """
+        workers = min(get_settings().word_workers, len(jobs))
+        if workers <= 1:
+            for word_file, pages in jobs:
+                yield word_file, pages, partial(run_with_word, self._export_target_pages, word_file, pages, temp_dir)
+            return
+
+        # COM对象不支持fork，与Word工作池一致使用spawn
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_export_worker, initargs=(self.file_manager.root_dir,))
+        futures = [pool.submit(_export_in_worker, word_file, pages, temp_dir) for word_file, pages in jobs]
+        consumed = 0
+        try:
+            for (word_file, pages), future in zip(jobs, futures):
+                consumed += 1
+                yield word_file, pages, future.result
+        finally:
+            # 中途失败时取消未开始的文件，并清理已导出但未被使用的临时PDF
+            pool.shutdown(wait=True, cancel_futures=True)
+            for future in futures[consumed:]:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    self._remove_temp_pdfs(future.result()[1])
+
+    def _stream_pages(self, word_file: Path, pages: List[int], located_pages: Dict[int, Tuple[Path, int]],
+                      writer: IncrementalPdfWriter, page_dir: Optional[Path],
+                      page_index: Optional[Dict[str, int]]) -> None:
+        """
+        将一个Word文件的目标页写入合并PDF；同时从同一个打开的源PDF写出逐页PDF（page_dir），
+        或只记录逐页PDF在合并PDF中的位置以便延迟生成（page_index）
+        """
+        open_docs: Dict[Path, fitz.Document] = {}
+        try:
+            for page_num in pages:
+                if page_num not in located_pages:
+                    logger.warning(f"页码 {page_num} 超出 {word_file.name} 的范围")
+                    continue
+
+                source_pdf, page_idx = located_pages[page_num]
+                if source_pdf not in open_docs:
+                    open_docs[source_pdf] = fitz.open(source_pdf)
+                doc = open_docs[source_pdf]
+                writer.append(doc, page_idx, page_idx)
+
+                page_name = f"{word_file.stem}_第{page_num}页.pdf"
+                if page_dir is not None:
+                    # 保存提取的页面到nostamped_PDF目录
+                    self._save_single_page(doc, page_idx, page_dir / page_name)
+                elif page_index is not None:
+                    page_index[page_name] = writer.page_count - 1
+        finally:
+            for doc in open_docs.values():
+                doc.close()
+
+    @staticmethod
+    def _save_single_page(doc: fitz.Document, page_idx: int, pdf_output: Path) -> Path:
+        with fitz.open() as new_doc:
+            new_doc.insert_pdf(doc, from_page=page_idx, to_page=page_idx)
+            new_doc.save(pdf_output)
+        logger.info(f"已保存提取的页面：{pdf_output}")
+        return pdf_output
+
+    @staticmethod
+    def _write_page_index(index_file: Path, merged_pdf: Path, page_index: Dict[str, int]) -> None:
+        with open(index_file, "w", encoding="utf-8") as f:
+            json.dump({"source": str(merged_pdf), "pages": page_index}, f, ensure_ascii=False, indent=2)
+        logger.info(f"逐页PDF将在首次打开目录时生成，清单：{index_file}")
+
+    @staticmethod
+    def _remove_temp_pdfs(temp_pdfs: List[Path]) -> None:
+        """删除临时PDF文件"""
+        for temp_pdf in temp_pdfs:
+            if temp_pdf.exists():
+                try:
+                    temp_pdf.unlink()
+                    logger.info(f"已删除临时PDF文件：{temp_pdf}")
+                except Exception:
+                    logger.error(f"删除临时PDF文件失败：{temp_pdf}", exc_info=True)
+
+    def _export_target_pages(self, word_file: Path, pages: List[int], temp_dir: Path) -> ExportResult:
+        """
+        将目标页码合并为连续区间，通过Word的起止页导出仅导出这些区间
+        若导出的页数与区间长度不符（分页不可靠）或按区间导出失败，则回退为整篇导出
+        :return: ({页码: (所在临时PDF, 0-based页索引)}, 临时PDF列表)
+        """
+        word_filename = word_file.stem
+        ranges = group_contiguous_pages([p for p in pages if p >= 1])
+        located: Dict[int, Tuple[Path, int]] = {}
+        temp_pdfs: List[Path] = []
+        cache = get_conversion_cache()
+        content_hash = compute_file_hash(word_file) if cache else None
+
+        try:
+            with ExitStack() as stack:
+                session = None
+                total_pages = 0
+                cached: List[Tuple[int, Path]] = []  # 命中缓存的区间：(起始页, 区间PDF)
+                for start, end in ranges:
+                    range_pdf = temp_dir / f"{word_filename}_temp_{start}-{end}.pdf"
+                    cache_key = conversion_cache_key(word_file, (start, end), content_hash) if cache else None
+                    if cache and cache.fetch(cache_key, range_pdf):
+                        temp_pdfs.append(range_pdf)
+                        cached.append((start, range_pdf))
+                        continue
+
+                    # 有区间未命中缓存时才打开Word（每个文档最多打开一次）
+                    if session is None:
+                        session = stack.enter_context(self.word_processor.open_document(word_file))
+                        session.clean()
+                        total_pages = session.page_count
+                    if start > total_pages:
+                        continue
+                    end = min(end, total_pages)
+                    temp_pdfs.append(range_pdf)
+                    session.export_pdf(range_pdf, page_range=(start, end))
+
+                    exported = self.pdf_processor.get_page_count(range_pdf)
+                    if exported != end - start + 1:
+                        raise BusinessError(f"导出第{start}-{end}页得到{exported}页，分页不可靠")
+                    for offset, page_num in enumerate(range(start, end + 1)):
+                        located[page_num] = (range_pdf, offset)
+                    if cache:
+                        cache.put(cache_key, range_pdf)
+
+                # 缓存中的区间PDF在写入前已校验过页数（超出文档总页数的部分已截断），统一统计页数后定位
+                counts = self.pdf_processor.get_page_counts([range_pdf for _, range_pdf in cached])
+                for (start, range_pdf), result in zip(cached, counts):
+                    if not result.ok:
+                        raise BusinessError(f"读取缓存的区间PDF失败：{result.error}")
+                    for offset in range(result.value):
+                        located[start + offset] = (range_pdf, offset)
+            logger.info(f"已按页码区间导出 {word_file.name}：{ranges}")
+            return located, temp_pdfs
+        except Exception as e:
+            logger.warning(f"按页码区间导出失败，回退为整篇导出 {word_file.name}：{str(e)}")
+
+        # 回退：整篇导出后按页码定位
+        temp_pdf = temp_dir / f"{word_filename}_temp.pdf"
+        temp_pdfs.append(temp_pdf)
+        try:
+            self.word_processor.word_to_pdf(word_file, temp_pdf)
+            page_count = self.pdf_processor.get_page_count(temp_pdf)
+        except Exception:
+            for pdf in temp_pdfs:
+                if pdf.exists():
+                    pdf.unlink()
+            raise
+        located = {page_num: (temp_pdf, page_num - 1) for page_num in range(1, page_count + 1)}
+        return located, temp_pdfs
+
+
+# 导出工作进程内的服务实例（每个进程一个Word实例，进程退出时关闭）
+_export_service: Optional[StampPrepareService] = None
+
+
+def _init_export_worker(root_dir: Path) -> None:
+    global _export_service
+    get_file_manager(root_dir=root_dir)
+    _export_service = StampPrepareService()
+    multiprocessing.util.Finalize(_export_service, _export_service.word_processor.close, exitpriority=10)
+
+
+def _export_in_worker(word_file: Path, pages: List[int], temp_dir: Path) -> ExportResult:
+    return _export_service._export_target_pages(word_file, pages, temp_dir)
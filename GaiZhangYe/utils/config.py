@@ -15,6 +15,59 @@ class AppSettings(BaseSettings):
     # 图片默认缩放宽度（功能2）
     image_default_width: int = 800
 
+    # Word转PDF配置：并行工作进程数（每个进程独占一个Word实例；扫描文件夹计算页数时为工作线程数）与单文件超时（秒）
+    word_workers: int = 1
+    word2pdf_timeout: int = 300
+    # Word→PDF转换缓存（按文档内容+导出参数缓存，超出容量时按LRU淘汰）
+    conversion_cache_enabled: bool = True
+    conversion_cache_max_bytes: int = 2 * 1024 ** 3
+    # 盖章后导出PDF时，若缓存中有原文档的整篇PDF，只导出盖章页并拼接进该PDF（分页变化时自动整篇导出）
+    splice_stamped_export: bool = True
+    # 功能1逐页PDF（Nostamped_PDF）的输出方式：eager（提取时写出）/ lazy（首次打开目录时生成）/ off（不生成）
+    prepare_page_pdfs: str = "eager"
+    # 合并输出PDF时每追加多少页落盘一次（控制内存占用）
+    pdf_flush_pages: int = 200
+    # PDF并行处理进程数（0表示按CPU核数，最多4个）；页数不少于该值的PDF才拆分给多个进程
+    pdf_workers: int = 0
+    pdf_parallel_min_pages: int = 40
+    # 多文件批量处理时，文件数不少于该值才使用进程池
+    pdf_batch_min_files: int = 16
+    # 从PDF提取盖章页图片的方式：extract（提取内嵌图片）/ render（整页渲染）/ auto（无内嵌图片的页面整页渲染）
+    pdf_image_mode: str = "extract"
+    # 输出PDF优化（盖章结果与批量转换）：将图片降采样到目标DPI并重新压缩为JPEG，合并重复对象
+    pdf_optimize: bool = False
+    pdf_optimize_dpi: int = 150
+    pdf_optimize_jpeg_quality: int = 80
+    # 盖章页自动匹配：候选页的渲染分辨率；置信度低于阈值的匹配不写入配置（由用户手动指定）
+    stamp_match_dpi: int = 24
+    stamp_match_min_confidence: float = 0.2
+    # 扫描件清理（插入盖章页前）：去扫描仪黑边、纠偏、背景漂白；可选二值化（印章保留原色）；最大纠偏角度（度）
+    scan_cleanup: bool = False
+    scan_binarize: bool = False
+    scan_max_skew: float = 5.0
+    # 盖章图片缩放/清理结果的缓存容量（字节，按图片内容+处理参数缓存，0表示不缓存）
+    image_cache_max_bytes: int = 512 * 1024 ** 2
+    # 预览缩略图：磁盘缓存容量（字节）、页面渲染分辨率、图片缩略图宽度（像素）
+    preview_cache_max_bytes: int = 256 * 1024 ** 2
+    preview_dpi: int = 48
+    preview_image_width: int = 240
+    # 盖章页覆盖"pdf"引擎的盖章方式：overlay（图片覆盖在原页面上方）/ replace（用仅含图片的新页替换原页面）
+    pdf_stamp_mode: str = "overlay"
+    # 自定义Word.Application工厂（"模块:属性"，如基准测试中的模拟Word）；为空时通过pywin32启动Word
+    word_app_factory: str = ""
+    # Web后台任务同时执行的数量（Word自动化不宜并发，默认逐个排队执行）
+    job_workers: int = 1
+    # 业务目录轮询间隔（秒）：文件增删改时增量更新func1/func2配置数据，0表示不监视
+    data_watch_interval: float = 5.0
+    # Web服务方式：production（多线程WSGI服务器，Word调用集中到COM调度线程）/ development（Flask开发服务器）
+    web_server: str = "production"
+    # 生产服务模式的请求处理线程数（SSE任务事件流等长连接各占一个线程）
+    web_threads: int = 16
+    # 生产服务模式的COM调度线程数（每个线程独占一个常驻Word实例）
+    com_threads: int = 1
+    # 运行指标（/api/metrics，Prometheus文本格式）：Word/PDF/图片操作耗时与失败次数、队列深度、缓存命中率等
+    metrics_enabled: bool = True
+
     # 加载.env文件
     model_config = SettingsConfigDict(
         env_file=".env",
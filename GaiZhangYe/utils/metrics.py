@@ -0,0 +1,338 @@
+# utils/metrics.py
+"""
+进程内运行指标，按Prometheus文本格式导出（/api/metrics）
+- 计数器、直方图：每个标签组合一个子指标，各自持有一把锁，更新只在锁内做几次加法，无竞争时开销可忽略，默认开启
+- 仪表：可直接设置/增减，也可注册回调在导出时才计算（队列深度、缓存命中率等），不增加业务路径的开销
+- 指标只统计当前进程；在工作进程（Word工作池、PDF进程池）中完成的工作由主进程按返回结果计数
+- 同名指标重复声明时返回已注册的实例，各模块可在模块级声明自己用到的指标
+"""
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from GaiZhangYe.utils.config import get_settings
+
+NAMESPACE = "gaizhangye"
+
+# Word打开/导出等操作从数毫秒到数分钟不等
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_enabled = get_settings().metrics_enabled
+
+LabelValues = Tuple[str, ...]
+GaugeCallback = Callable[[], Union[float, Mapping[LabelValues, float]]]
+
+
+def metrics_enabled() -> bool:
+    """是否启用运行指标（配置metrics_enabled）"""
+    return _enabled
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:  # 无标签的指标从0开始导出
+            self._children[()] = self._new_child()
+
+    def labels(self, *values: object, **labels: object):
+        """按标签取子指标（首次使用时创建）；热点路径可保存返回值重复使用"""
+        key = tuple(str(labels[name]) for name in self.labelnames) if labels else tuple(map(str, values))
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"指标{self.name}的标签应为{self.labelnames}，实际为{key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _items(self) -> List[Tuple[LabelValues, object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    type_name = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        self.labels(**labels).inc(amount)
+
+    def values(self) -> Dict[LabelValues, float]:
+        return {key: child.value for key, child in self._items()}
+
+    def samples(self) -> Iterator[str]:
+        for key, child in self._items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值；指定callback时在导出时调用（返回单个值，或{标签值元组: 值}）"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[GaugeCallback] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        self.labels(**labels).inc(amount)
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.labels(**labels).dec(amount)
+
+    def set(self, value: float, **labels: object) -> None:
+        self.labels(**labels).set(value)
+
+    def samples(self) -> Iterator[str]:
+        if self.callback is None:
+            for key, child in self._items():
+                yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            return
+        try:
+            result = self.callback()
+        except Exception:  # 回调所依赖的对象可能正在关闭，本次导出跳过
+            return
+        items = result.items() if isinstance(result, Mapping) else [((), result)]
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("_lock", "_buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一项为+Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class Histogram(_Metric):
+    """耗时分布（桶按上界累计，与Prometheus一致）"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float, **labels: object) -> None:
+        self.labels(**labels).observe(value)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    """指标注册表（按声明顺序导出）"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def get_or_register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(f"指标{metric.name}已按不同的类型或标签注册")
+        return existing
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """声明计数器（名称自动加命名空间前缀）"""
+    return REGISTRY.get_or_register(Counter(f"{NAMESPACE}_{name}", documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = (),
+          callback: Optional[GaugeCallback] = None) -> Gauge:
+    """声明仪表；重复声明时更新回调（如模块重新加载）"""
+    metric = REGISTRY.get_or_register(Gauge(f"{NAMESPACE}_{name}", documentation, labelnames, callback))
+    if callback is not None:
+        metric.callback = callback
+    return metric
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """声明直方图"""
+    return REGISTRY.get_or_register(Histogram(f"{NAMESPACE}_{name}", documentation, labelnames, buckets))
+
+
+def render_metrics() -> str:
+    """全部指标的Prometheus文本格式"""
+    return REGISTRY.render()
+
+
+class OperationMetrics:
+    """
+    一组操作的耗时与失败次数：<name>_seconds{<label>} 直方图、<name>_failures_total{<label>} 计数器
+    用法：with metrics.track("open"): ...  或  @metrics.timed("export")
+    """
+
+    def __init__(self, name: str, subject: str, label: str = "operation"):
+        self.seconds = histogram(f"{name}_seconds", f"{subject}耗时（秒，含失败）", (label,))
+        self.failures = counter(f"{name}_failures_total", f"{subject}失败次数", (label,))
+
+    def track(self, value: str) -> "_Tracker":
+        """上下文管理器：退出时记录耗时，以异常退出时同时计一次失败"""
+        if not _enabled:
+            return _NULL_TRACKER
+        return _Tracker(self, value)
+
+    def timed(self, value: str) -> Callable:
+        """装饰器：按track统计函数调用"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.track(value):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+class _Tracker:
+    __slots__ = ("_metrics", "_value", "_start")
+
+    def __init__(self, metrics: OperationMetrics, value: str):
+        self._metrics = metrics
+        self._value = value
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self._metrics.seconds.labels(self._value).observe(time.perf_counter() - self._start)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self._metrics.failures.labels(self._value).inc()
+        return False
+
+
+_NULL_TRACKER = nullcontext()
+
+
+# ==================== 缓存命中率 ====================
+
+_cache_lookups = counter("cache_lookups_total", "缓存查询次数（按缓存与结果hit/miss）", ("cache", "result"))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """记录一次缓存查询"""
+    if _enabled:
+        _cache_lookups.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in _cache_lookups.values().items():
+        hits_total = totals.setdefault(cache, [0.0, 0.0])
+        hits_total[1] += value
+        if result == "hit":
+            hits_total[0] += value
+    return {(cache,): hits / total for cache, (hits, total) in totals.items() if total}
+
+
+gauge("cache_hit_ratio", "缓存命中率（进程启动以来）", ("cache",), callback=_cache_hit_ratios)
+
+
+# ==================== 业务服务 ====================
+
+SERVICE_RUNS = OperationMetrics("service_run", "业务服务执行", label="service")
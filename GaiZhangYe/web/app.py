@@ -5,6 +5,7 @@ import sys
 from pathlib import Path
 import logging
 from GaiZhangYe.web import create_app
+from GaiZhangYe.web.server import serve
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,4 +21,4 @@ if __name__ == "__main__":
     logger.info("启动HTML可视化服务...")
     logger.info("服务将在 http://localhost:5001 启动")
     logger.info("按 Ctrl+C 停止服务")
-    app.run(host="0.0.0.0", port=5001, debug=False)
+    serve(app, host="0.0.0.0", port=5001)
@@ -0,0 +1,317 @@
+# GaiZhangYe/web/jobs.py
+"""
+后台任务：长耗时接口提交后立即返回任务ID，任务在后台线程中执行
+- 任务记录持久化，页面刷新或服务重启后仍可查询：状态、结果等摘要为JSON快照（{任务ID}.json，仅在状态变化时重写），
+  进度事件逐条追加到事件日志（{任务ID}.events.jsonl），每个事件的写入量不随事件数增长
+- 文件写入在条件变量之外进行，写盘不阻塞其他任务的进度通知与SSE等待者
+- 进度事件带递增序号，SSE流可按Last-Event-ID断点续传
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.utils.metrics import counter, gauge
+from GaiZhangYe.core.basic.file_manager import get_file_manager
+from GaiZhangYe.core.models.progress import ProgressCallback, ProgressEvent
+
+logger = get_logger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+_FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# 任务执行函数：接收进度回调，返回可JSON序列化的结果
+JobRunner = Callable[[ProgressCallback], dict]
+
+# 运行指标
+_active_jobs = gauge("jobs", "本进程中排队/执行中的后台任务数", ("status",))
+_finished_jobs = counter("jobs_finished_total", "已结束的后台任务数", ("kind", "status"))
+for _status in (JOB_QUEUED, JOB_RUNNING):
+    _active_jobs.labels(_status)
+
+
+@dataclass
+class Job:
+    """后台任务记录"""
+    id: str
+    kind: str
+    params: dict
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    files: Dict[str, dict] = field(default_factory=dict)  # 文件名 -> 最新进度
+    events: List[dict] = field(default_factory=list)
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED_STATES
+
+    def to_dict(self, include_events: bool = False) -> dict:
+        data = asdict(self)
+        if not include_events:
+            data.pop("events")
+        return data
+
+
+class JobManager:
+    """后台任务管理器（线程池执行，条件变量通知SSE等待者）"""
+
+    def __init__(self, jobs_dir: Path, max_workers: int = 1, max_records: int = 200):
+        """
+        :param jobs_dir: 任务记录目录
+        :param max_workers: 同时执行的任务数（Word自动化不宜并发，默认串行排队）
+        :param max_records: 保留的任务记录数，超出时删除最早完成的记录
+        """
+        self.jobs_dir = jobs_dir
+        self.max_records = max_records
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="job")
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, Job] = {}
+        # 文件写入锁（在条件变量之外获取）与各任务已写入事件日志的事件数
+        self._io_lock = threading.Lock()
+        self._logged: Dict[str, int] = {}
+        self._load()
+
+    def _snapshot_file(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _events_file(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.events.jsonl"
+
+    def _load(self) -> None:
+        """加载历史任务记录（快照 + 事件日志）；上次服务退出时未完成的任务标记为失败"""
+        for record in self.jobs_dir.glob("*.json"):
+            try:
+                data = json.loads(record.read_text(encoding="utf-8"))
+                legacy_events = data.pop("events", None)
+                job = Job(**data)
+            except Exception as e:
+                logger.warning(f"读取任务记录失败：{record} - {e}")
+                continue
+            if legacy_events is not None:
+                # 旧格式的记录：事件保存在快照中，迁移为事件日志
+                job.events, intact = legacy_events, False
+            else:
+                job.events, intact = self._read_events(job.id)
+            if not intact:
+                self._rewrite_events(job)
+            self._logged[job.id] = len(job.events)
+            interrupted = not job.finished
+            if interrupted:
+                # 快照只在状态变化时写入，逐文件进度以事件日志为准
+                job.total = job.completed = job.failed = 0
+                job.files = {}
+                for event in job.events:
+                    if event.get("type") == "progress":
+                        self._apply_progress(job, event)
+                job.status = JOB_FAILED
+                job.error = "服务重启，任务已中断"
+                job.finished_at = time.time()
+                self._append_event(job, "finished", {"status": job.status, "error": job.error})
+            self._jobs[job.id] = job
+            if interrupted or legacy_events is not None:
+                self._flush(job, snapshot=True)
+
+    def _read_events(self, job_id: str) -> Tuple[List[dict], bool]:
+        """读取事件日志，返回(事件列表, 是否完整)；服务异常退出时最后一行可能只写入了一部分"""
+        events = []
+        try:
+            with open(self._events_file(job_id), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"任务事件日志不完整，已截断：{job_id}（保留{len(events)}个事件）")
+                        return events, False
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"读取任务事件日志失败：{job_id} - {e}")
+        return events, True
+
+    def _rewrite_events(self, job: Job) -> None:
+        """重写整个事件日志（仅在加载时迁移旧记录或修复截断的日志）"""
+        try:
+            with open(self._events_file(job.id), "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(event, ensure_ascii=False) + "\n" for event in job.events)
+        except OSError as e:
+            logger.warning(f"保存任务事件日志失败：{job.id} - {e}")
+
+    def _flush(self, job: Job, snapshot: bool = False) -> None:
+        """
+        将尚未写入的事件追加到事件日志；snapshot为True时同时原子重写任务快照
+        在条件变量之外调用：只在取出待写内容时短暂持有条件变量
+        """
+        with self._io_lock:
+            with self._cond:
+                if self._jobs.get(job.id) is not job:  # 已被清理
+                    return
+                start = self._logged.get(job.id, 0)
+                events = job.events[start:]
+                data = job.to_dict() if snapshot else None
+            if events:
+                try:
+                    with open(self._events_file(job.id), "a", encoding="utf-8") as f:
+                        f.writelines(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+                    self._logged[job.id] = start + len(events)
+                except OSError as e:
+                    logger.warning(f"保存任务事件失败：{job.id} - {e}")
+            if data is not None:
+                self._write_snapshot(job.id, data)
+
+    def _write_snapshot(self, job_id: str, data: dict) -> None:
+        """原子写入任务快照"""
+        fd, temp_name = tempfile.mkstemp(dir=self.jobs_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_name, self._snapshot_file(job_id))
+        except Exception as e:
+            logger.warning(f"保存任务记录失败：{job_id} - {e}")
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+
+    @staticmethod
+    def _append_event(job: Job, event_type: str, data: dict) -> dict:
+        event = {"seq": len(job.events) + 1, "type": event_type, "time": time.time(), **data}
+        job.events.append(event)
+        return event
+
+    @staticmethod
+    def _apply_progress(job: Job, data: dict) -> None:
+        """按进度事件更新任务的计数与逐文件状态（执行中与重启后重放事件日志共用）"""
+        job.total = data["total"]
+        job.completed = data["current"]
+        if data["status"] == "failed":
+            job.failed += 1
+        job.files[data["file"]] = {"status": data["status"], "message": data.get("message", ""),
+                                   "output": data.get("output")}
+
+    def submit(self, kind: str, params: dict, runner: JobRunner) -> Job:
+        """
+        提交任务（立即返回）
+        :param kind: 任务类型（如 word-to-pdf）
+        :param params: 提交参数（仅用于记录和展示）
+        :param runner: 任务执行函数
+        """
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params)
+        with self._cond:
+            self._jobs[job.id] = job
+            pruned = self._prune()
+        self._flush(job, snapshot=True)
+        self._remove_records(pruned)
+        _active_jobs.inc(status=JOB_QUEUED)
+        self._executor.submit(self._run, job, runner)
+        logger.info(f"已提交后台任务：{kind} - {job.id}")
+        return job
+
+    def _run(self, job: Job, runner: JobRunner) -> None:
+        _active_jobs.dec(status=JOB_QUEUED)
+        _active_jobs.inc(status=JOB_RUNNING)
+        with self._cond:
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            self._append_event(job, "status", {"status": job.status})
+            self._cond.notify_all()
+        self._flush(job, snapshot=True)
+
+        try:
+            result = runner(lambda event: self._on_progress(job, event))
+            status, error = JOB_SUCCEEDED, None
+        except Exception as e:
+            logger.error(f"后台任务失败：{job.kind} - {job.id}", exc_info=True)
+            result, status, error = None, JOB_FAILED, str(e)
+
+        with self._cond:
+            job.result = result
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+            self._append_event(job, "finished", {"status": status, "error": error})
+            self._cond.notify_all()
+        self._flush(job, snapshot=True)
+        _active_jobs.dec(status=JOB_RUNNING)
+        _finished_jobs.inc(kind=job.kind, status=status)
+        logger.info(f"后台任务结束：{job.kind} - {job.id}（{status}）")
+
+    def _on_progress(self, job: Job, event: ProgressEvent) -> None:
+        data = event.to_dict()
+        with self._cond:
+            self._apply_progress(job, data)
+            self._append_event(job, "progress", data)
+            self._cond.notify_all()
+        self._flush(job)
+
+    def _prune(self) -> List[str]:
+        """移除超出保留数量的已完成任务（调用方持有锁），返回被移除的任务ID，记录文件由_remove_records删除"""
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.created_at)
+        pruned = []
+        for job in finished[:max(0, len(self._jobs) - self.max_records)]:
+            self._jobs.pop(job.id, None)
+            pruned.append(job.id)
+        return pruned
+
+    def _remove_records(self, job_ids: List[str]) -> None:
+        """删除任务的快照与事件日志（在条件变量之外调用）"""
+        with self._io_lock:
+            for job_id in job_ids:
+                self._logged.pop(job_id, None)
+                for path in (self._snapshot_file(job_id), self._events_file(job_id)):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 50) -> List[dict]:
+        """按提交时间倒序返回任务摘要"""
+        with self._cond:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)[:limit]
+            return [j.to_dict() for j in jobs]
+
+    def wait_events(self, job_id: str, after: int, timeout: float = 15.0) -> Tuple[List[dict], bool]:
+        """
+        等待序号大于after的新事件
+        :return: (新事件列表, 任务是否已结束)；超时无新事件时返回空列表
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return [], True
+            self._cond.wait_for(lambda: len(job.events) > after or job.finished, timeout)
+            return list(job.events[after:]), job.finished
+
+
+# 模块级单例
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """返回模块级单例的任务管理器（记录保存在 business_data/.jobs）"""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager(get_file_manager().get_jobs_dir(), get_settings().job_workers)
+    return _job_manager
@@ -3,14 +3,11 @@ import sys
 import json
 import uuid
 from pathlib import Path
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 
 from GaiZhangYe.core.basic.file_manager import get_file_manager
-from GaiZhangYe.core.basic.file_processor import (
-    windows_natural_sort_key,
-    sort_files_windows_style,
-    sort_dicts_by_name_windows_style,
-)
+from GaiZhangYe.core.basic.com_dispatcher import stop_com_dispatcher
+from GaiZhangYe.web.jobs import JobRunner, JOB_SUCCEEDED, get_job_manager
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -23,10 +20,38 @@ def session_id():
     return jsonify({"success": True, "session_id": current_app.config.get('APP_SESSION_ID')})
 
 
+def _ndjson_response(events) -> Response:
+    """逐行输出JSON事件（application/x-ndjson），每行在产生时立即发送"""
+    def stream():
+        for event in events:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(stream()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _page_count_events(folder: Path, names: list):
+    """页数事件：{"type": "page_count", "name", "page_count", "source", "error"}，结束时为{"type": "done"}"""
+    from GaiZhangYe.core.folder_scan import iter_page_counts
+
+    try:
+        for result in iter_page_counts(folder, names):
+            yield {"type": "page_count", **result.to_dict()}
+        yield {"type": "done"}
+    except Exception as e:
+        current_app.logger.error(f"获取文件页数失败: {e}", exc_info=True)
+        yield {"type": "error", "error": str(e)}
+
+
 @api_bp.route('/scan-folder', methods=['POST'])
 def scan_folder():
+    """
+    扫描Word文件夹并获取页数
+    请求参数stream为true时以NDJSON流式返回：首行为文件列表（{"type": "files", ...}，页数为null），
+    随后每得到一个文件的页数输出一行页数事件；否则等全部页数得到后一次性返回
+    """
     try:
-        from GaiZhangYe.core.basic.word_processor import WordProcessor
+        from GaiZhangYe.core.folder_scan import list_word_files
 
         data = request.get_json()
         folder_path = data.get('path')
@@ -38,21 +63,20 @@ def scan_folder():
         if not folder_path.exists() or not folder_path.is_dir():
             return jsonify({"success": False, "error": f"路径不存在或不是目录: {folder_path}"})
 
-        word_processor = WordProcessor()
-        word_files = []
+        names = list_word_files(folder_path)
+        word_files = [{"name": name, "stem": os.path.splitext(name)[0], "page_count": None} for name in names]
 
-        for filename in os.listdir(folder_path):
-            if filename.endswith((".docx", ".doc")):
-                file_path = folder_path / filename
-                page_count = None
-                try:
-                    page_count = word_processor.get_word_page_count(file_path)
-                except Exception as e:
-                    current_app.logger.warning(f"获取文件 {filename} 页数失败: {e}")
+        if data.get('stream'):
+            def events():
+                yield {"type": "files", "success": True, "files": word_files, "count": len(word_files)}
+                yield from _page_count_events(folder_path, names)
 
-                word_files.append({"name": filename, "stem": os.path.splitext(filename)[0], "page_count": page_count})
+            return _ndjson_response(events())
 
-        word_files = sort_dicts_by_name_windows_style(word_files, 'name')
+        by_name = {f["name"]: f for f in word_files}
+        for event in _page_count_events(folder_path, names):
+            if event["type"] == "page_count":
+                by_name[event["name"]]["page_count"] = event["page_count"]
         return jsonify({"success": True, "files": word_files, "count": len(word_files)})
     except Exception as e:
         current_app.logger.error(f"扫描文件夹失败: {e}", exc_info=True)
@@ -61,65 +85,90 @@ def scan_folder():
 
 @api_bp.route('/scan-folder-with-images', methods=['POST'])
 def scan_folder_with_images():
+    """扫描Word文件夹与图片文件夹；stream为true时与 /scan-folder 一样先返回文件列表，再逐个返回页数"""
     try:
-        from GaiZhangYe.core.basic.word_processor import WordProcessor
+        from GaiZhangYe.core.folder_scan import list_image_files, list_word_files
 
         data = request.get_json()
         word_folder = data.get('word_path')
         image_folder = data.get('image_path')
 
-        word_files = []
+        names = []
         image_files = []
 
         if word_folder:
             word_folder = Path(word_folder)
             if word_folder.exists() and word_folder.is_dir():
-                wp = WordProcessor()
-                for filename in os.listdir(word_folder):
-                    if filename.endswith((".docx", ".doc")):
-                        file_path = word_folder / filename
-                        try:
-                            total_pages = wp.get_word_page_count(file_path)
-                            total_pages = total_pages if total_pages > 0 else 1
-                        except Exception as e:
-                            current_app.logger.warning(f"获取文件页数失败 {filename}: {e}")
-                            total_pages = 1
-                        word_files.append({"name": filename, "total_pages": total_pages})
-                word_files = sort_dicts_by_name_windows_style(word_files, 'name')
+                names = list_word_files(word_folder)
 
         if image_folder:
             image_folder = Path(image_folder)
             if image_folder.exists() and image_folder.is_dir():
-                for filename in os.listdir(image_folder):
-                    if filename.endswith((".png", ".jpg", ".jpeg", ".bmp")):
-                        image_files.append(filename)
-                image_files = sort_files_windows_style(image_files)
+                image_files = list_image_files(image_folder)
 
-        return jsonify({
+        word_files = [{"name": name, "total_pages": None} for name in names]
+        listing = {
             "success": True,
             "word_files": word_files,
             "image_files": image_files,
             "word_count": len(word_files),
             "image_count": len(image_files),
-        })
+        }
+
+        if data.get('stream'):
+            def events():
+                yield {"type": "files", **listing}
+                yield from _page_count_events(word_folder, names)
+
+            return _ndjson_response(events())
+
+        by_name = {f["name"]: f for f in word_files}
+        for event in _page_count_events(word_folder, names):
+            if event["type"] == "page_count":
+                by_name[event["name"]]["total_pages"] = event["page_count"]
+        # 页数获取失败时按1页处理
+        for f in word_files:
+            f["total_pages"] = f["total_pages"] or 1
+        return jsonify(listing)
     except Exception as e:
         current_app.logger.error(f"扫描文件夹失败: {e}", exc_info=True)
         return jsonify({"success": False, "error": str(e)})
 
 
-@api_bp.route('/word-to-pdf', methods=['POST'])
-def api_word_to_pdf():
-    try:
-        from GaiZhangYe.core.batch_convert import BatchConvertService
+def _build_word_to_pdf_task(data: dict) -> JobRunner:
+    """解析Word转PDF参数，返回任务执行函数（同步接口与后台任务共用）"""
+    from GaiZhangYe.core.batch_convert import BatchConvertService
 
-        data = request.get_json() or {}
-        input_dir = Path(data.get('input_dir')) if data.get('input_dir') else file_manager.get_func2_dir('target_files')
-        output_dir = Path(data.get('output_dir')) if data.get('output_dir') else file_manager.get_func2_dir('result_pdf')
+    input_dir = Path(data.get('input_dir')) if data.get('input_dir') else file_manager.get_func2_dir('target_files')
+    output_dir = Path(data.get('output_dir')) if data.get('output_dir') else file_manager.get_func2_dir('result_pdf')
+    workers = int(data['workers']) if data.get('workers') else None
 
-        convert_service = BatchConvertService()
-        result_files = convert_service.run(input_dir, output_dir)
+    if data.get('incremental'):
+        delete_orphans = bool(data.get('delete_orphans'))
+
+        def incremental_runner(progress_callback=None):
+            report = BatchConvertService().run_incremental(input_dir, output_dir, workers=workers,
+                                                           delete_orphans=delete_orphans,
+                                                           progress_callback=progress_callback)
+            message = (f"增量转换完成！重新生成 {len(report.rebuilt)} 个，跳过 {len(report.skipped)} 个，"
+                       f"失败 {len(report.failed)} 个")
+            return {"message": message, "output_dir": str(output_dir), "report": report.to_dict()}
+
+        return incremental_runner
+
+    def runner(progress_callback=None):
+        result_files = BatchConvertService().run(input_dir, output_dir, workers=workers, progress_callback=progress_callback)
         result_files_str = [str(f) for f in result_files]
-        return jsonify({"success": True, "message": f"转换完成！共生成 {len(result_files_str)} 个PDF文件", "output_dir": str(output_dir), "files": result_files_str})
+        return {"message": f"转换完成！共生成 {len(result_files_str)} 个PDF文件", "output_dir": str(output_dir), "files": result_files_str}
+
+    return runner
+
+
+@api_bp.route('/word-to-pdf', methods=['POST'])
+def api_word_to_pdf():
+    try:
+        runner = _build_word_to_pdf_task(request.get_json() or {})
+        return jsonify({"success": True, **runner()})
     except Exception as e:
         current_app.logger.error(f"Word转PDF失败: {str(e)}", exc_info=True)
         return jsonify({"success": False, "error": f"转换失败: {str(e)}"})
@@ -130,6 +179,15 @@ def status():
     return jsonify({"status": "running", "message": "盖章页工具HTML服务已启动"})
 
 
+@api_bp.route('/metrics')
+def metrics():
+    """运行指标（Prometheus文本格式）"""
+    from GaiZhangYe.utils.metrics import metrics_enabled, render_metrics
+    if not metrics_enabled():
+        return jsonify({"success": False, "error": "运行指标未启用（METRICS_ENABLED=false）"}), 404
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @api_bp.route('/open-directory')
 def open_directory():
     dir_name = request.args.get('dir_name')
@@ -142,6 +200,10 @@ def open_directory():
 
         if dir_name in func1_map:
             dir_path = file_manager.get_func1_dir(func1_map[dir_name])
+            if dir_name == "Nostamped_PDF":
+                # 逐页PDF延迟生成时，在首次打开目录前生成
+                from GaiZhangYe.core.stamp_prepare import StampPrepareService
+                StampPrepareService().materialize_page_pdfs(dir_path)
         elif dir_name in func2_map:
             dir_path = file_manager.get_func2_dir(func2_map[dir_name])
         else:
@@ -186,26 +248,36 @@ def get_default_output_paths():
         return jsonify({"success": False, "error": str(e)})
 
 
-@api_bp.route('/prepare-stamp', methods=['POST'])
-def prepare_stamp():
-    try:
-        from GaiZhangYe.core.stamp_prepare import StampPrepareService
+def _build_prepare_stamp_task(data: dict) -> JobRunner:
+    """解析准备盖章页参数，返回任务执行函数；参数无效时抛出ValueError"""
+    from GaiZhangYe.core.stamp_prepare import StampPrepareService
 
-        data = request.get_json() or {}
-        target_pages = data.get('target_pages')
-        output_path = data.get('output_path')
-        # optional custom input Word directory for Nostamped_Word
-        word_dir = data.get('word_dir')
+    target_pages = data.get('target_pages')
+    output_path = data.get('output_path')
+    # optional custom input Word directory for Nostamped_Word
+    word_dir = data.get('word_dir')
 
-        if not target_pages:
-            return jsonify({"success": False, "error": "没有提供页面范围"})
-        if not output_path:
-            return jsonify({"success": False, "error": "没有提供输出路径"})
+    if not target_pages:
+        raise ValueError("没有提供页面范围")
+    if not output_path:
+        raise ValueError("没有提供输出路径")
 
-        stamp_service = StampPrepareService()
+    def runner(progress_callback=None):
         # If a custom word_dir was provided, pass it through; otherwise use default configured directory
-        result_files = stamp_service.run(target_pages, word_dir=Path(word_dir) if word_dir else None, output_dir=Path(output_path))
-        return jsonify({"success": True, "message": "盖章页准备完成", "files": [str(f) for f in result_files]})
+        result_files = StampPrepareService().run(target_pages, word_dir=Path(word_dir) if word_dir else None,
+                                                 output_dir=Path(output_path), progress_callback=progress_callback)
+        return {"message": "盖章页准备完成", "files": [str(f) for f in result_files]}
+
+    return runner
+
+
+@api_bp.route('/prepare-stamp', methods=['POST'])
+def prepare_stamp():
+    try:
+        runner = _build_prepare_stamp_task(request.get_json() or {})
+        return jsonify({"success": True, **runner()})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)})
     except Exception as e:
         current_app.logger.error(f"准备盖章页失败: {str(e)}", exc_info=True)
         return jsonify({"success": False, "error": f"准备盖章页失败: {str(e)}"})
@@ -231,12 +303,16 @@ def get_directories():
 
 @api_bp.route('/refresh-data', methods=['POST'])
 def api_refresh_data():
+    """按目录变化增量更新数据文件（保留未变化文件的配置）；{"full": true} 时丢弃已有配置重新生成"""
     try:
         from GaiZhangYe.core.data_communication import get_data_service
         data_service = get_data_service()
-        if data_service.scan_business_data():
-            return jsonify({"success": True, "message": "数据文件已重新生成"})
-        return jsonify({"success": False, "error": "数据文件重新生成失败"})
+        if (request.get_json(silent=True) or {}).get('full'):
+            if data_service.scan_business_data():
+                return jsonify({"success": True, "message": "数据文件已重新生成"})
+            return jsonify({"success": False, "error": "数据文件重新生成失败"})
+        changes = data_service.refresh_business_data()
+        return jsonify({"success": True, "message": "数据文件已更新", "changes": changes})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -245,8 +321,8 @@ def api_refresh_data():
 def api_get_func1_data():
     try:
         from GaiZhangYe.core.data_communication import get_data_service
-        data = get_data_service().get_func1_data()
-        return jsonify({"success": True, "data": data})
+        data, version = get_data_service().get_data_with_version('func1')
+        return jsonify({"success": True, "data": data, "version": version})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -267,8 +343,8 @@ def api_save_func1_data():
 def api_get_func2_data():
     try:
         from GaiZhangYe.core.data_communication import get_data_service
-        data = get_data_service().get_func2_data()
-        return jsonify({"success": True, "data": data})
+        data, version = get_data_service().get_data_with_version('func2')
+        return jsonify({"success": True, "data": data, "version": version})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -285,6 +361,151 @@ def api_save_func2_data():
         return jsonify({"success": False, "error": str(e)})
 
 
+def _patch_value():
+    """PATCH请求体：{"value": 新配置}，value为null时删除该项"""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or 'value' not in body:
+        raise ValueError('请求体应为 {"value": ...}')
+    return body['value']
+
+
+@api_bp.route('/func1/data/<path:stem>', methods=['PATCH'])
+def api_patch_func1_entry(stem):
+    """只修改一个Word文档的页码选择，其他文档的数据不受影响"""
+    try:
+        from GaiZhangYe.core.data_communication import get_data_service
+        version = get_data_service().patch_func1_entry(stem, _patch_value())
+        return jsonify({"success": True, "version": version})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"修改func1数据失败: {e}", exc_info=True)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api_bp.route('/func2/config/<path:file_name>', methods=['PATCH'])
+def api_patch_func2_config(file_name):
+    """只修改一个目标文件的盖章配置，其他文件的配置不受影响"""
+    try:
+        from GaiZhangYe.core.data_communication import get_data_service
+        version = get_data_service().patch_func2_config(file_name, _patch_value())
+        return jsonify({"success": True, "version": version})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"修改func2配置失败: {e}", exc_info=True)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api_bp.route('/data/export', methods=['POST'])
+def api_export_data():
+    """导出为JSON数据文件（target_pages.json / stamp_config.json），可指定输出目录"""
+    try:
+        from GaiZhangYe.core.data_communication import get_data_service
+        output_dir = ((request.get_json(silent=True) or {}).get('output_dir') or '').strip()
+        paths = get_data_service().export_json(Path(output_dir) if output_dir else None)
+        return jsonify({"success": True, "files": [str(p) for p in paths]})
+    except Exception as e:
+        current_app.logger.error(f"导出数据失败: {e}", exc_info=True)
+        return jsonify({"success": False, "error": str(e)})
+
+
+@api_bp.route('/data/import', methods=['POST'])
+def api_import_data():
+    """从JSON数据文件导入（覆盖当前数据），可指定输入目录"""
+    try:
+        from GaiZhangYe.core.data_communication import get_data_service
+        input_dir = ((request.get_json(silent=True) or {}).get('input_dir') or '').strip()
+        imported = get_data_service().import_json(Path(input_dir) if input_dir else None)
+        return jsonify({"success": True, "imported": imported})
+    except Exception as e:
+        current_app.logger.error(f"导入数据失败: {e}", exc_info=True)
+        return jsonify({"success": False, "error": str(e)})
+
+
+@api_bp.route('/auto-match-stamps', methods=['POST'])
+def api_auto_match_stamps():
+    """按版面自动匹配盖章图片与目标文件的页码，结果写入func2配置"""
+    try:
+        from GaiZhangYe.core.data_communication import get_data_service
+        data = request.get_json() or {}
+        word_path = (data.get('word_path') or '').strip()
+        image_path = (data.get('image_path') or '').strip()
+        result = get_data_service().auto_match_func2(word_dir=Path(word_path) if word_path else None,
+                                                     image_dir=Path(image_path) if image_path else None)
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        current_app.logger.error(f"自动匹配盖章页失败: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "error": str(e)})
+
+
+def _preview_source(raw_path: str) -> Path:
+    """预览的源文件：完整路径，或功能2图片目录中的文件名"""
+    if not raw_path:
+        raise ValueError("未提供文件路径")
+    path = Path(raw_path)
+    if not path.exists() and not path.is_absolute():
+        path = file_manager.get_func2_dir('images') / raw_path
+    return path
+
+
+def _preview_response(preview) -> Response:
+    """缩略图响应：ETag为缓存键；URL携带与内容一致的版本号（v）时允许浏览器长期缓存，否则每次协商（304）"""
+    if preview.not_modified:
+        response = Response(status=304)
+    else:
+        response = Response(preview.data, mimetype=preview.mimetype)
+    response.set_etag(preview.etag)
+    if request.args.get('v') == preview.version:
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_bp.route('/preview/info')
+def preview_info():
+    """预览信息：文件类型、页数与内容版本；Word文档尚未转换为PDF时ready为False（已在后台开始转换）"""
+    try:
+        from GaiZhangYe.core.preview import get_preview_service
+        path = _preview_source(request.args.get('path', '').strip())
+        return jsonify({"success": True, **get_preview_service().info(path)})
+    except Exception as e:
+        current_app.logger.warning(f"获取预览信息失败: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+
+@api_bp.route('/preview/page')
+def preview_page():
+    """PDF/Word文档一页的缩略图（PNG或JPEG）；Word文档尚未转换时返回202，稍后重试"""
+    try:
+        from GaiZhangYe.core.preview import get_preview_service
+        path = _preview_source(request.args.get('path', '').strip())
+        page = request.args.get('page', 1, type=int)
+        preview = get_preview_service().page_thumbnail(path, page, request.args.get('dpi', type=int),
+                                                       request.if_none_match)
+        if preview is None:
+            return jsonify({"success": False, "ready": False, "message": "文档正在转换为PDF，请稍后重试"}), 202
+        return _preview_response(preview)
+    except Exception as e:
+        current_app.logger.warning(f"生成页面缩略图失败: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 400
+
+
+@api_bp.route('/preview/image')
+def preview_image():
+    """盖章图片的缩略图（JPEG）"""
+    try:
+        from GaiZhangYe.core.preview import get_preview_service
+        path = _preview_source(request.args.get('path', '').strip())
+        preview = get_preview_service().image_thumbnail(path, request.args.get('width', type=int),
+                                                        request.if_none_match)
+        return _preview_response(preview)
+    except Exception as e:
+        current_app.logger.warning(f"生成图片缩略图失败: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 400
+
+
 @api_bp.route('/extract-images-from-pdf', methods=['POST'])
 def extract_images_from_pdf():
     try:
@@ -305,80 +526,205 @@ def extract_images_from_pdf():
 
 @api_bp.route('/extract-pdf-images', methods=['POST'])
 def extract_pdf_images():
+    """从PDF提取图片：pdf_path为单个文件，pdf_paths为多个文件（在进程池中批量处理，单个文件失败不影响其他文件）"""
     try:
         data = request.get_json() or {}
-        pdf_path_str = data.get('pdf_path', '').strip()
-        if not pdf_path_str:
+        pdf_path_strs = data.get('pdf_paths') or [data.get('pdf_path', '')]
+        pdf_paths = [Path(p.strip()) for p in pdf_path_strs if p and p.strip()]
+        if not pdf_paths:
             return jsonify({"success": False, "error": "请提供PDF文件路径"})
-        pdf_path = Path(pdf_path_str)
-        if not pdf_path.exists() or not pdf_path.is_file() or pdf_path.suffix.lower() != '.pdf':
-            return jsonify({"success": False, "error": f"无效的PDF文件: {pdf_path}"})
-
-        output_folder = pdf_path.parent / f"{pdf_path.stem}_images"
-        output_folder.mkdir(parents=True, exist_ok=True)
+        for pdf_path in pdf_paths:
+            if not pdf_path.exists() or not pdf_path.is_file() or pdf_path.suffix.lower() != '.pdf':
+                return jsonify({"success": False, "error": f"无效的PDF文件: {pdf_path}"})
+
+        mode = data.get('mode') or None
+        if mode and mode not in ('extract', 'render', 'auto'):
+            return jsonify({"success": False, "error": f"不支持的图片提取方式: {mode}"})
+        try:
+            dpi = int(data.get('dpi') or 300)
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "dpi必须为整数"})
 
         from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
         pdf_processor = PdfProcessor()
-        extracted_images = pdf_processor.extract_images(pdf_path, output_folder)
-        image_files = [img.name for img in extracted_images]
-
-        return jsonify({"success": True, "message": f"成功从PDF提取 {len(image_files)} 张图片", "output_folder": str(output_folder), "image_files": image_files, "count": len(image_files)})
+        jobs = [(pdf_path, pdf_path.parent / f"{pdf_path.stem}_images") for pdf_path in pdf_paths]
+
+        if len(jobs) == 1:
+            pdf_path, output_folder = jobs[0]
+            output_folder.mkdir(parents=True, exist_ok=True)
+            extracted_images = pdf_processor.extract_images(pdf_path, output_folder, dpi=dpi, mode=mode)
+            image_files = [img.name for img in extracted_images]
+            return jsonify({"success": True, "message": f"成功从PDF提取 {len(image_files)} 张图片", "output_folder": str(output_folder), "image_files": image_files, "count": len(image_files)})
+
+        results = []
+        for (pdf_path, output_folder), result in zip(jobs, pdf_processor.extract_images_batch(jobs, dpi=dpi, mode=mode)):
+            if result.ok:
+                results.append({"pdf_path": str(pdf_path), "success": True, "output_folder": str(output_folder),
+                                "image_files": [img.name for img in result.value], "count": len(result.value)})
+            else:
+                results.append({"pdf_path": str(pdf_path), "success": False, "error": result.error})
+        total = sum(r.get("count", 0) for r in results)
+        failed = sum(1 for r in results if not r["success"])
+        message = f"成功从{len(results) - failed}个PDF提取 {total} 张图片" + (f"，{failed}个失败" if failed else "")
+        return jsonify({"success": failed < len(results), "message": message, "results": results, "count": total})
     except Exception as e:
         current_app.logger.error(f"从PDF提取图片失败: {str(e)}", exc_info=True)
         return jsonify({"success": False, "error": f"从PDF提取图片失败: {str(e)}"})
 
 
-@api_bp.route('/start-stamp-overlay', methods=['POST'])
-def start_stamp_overlay():
-    try:
-        from GaiZhangYe.core.data_communication import get_data_service
-
-        data = request.get_json() or {}
-        target_word_dir = data.get('target_word_dir')
-        images_folder = data.get('images_folder')
-        result_word_path = data.get('result_word_path')
-        result_pdf_path = data.get('result_pdf_path')
-
-        if not target_word_dir:
-            return jsonify({"success": False, "error": "未提供Word文件夹路径"})
-
-        target_word_dir = Path(target_word_dir)
-        if not target_word_dir.exists() or not target_word_dir.is_dir():
-            return jsonify({"success": False, "error": f"Word文件夹不存在: {target_word_dir}"})
-
-        config_data = get_data_service().get_func2_data()
-        has_config = config_data and config_data.get('config') and len(config_data.get('config', {})) > 0
-
-        image_files = []
-        if images_folder:
-            images_dir = Path(images_folder)
-            if images_dir.exists() and images_dir.is_dir():
-                for filename in os.listdir(images_dir):
-                    if filename.endswith((".png", ".jpg", ".jpeg", ".bmp")):
-                        image_files.append(images_dir / filename)
-        else:
-            images_dir = file_manager.get_func2_dir('images')
-            if not has_config and images_dir.exists():
-                for filename in os.listdir(images_dir):
-                    if filename.endswith((".png", ".jpg", ".jpeg", ".bmp")):
-                        image_files.append(Path(images_dir) / filename)
+def _build_stamp_overlay_task(data: dict) -> JobRunner:
+    """解析盖章页覆盖参数（提交时读取UI配置），返回任务执行函数；参数无效时抛出ValueError"""
+    from GaiZhangYe.core.data_communication import get_data_service
+    from GaiZhangYe.core.stamp_overlay import StampOverlayService
+
+    target_word_dir = data.get('target_word_dir')
+    images_folder = data.get('images_folder')
+    result_word_path = data.get('result_word_path')
+    result_pdf_path = data.get('result_pdf_path')
+    insert_engine = data.get('insert_engine') or 'word'
+    pdf_stamp_mode = data.get('pdf_stamp_mode')
+
+    if not target_word_dir:
+        raise ValueError("未提供Word文件夹路径")
+    if insert_engine not in ('word', 'ooxml', 'pdf'):
+        raise ValueError(f"不支持的插图引擎: {insert_engine}")
+    if pdf_stamp_mode and pdf_stamp_mode not in ('overlay', 'replace'):
+        raise ValueError(f"不支持的PDF盖章方式: {pdf_stamp_mode}")
+
+    target_word_dir = Path(target_word_dir)
+    if not target_word_dir.exists() or not target_word_dir.is_dir():
+        raise ValueError(f"Word文件夹不存在: {target_word_dir}")
+
+    config_data = get_data_service().get_func2_data()
+    has_config = config_data and config_data.get('config') and len(config_data.get('config', {})) > 0
+
+    image_files = []
+    if images_folder:
+        images_dir = Path(images_folder)
+        if images_dir.exists() and images_dir.is_dir():
+            for filename in os.listdir(images_dir):
+                if filename.endswith((".png", ".jpg", ".jpeg", ".bmp")):
+                    image_files.append(images_dir / filename)
+    else:
+        images_dir = file_manager.get_func2_dir('images')
+        if not has_config and images_dir.exists():
+            for filename in os.listdir(images_dir):
+                if filename.endswith((".png", ".jpg", ".jpeg", ".bmp")):
+                    image_files.append(Path(images_dir) / filename)
 
-        from GaiZhangYe.core.stamp_overlay import StampOverlayService
-        stamp_service = StampOverlayService()
-        result_files = stamp_service.run(
+    def runner(progress_callback=None):
+        result_files = StampOverlayService().run(
             target_word_dir=target_word_dir,
             configs=config_data.get('config', {}),
             image_files=image_files if image_files else None,
             result_word_dir=Path(result_word_path) if result_word_path else None,
             result_pdf_dir=Path(result_pdf_path) if result_pdf_path else None,
+            insert_engine=insert_engine,
+            progress_callback=progress_callback,
+            pdf_stamp_mode=pdf_stamp_mode,
         )
+        return {"message": "盖章页覆盖完成", "files": [str(f) for f in result_files]}
 
-        return jsonify({"success": True, "message": "盖章页覆盖完成", "files": [str(f) for f in result_files]})
+    return runner
+
+
+@api_bp.route('/start-stamp-overlay', methods=['POST'])
+def start_stamp_overlay():
+    try:
+        runner = _build_stamp_overlay_task(request.get_json() or {})
+        return jsonify({"success": True, **runner()})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)})
     except Exception as e:
         current_app.logger.error(f"盖章页覆盖失败: {str(e)}", exc_info=True)
         return jsonify({"success": False, "error": f"盖章页覆盖失败: {str(e)}"})
 
 
+# 可作为后台任务提交的操作：类型 -> 参数解析函数
+_JOB_BUILDERS = {
+    'word-to-pdf': _build_word_to_pdf_task,
+    'prepare-stamp': _build_prepare_stamp_task,
+    'stamp-overlay': _build_stamp_overlay_task,
+}
+
+
+@api_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """提交后台任务：{"type": "word-to-pdf|prepare-stamp|stamp-overlay", "params": {...}}，立即返回任务ID"""
+    try:
+        data = request.get_json() or {}
+        job_type = data.get('type')
+        params = data.get('params') or {}
+        if job_type not in _JOB_BUILDERS:
+            return jsonify({"success": False, "error": f"不支持的任务类型: {job_type}"}), 400
+
+        runner = _JOB_BUILDERS[job_type](params)
+        job = get_job_manager().submit(job_type, params, runner)
+        return jsonify({"success": True, "job_id": job.id, "status": job.status}), 202
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"提交任务失败: {str(e)}", exc_info=True)
+        return jsonify({"success": False, "error": f"提交任务失败: {str(e)}"}), 500
+
+
+@api_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({"success": True, "jobs": get_job_manager().list_jobs(limit)})
+
+
+@api_bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    """任务状态与逐文件进度"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"任务不存在: {job_id}"}), 404
+    return jsonify({"success": True, "job": job.to_dict()})
+
+
+@api_bp.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """任务结果；未结束时返回202"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"任务不存在: {job_id}"}), 404
+    if not job.finished:
+        return jsonify({"success": False, "status": job.status, "error": "任务尚未完成"}), 202
+    if job.status != JOB_SUCCEEDED:
+        return jsonify({"success": False, "status": job.status, "error": job.error})
+    return jsonify({"success": True, "status": job.status, **(job.result or {})})
+
+
+@api_bp.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """SSE推送任务事件（progress/status/finished），支持Last-Event-ID断点续传"""
+    manager = get_job_manager()
+    if manager.get(job_id) is None:
+        return jsonify({"success": False, "error": f"任务不存在: {job_id}"}), 404
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('after') or 0
+    try:
+        after = int(last_event_id)
+    except ValueError:
+        after = 0
+
+    def stream():
+        nonlocal after
+        while True:
+            events, finished = manager.wait_events(job_id, after)
+            for event in events:
+                after = event['seq']
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if finished:
+                break
+            if not events:
+                # 心跳，防止代理因空闲断开连接
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @api_bp.route('/shutdown', methods=['POST'])
 def shutdown():
     try:
@@ -386,7 +732,11 @@ def shutdown():
 
         def terminate_service():
             import time
+            from GaiZhangYe.core.preview import shutdown_preview_service
             time.sleep(0.5)
+            shutdown_preview_service()
+            # 强制结束进程前退出COM调度线程的常驻Word实例
+            stop_com_dispatcher(timeout=10)
             try:
                 if sys.platform == 'win32':
                     os.system(f"taskkill /F /PID {os.getpid()}")
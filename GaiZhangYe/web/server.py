@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web服务启动（配置web_server）：
+- production：多线程WSGI服务器（waitress，请求线程数由web_threads配置；未安装时退回werkzeug的多线程服务器），
+  并启动COM调度器，所有Word操作在常驻的COM线程中执行，请求线程不进入COM单元，轻量接口不受后台任务影响
+- development：Flask开发服务器，Word操作在请求线程中执行
+"""
+from typing import Optional
+
+from flask import Flask
+
+from GaiZhangYe.utils.logger import get_logger
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.core.basic.com_dispatcher import start_com_dispatcher, stop_com_dispatcher
+
+logger = get_logger(__name__)
+
+# 退出时等待COM线程完成当前任务并退出Word的最长时间（秒）
+_COM_SHUTDOWN_TIMEOUT = 30
+
+
+def serve(app: Flask, host: str = "0.0.0.0", port: int = 5001, mode: Optional[str] = None,
+          threads: Optional[int] = None) -> None:
+    """
+    启动Web服务（阻塞直到服务停止）
+    :param mode: production/development，默认读取配置web_server
+    :param threads: 生产服务模式的请求处理线程数，默认读取配置web_threads
+    """
+    settings = get_settings()
+    mode = (mode or settings.web_server).lower()
+    if mode == "development":
+        logger.info(f"以开发服务器启动：http://{host}:{port}")
+        app.run(host=host, port=port, debug=False)
+        return
+    if mode != "production":
+        raise ValueError(f"不支持的Web服务方式：{mode}（可选production/development）")
+
+    start_com_dispatcher()
+    try:
+        _serve_production(app, host, port, threads or settings.web_threads)
+    finally:
+        stop_com_dispatcher(timeout=_COM_SHUTDOWN_TIMEOUT)
+
+
+def _serve_production(app: Flask, host: str, port: int, threads: int) -> None:
+    try:
+        from waitress import create_server
+    except ImportError:
+        from werkzeug.serving import make_server
+
+        logger.warning("未安装waitress，使用werkzeug多线程服务器（每个请求一个线程，不限制线程数）")
+        server = make_server(host, port, app, threaded=True)
+        logger.info(f"Web服务已启动：http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    server = create_server(app, host=host, port=port, threads=threads, ident="GaiZhangYe")
+    logger.info(f"Web服务已启动（waitress，{threads}个请求线程）：http://{host}:{port}")
+    # 收到Ctrl+C/SIGINT时waitress关闭监听并返回
+    server.run()
@@ -0,0 +1,39 @@
+// 文件夹扫描：以NDJSON流式接收扫描结果，首行为文件列表，随后每行为一个文件的页数
+// handlers.onFiles(data) 收到文件列表时调用（此时页数为null），handlers.onPageCount(event) 每得到一个页数时调用
+
+async function streamFolderScan(url, body, handlers) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(Object.assign({stream: true}, body))
+    });
+
+    // 参数错误时后端直接返回普通JSON
+    if (!(response.headers.get('Content-Type') || '').includes('ndjson')) {
+        const data = await response.json();
+        if (!data.success) throw new Error(data.error);
+        if (handlers.onFiles) handlers.onFiles(data);
+        return;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    const handleLine = line => {
+        if (!line.trim()) return;
+        const event = JSON.parse(line);
+        if (event.type === 'files' && handlers.onFiles) handlers.onFiles(event);
+        else if (event.type === 'page_count' && handlers.onPageCount) handlers.onPageCount(event);
+        else if (event.type === 'error') throw new Error(event.error);
+    };
+
+    while (true) {
+        const {done, value} = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, {stream: true});
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer + decoder.decode());
+}
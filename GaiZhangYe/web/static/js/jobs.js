@@ -0,0 +1,62 @@
+// 后台任务：提交后立即返回任务ID，通过SSE接收逐文件进度
+// 任务ID保存在localStorage中，页面刷新后调用 resumeBackgroundJob 继续显示进度与结果
+
+function watchBackgroundJob(jobId, storageKey, handlers) {
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+
+    source.addEventListener('progress', event => {
+        const data = JSON.parse(event.data);
+        if (handlers.onProgress) handlers.onProgress(data);
+    });
+
+    source.addEventListener('finished', () => {
+        source.close();
+        localStorage.removeItem(storageKey);
+        fetch(`/api/jobs/${jobId}/result`)
+            .then(response => response.json())
+            .then(data => handlers.onDone && handlers.onDone(data))
+            .catch(error => handlers.onDone && handlers.onDone({success: false, error: error.message}));
+    });
+
+    source.onerror = () => {
+        // 连接中断时浏览器会自动重连（携带Last-Event-ID）；任务已不存在时停止
+        fetch(`/api/jobs/${jobId}`).then(response => {
+            if (response.status === 404) {
+                source.close();
+                localStorage.removeItem(storageKey);
+            }
+        }).catch(() => {});
+    };
+    return source;
+}
+
+function runBackgroundJob(type, params, storageKey, handlers) {
+    return fetch('/api/jobs', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({type: type, params: params})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            if (handlers.onDone) handlers.onDone(data);
+            return null;
+        }
+        localStorage.setItem(storageKey, data.job_id);
+        return watchBackgroundJob(data.job_id, storageKey, handlers);
+    });
+}
+
+function resumeBackgroundJob(storageKey, handlers) {
+    const jobId = localStorage.getItem(storageKey);
+    if (!jobId) return false;
+    if (handlers.onResume) handlers.onResume(jobId);
+    watchBackgroundJob(jobId, storageKey, handlers);
+    return true;
+}
+
+function formatJobProgress(data) {
+    const label = data.status === 'failed' ? '失败' : '完成';
+    const detail = data.message ? `（${data.message}）` : '';
+    return `[${data.current}/${data.total}] ${data.file} ${label}${detail}`;
+}
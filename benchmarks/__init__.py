@@ -0,0 +1,4 @@
+"""
+端到端性能基准：生成合成语料，在模拟Word（或真实Word）上运行各业务服务，输出各阶段耗时/吞吐量/峰值内存（JSON）
+用法：python -m benchmarks.run --output bench.json [--baseline 上次结果.json]
+"""
@@ -0,0 +1,159 @@
+# benchmarks/corpus.py
+"""
+合成语料生成：按固定随机种子生成同一份语料，保证不同提交之间的基准结果可比
+- Word文档：页数不等的.docx（含Word保存时写入的页数统计与渲染分页标记，部分为横向页面）
+- 盖章PDF：每页一张扫描图片的多页PDF（模拟"盖章页文件.pdf"）
+- 扫描图片：300DPI A4尺寸的灰度扫描件（JPEG）
+"""
+import io
+import random
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pymupdf as fitz
+from PIL import Image, ImageDraw
+
+# A4页面尺寸（缇）
+A4_PORTRAIT = (11906, 16838)
+A4_LANDSCAPE = (16838, 11906)
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/docProps/app.xml" ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>
+</Types>"""
+
+_PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties" Target="docProps/app.xml"/>
+</Relationships>"""
+
+_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"></Relationships>"""
+
+_APP_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">
+<Application>Microsoft Office Word</Application><Pages>{pages}</Pages>
+</Properties>"""
+
+_DOCUMENT_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                  '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+                  'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><w:body>')
+
+
+@dataclass
+class Corpus:
+    """生成的语料清单"""
+    root: Path
+    word_dir: Path
+    stamp_pdf_dir: Path
+    scan_dir: Path
+    word_files: List[Path] = field(default_factory=list)
+    page_counts: Dict[str, int] = field(default_factory=dict)  # Word文件名 -> 页数
+    stamp_pdfs: List[Path] = field(default_factory=list)
+    scans: List[Path] = field(default_factory=list)
+
+    @property
+    def total_pages(self) -> int:
+        return sum(self.page_counts.values())
+
+
+def write_docx(path: Path, pages: int, page_size: Tuple[int, int] = A4_PORTRAIT, paragraphs_per_page: int = 12) -> None:
+    """
+    生成指定页数的.docx：页与页之间用显式分页符分隔，并带有Word渲染时写入的分页标记
+    :param page_size: 页面尺寸（缇），宽大于高即为横向
+    """
+    body = []
+    for page in range(1, pages + 1):
+        for index in range(paragraphs_per_page):
+            rendered = "<w:lastRenderedPageBreak/>" if page > 1 and index == 0 else ""
+            body.append(f"<w:p><w:r>{rendered}<w:t>第{page}页 第{index + 1}段：合同条款正文内容。</w:t></w:r></w:p>")
+        if page < pages:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+    width, height = page_size
+    orient = ' w:orient="landscape"' if width > height else ""
+    body.append(f'<w:sectPr><w:pgSz w:w="{width}" w:h="{height}"{orient}/>'
+                '<w:pgMar w:top="1440" w:right="1800" w:bottom="1440" w:left="1800"/></w:sectPr>')
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _PACKAGE_RELS)
+        package.writestr("word/_rels/document.xml.rels", _DOCUMENT_RELS)
+        package.writestr("docProps/app.xml", _APP_XML.format(pages=pages))
+        package.writestr("word/document.xml", _DOCUMENT_HEAD + "".join(body) + "</w:body></w:document>")
+
+
+def make_scan(seed: int, size: Tuple[int, int] = (2480, 3508)) -> Image.Image:
+    """生成一张模拟扫描件：灰色底噪 + 文本行 + 红色印章圆圈（默认300DPI A4）"""
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.effect_noise(size, 24).point(lambda v: 200 + v // 5).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    line_height = height // 60
+    for row in range(8, 50):
+        length = rng.randint(width // 3, width - width // 5)
+        top = row * line_height
+        draw.rectangle((width // 10, top, width // 10 + length, top + line_height // 3), fill=(60, 60, 60))
+    radius = width // 8
+    center = (rng.randint(width // 2, width - radius - 10), rng.randint(height // 2, height - radius - 10))
+    draw.ellipse((center[0] - radius, center[1] - radius, center[0] + radius, center[1] + radius),
+                 outline=(200, 30, 30), width=max(4, width // 150))
+    return image
+
+
+def write_stamp_pdf(path: Path, scans: List[Image.Image], jpeg_quality: int = 85) -> None:
+    """将扫描件逐页写入PDF（每页一张铺满页面的JPEG图片）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with fitz.open() as doc:
+        for scan in scans:
+            buffer = io.BytesIO()
+            scan.save(buffer, format="JPEG", quality=jpeg_quality)
+            page = doc.new_page(width=595, height=842)
+            page.insert_image(page.rect, stream=buffer.getvalue())
+        doc.save(path)
+
+
+def generate_corpus(root: Path, docs: int = 20, min_pages: int = 2, max_pages: int = 40,
+                    stamp_pdfs: int = 2, stamp_pdf_pages: int = 10, scans: int = 20,
+                    scan_size: Tuple[int, int] = (2480, 3508), landscape_every: int = 5,
+                    seed: int = 20251219) -> Corpus:
+    """
+    生成基准语料（相同参数与种子生成完全相同的语料）
+    :param docs: Word文档数量，页数在[min_pages, max_pages]内随机
+    :param stamp_pdfs: 盖章PDF数量，每个stamp_pdf_pages页
+    :param scans: 扫描图片数量
+    :param landscape_every: 每隔多少个文档生成一个横向文档（0表示不生成）
+    """
+    rng = random.Random(seed)
+    corpus = Corpus(root=root, word_dir=root / "word", stamp_pdf_dir=root / "stamp_pdf", scan_dir=root / "scans")
+    for directory in (corpus.word_dir, corpus.stamp_pdf_dir, corpus.scan_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    for index in range(1, docs + 1):
+        pages = rng.randint(min_pages, max_pages)
+        landscape = bool(landscape_every) and index % landscape_every == 0
+        word_file = corpus.word_dir / f"合同{index}.docx"
+        write_docx(word_file, pages, A4_LANDSCAPE if landscape else A4_PORTRAIT)
+        corpus.word_files.append(word_file)
+        corpus.page_counts[word_file.name] = pages
+
+    for index in range(1, scans + 1):
+        scan_file = corpus.scan_dir / f"扫描{index}.jpg"
+        make_scan(seed + index, scan_size).save(scan_file, format="JPEG", quality=90, dpi=(300, 300))
+        corpus.scans.append(scan_file)
+
+    # 盖章PDF使用较小的扫描件，控制语料生成耗时
+    pdf_scan_size = (scan_size[0] // 2, scan_size[1] // 2)
+    for index in range(1, stamp_pdfs + 1):
+        stamp_pdf = corpus.stamp_pdf_dir / f"盖章页文件{index}.pdf"
+        write_stamp_pdf(stamp_pdf, [make_scan(seed * 7 + index * 1000 + page, pdf_scan_size)
+                                    for page in range(stamp_pdf_pages)])
+        corpus.stamp_pdfs.append(stamp_pdf)
+
+    return corpus
@@ -0,0 +1,279 @@
+# benchmarks/fake_word.py
+"""
+模拟Word.Application：在没有Word的主机上实现WordProcessor用到的COM接口子集，并按近似真实的耗时模型等待
+- 通过配置 WORD_APP_FACTORY=benchmarks.fake_word:FakeWordApplication 启用（工作进程通过环境变量继承）
+- 耗时按"基础耗时 + 每页耗时"计，环境变量 FAKE_WORD_TIME_SCALE 整体缩放（1.0为真实量级）
+- 导出的PDF页数、页面尺寸与插入的图片（含旋转）与文档一致，下游PDF处理得到真实输入
+"""
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import pymupdf as fitz
+
+from GaiZhangYe.core.basic.ooxml_reader import read_docx_metadata
+
+# 未能读取页面设置时按A4纵向（磅）
+_DEFAULT_PAGE_SIZE = (595.3, 841.9)
+
+
+@dataclass
+class LatencyProfile:
+    """各COM操作的耗时（秒，缩放前），取自Windows上Word 2016/365处理普通合同文档的经验值"""
+    launch: float = 1.5            # DispatchEx启动WINWORD.exe
+    quit: float = 0.3
+    open_base: float = 0.4
+    open_per_page: float = 0.01
+    repaginate_per_page: float = 0.004  # ComputeStatistics/Repaginate
+    accept_revisions: float = 0.05
+    insert_picture: float = 0.15
+    save_base: float = 0.2
+    save_per_page: float = 0.005
+    export_base: float = 0.3
+    export_per_page: float = 0.04
+    close: float = 0.05
+
+
+def _time_scale() -> float:
+    try:
+        return float(os.environ.get("FAKE_WORD_TIME_SCALE", "1.0"))
+    except ValueError:
+        return 1.0
+
+
+class _Collection:
+    """同时支持 obj.Count 与 obj(1) 访问的COM集合"""
+
+    def __init__(self, items: list):
+        self._items = items
+
+    @property
+    def Count(self) -> int:
+        return len(self._items)
+
+    def __call__(self, index: int):
+        return self._items[index - 1]
+
+
+class FakePageSetup:
+    def __init__(self, width: float, height: float):
+        self.PageWidth = width
+        self.PageHeight = height
+        self.LeftMargin = 90.0
+        self.RightMargin = 90.0
+
+
+class FakeSection:
+    def __init__(self, width: float, height: float):
+        self.PageSetup = FakePageSetup(width, height)
+
+
+class _FakeWrapFormat:
+    def __init__(self):
+        self.Type = 7  # wdWrapInline
+
+
+class FakeShape:
+    """浮动形状：记录WordProcessor设置的属性（尺寸、旋转等），导出时用于绘制"""
+
+    def __init__(self, image_path: str, page: int):
+        self.image_path = image_path
+        self.page = page
+        self.WrapFormat = _FakeWrapFormat()
+        self.Rotation = 0
+        self.Width = 0
+        self.Height = 0
+
+    def ZOrder(self, _order) -> None:
+        pass
+
+
+class FakeInlineShape:
+    def __init__(self, doc: "FakeDocument", image_path: str, page: int):
+        self._doc = doc
+        self._shape = FakeShape(image_path, page)
+        self.Width = 400
+        self.Height = 560
+        doc.shapes.append(self._shape)
+
+    def ConvertToShape(self) -> FakeShape:
+        return self._shape
+
+
+class _FakeInlineShapes:
+    def __init__(self, doc: "FakeDocument", page: int):
+        self._doc = doc
+        self._page = page
+
+    def AddPicture(self, image_path: str) -> FakeInlineShape:
+        self._doc.app.spend(self._doc.app.profile.insert_picture)
+        if not Path(image_path).exists():
+            raise FileNotFoundError(image_path)
+        return FakeInlineShape(self._doc, image_path, self._page)
+
+
+class FakeRange:
+    def __init__(self, doc: "FakeDocument", page: int):
+        self._doc = doc
+        self.page = page
+        self.InlineShapes = _FakeInlineShapes(doc, page)
+        self.Sections = doc.Sections
+
+    def Collapse(self, *args, **kwargs) -> None:
+        pass
+
+
+class _FakeRevisions:
+    def __init__(self, doc: "FakeDocument", count: int):
+        self._doc = doc
+        self.Count = count
+
+    def AcceptAll(self) -> None:
+        self._doc.app.spend(self._doc.app.profile.accept_revisions)
+        self.Count = 0
+
+
+class _FakeComments:
+    def __init__(self, count: int):
+        self.Count = count
+
+    def DeleteAll(self) -> None:
+        self.Count = 0
+
+
+class _FakeFields:
+    def Update(self) -> None:
+        pass
+
+
+class _FakeWindow:
+    def __init__(self, doc: "FakeDocument"):
+        self.Selection = FakeRange(doc, 1)
+
+
+class FakeDocument:
+    """已打开的文档：页数与页面尺寸来自.docx元数据"""
+
+    def __init__(self, app: "FakeWordApplication", path: Path):
+        self.app = app
+        self.path = path
+        self.Name = path.name
+        self.shapes: List[FakeShape] = []
+        page_count, width, height, revisions, comments = 1, *_DEFAULT_PAGE_SIZE, 0, 0
+        if path.suffix.lower() == ".docx":
+            metadata = read_docx_metadata(path)
+            page_count = metadata.page_count or 1
+            if metadata.sections:
+                width, height = metadata.sections[-1].page_width, metadata.sections[-1].page_height
+            revisions, comments = int(metadata.has_revisions), int(metadata.has_comments)
+        self.page_count = page_count
+        self.Sections = _Collection([FakeSection(width, height)])
+        self.Revisions = _FakeRevisions(self, revisions)
+        self.Comments = _FakeComments(comments)
+        self.Fields = _FakeFields()
+        self.ActiveWindow = _FakeWindow(self)
+        self._closed = False
+
+    @property
+    def Content(self) -> FakeRange:
+        return FakeRange(self, self.page_count)
+
+    def Activate(self) -> None:
+        pass
+
+    def Repaginate(self) -> None:
+        self.app.spend(self.app.profile.repaginate_per_page * self.page_count)
+
+    def ComputeStatistics(self, statistic: int) -> int:
+        self.app.spend(self.app.profile.repaginate_per_page * self.page_count)
+        return self.page_count
+
+    def GoTo(self, What=None, Which=None, Count=None, *args) -> FakeRange:
+        page = Count if Count is not None else 1
+        return FakeRange(self, max(1, min(int(page), self.page_count)))
+
+    def SaveAs(self, file_name: str, *args, **kwargs) -> None:
+        self.app.spend(self.app.profile.save_base + self.app.profile.save_per_page * self.page_count)
+        target = Path(file_name)
+        if target.resolve() != self.path.resolve():
+            shutil.copyfile(self.path, target)
+
+    def ExportAsFixedFormat(self, OutputFileName: str, ExportFormat: int = 17, OpenAfterExport: bool = False,
+                            Range: int = 0, From: int = 1, To: Optional[int] = None, Item: int = 0,
+                            CreateBookmarks: int = 0, **kwargs) -> None:
+        """导出PDF：Range=3时仅导出From~To页（超出文档页数的部分被截断，与Word一致）"""
+        if Range == 3:
+            first, last = max(1, From), min(To or self.page_count, self.page_count)
+        else:
+            first, last = 1, self.page_count
+        pages = max(0, last - first + 1)
+        self.app.spend(self.app.profile.export_base + self.app.profile.export_per_page * pages)
+
+        page_setup = self.Sections(1).PageSetup
+        with fitz.open() as pdf:
+            for page_num in range(first, last + 1):
+                page = pdf.new_page(width=page_setup.PageWidth, height=page_setup.PageHeight)
+                page.insert_text((72, 72), f"{self.Name} - 第{page_num}页", fontsize=12)
+                for shape in self.shapes:
+                    if shape.page == page_num:
+                        # Word的Rotation为顺时针角度，PyMuPDF的rotate为逆时针
+                        page.insert_image(page.rect, filename=shape.image_path,
+                                          rotate=-int(shape.Rotation) % 360, keep_proportion=False)
+            # Word导出的PDF内容流与无损图片均经过压缩
+            pdf.save(OutputFileName, deflate=True)
+
+    def Close(self, SaveChanges=False, *args) -> None:
+        if not self._closed:
+            self._closed = True
+            self.app.spend(self.app.profile.close)
+            self.app.Documents._documents.remove(self)
+
+
+class _FakeDocuments:
+    def __init__(self, app: "FakeWordApplication"):
+        self._app = app
+        self._documents: List[FakeDocument] = []
+
+    @property
+    def Count(self) -> int:
+        return len(self._documents)
+
+    def Open(self, FileName: str = None, *args, ReadOnly: bool = False, **kwargs) -> FakeDocument:
+        path = Path(FileName)
+        if not path.exists():
+            raise FileNotFoundError(f"文件不存在：{path}")
+        doc = FakeDocument(self._app, path)
+        self._app.spend(self._app.profile.open_base + self._app.profile.open_per_page * doc.page_count)
+        self._documents.append(doc)
+        return doc
+
+
+class FakeWordApplication:
+    """模拟的Word.Application（每个实例相当于一个WINWORD.exe）"""
+
+    instances = 0
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, time_scale: Optional[float] = None):
+        self.profile = profile or LatencyProfile()
+        self.time_scale = _time_scale() if time_scale is None else time_scale
+        self.Visible = False
+        self.DisplayAlerts = 0
+        self.Documents = _FakeDocuments(self)
+        self.busy_seconds = 0.0
+        FakeWordApplication.instances += 1
+        self.spend(self.profile.launch)
+
+    def spend(self, seconds: float) -> None:
+        """按耗时模型等待（模拟Word占用的时间）"""
+        scaled = seconds * self.time_scale
+        self.busy_seconds += scaled
+        if scaled > 0:
+            time.sleep(scaled)
+
+    def Quit(self) -> None:
+        for doc in list(self.Documents._documents):
+            doc.Close()
+        self.spend(self.profile.quit)
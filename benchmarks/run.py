@@ -0,0 +1,384 @@
+# benchmarks/run.py
+"""
+端到端基准运行器
+- 生成（或复用）合成语料，每个阶段在独立的子进程中、以全新的业务目录运行，互不影响缓存与内存统计
+- 输出JSON：各阶段墙钟耗时、处理条目数、吞吐量、峰值RSS；附带语料参数、耗时缩放与提交号，便于跨提交比较
+- 指定 --baseline 时与上次结果逐阶段比较，耗时增加超过阈值的阶段记为回归（退出码1）
+
+示例：
+    python -m benchmarks.run --docs 20 --output bench.json
+    python -m benchmarks.run --stages batch_convert,stamp_overlay_word --baseline bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.corpus import Corpus, generate_corpus
+
+SCHEMA_VERSION = 1
+FAKE_WORD_FACTORY = "benchmarks.fake_word:FakeWordApplication"
+
+try:
+    import resource
+except ImportError:  # Windows无resource模块，不统计峰值RSS
+    resource = None
+
+
+def _peak_rss_mb(who) -> Optional[float]:
+    """进程（或已回收子进程）的峰值RSS（MB）；Linux下ru_maxrss单位为KB，macOS为字节"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ==================== 各阶段（在子进程中执行，返回处理条目数与附加信息） ====================
+
+def _stage_batch_convert(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.core.batch_convert import BatchConvertService
+
+    pdfs = BatchConvertService().run(corpus.word_dir, work_dir / "pdf", workers=options["workers"])
+    return {"items": len(pdfs), "unit": "docs", "pages": corpus.total_pages}
+
+
+def _stage_stamp_prepare(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.utils.config import get_settings
+    from GaiZhangYe.core.stamp_prepare import StampPrepareService
+
+    # 每个源文档一个Word工作进程（与批量转换使用同一并行度）
+    get_settings().word_workers = options["workers"] or 1
+
+    # 每个文档提取最后两页（模拟签署页），共用同一组页码选择以保证可比
+    target_pages = {Path(name).stem: sorted({max(1, pages - 1), pages})
+                    for name, pages in corpus.page_counts.items()}
+    outputs = StampPrepareService().run(target_pages, word_dir=corpus.word_dir, output_dir=work_dir / "stamped_pages")
+    extracted = sum(len(pages) for pages in target_pages.values())
+    return {"items": len(target_pages), "unit": "docs", "pages": extracted, "outputs": len(outputs)}
+
+
+def _stage_stamp_overlay(engine: str) -> Callable[[Corpus, Path, dict], dict]:
+    def stage(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+        from GaiZhangYe.core.stamp_overlay import StampOverlayService
+
+        results = StampOverlayService().run(
+            target_word_dir=corpus.word_dir,
+            image_width=options["image_width"],
+            image_files=list(corpus.scans),
+            result_word_dir=work_dir / "result_word",
+            result_pdf_dir=work_dir / "result_pdf",
+            insert_engine=engine,
+        )
+        pdf_bytes = sum(p.stat().st_size for p in (work_dir / "result_pdf").glob("*.pdf"))
+        return {"items": len(results), "unit": "docs", "output_pdf_bytes": pdf_bytes}
+    return stage
+
+
+def _setup_baseline_cache(corpus: Corpus, work_dir: Path, options: dict) -> None:
+    """预先转换全部原文档写入转换缓存（作为盖章后拼接导出的底稿），不计入阶段耗时"""
+    from GaiZhangYe.utils.config import get_settings
+    from GaiZhangYe.core.basic.word_processor import WordProcessor
+
+    get_settings().conversion_cache_enabled = True
+    processor = WordProcessor()
+    try:
+        for word_file in corpus.word_files:
+            processor.word_to_pdf(word_file, work_dir / "baseline" / f"{word_file.stem}.pdf")
+    finally:
+        processor.close()
+
+
+def _stage_pdf_page_count(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+
+    processor = PdfProcessor()
+    pages = 0
+    for _ in range(options["repeat_small"]):
+        pages = sum(processor.get_page_count(pdf) for pdf in corpus.stamp_pdfs)
+    return {"items": len(corpus.stamp_pdfs) * options["repeat_small"], "unit": "files", "pages": pages}
+
+
+def _stage_pdf_page_count_batch(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+
+    pdfs = corpus.stamp_pdfs * options["repeat_small"]
+    results = list(PdfProcessor().get_page_counts(pdfs, workers=options["workers"]))
+    return {"items": len(results), "unit": "files", "pages": sum(r.value for r in results if r.ok)}
+
+
+def _stage_pdf_extract_pages(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+
+    processor = PdfProcessor()
+    extracted = 0
+    for pdf in corpus.stamp_pdfs:
+        pages = list(range(1, processor.get_page_count(pdf) + 1))
+        for page in pages:
+            processor.extract_pages(pdf, [page], work_dir / f"{pdf.stem}_{page}.pdf")
+        extracted += len(pages)
+    return {"items": extracted, "unit": "pages"}
+
+
+def _stage_pdf_extract_images(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+
+    processor = PdfProcessor()
+    images = []
+    for pdf in corpus.stamp_pdfs:
+        images.extend(processor.extract_images(pdf, work_dir / "images"))
+    return {"items": len(images), "unit": "images",
+            "output_bytes": sum(p.stat().st_size for p in images if p.exists())}
+
+
+def _stage_image_resize(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.core.basic.image_processor import ImageProcessor
+
+    processor = ImageProcessor()
+    for scan in corpus.scans:
+        processor.resize_image(scan, work_dir / f"scaled_{scan.name}", target_width=options["image_width"])
+    return {"items": len(corpus.scans), "unit": "images"}
+
+
+def _stage_scan_cleanup(corpus: Corpus, work_dir: Path, options: dict) -> dict:
+    from GaiZhangYe.core.basic.image_processor import ImageProcessor
+
+    jobs = [(scan, work_dir / f"cleaned_{scan.name}") for scan in corpus.scans]
+    results = ImageProcessor().clean_scans(jobs, target_width=options["image_width"], workers=options["workers"])
+    return {"items": len(results), "unit": "images", "failed": sum(not r.ok for r in results),
+            "output_bytes": sum(r.output.stat().st_size for r in results if r.ok)}
+
+
+STAGES: Dict[str, Callable[[Corpus, Path, dict], dict]] = {
+    "batch_convert": _stage_batch_convert,
+    "stamp_prepare": _stage_stamp_prepare,
+    "stamp_overlay_word": _stage_stamp_overlay("word"),
+    "stamp_overlay_ooxml": _stage_stamp_overlay("ooxml"),
+    "stamp_overlay_pdf": _stage_stamp_overlay("pdf"),
+    "stamp_overlay_word_spliced": _stage_stamp_overlay("word"),
+    "pdf_page_count": _stage_pdf_page_count,
+    "pdf_page_count_batch": _stage_pdf_page_count_batch,
+    "pdf_extract_pages": _stage_pdf_extract_pages,
+    "pdf_extract_images": _stage_pdf_extract_images,
+    "image_resize": _stage_image_resize,
+    "scan_cleanup": _stage_scan_cleanup,
+}
+
+
+# 阶段的准备步骤（在计时开始前执行）
+SETUPS: Dict[str, Callable[[Corpus, Path, dict], None]] = {
+    "stamp_overlay_word_spliced": _setup_baseline_cache,
+}
+
+
+def _stage_main(name: str, corpus: Corpus, work_dir: Path, options: dict, result_queue) -> None:
+    """子进程入口：以全新的业务目录初始化单例后运行阶段"""
+    try:
+        from GaiZhangYe.core.basic.file_manager import get_file_manager
+
+        get_file_manager(root_dir=work_dir / "business_data")
+        if name in SETUPS:
+            SETUPS[name](corpus, work_dir, options)
+        start = time.perf_counter()
+        info = STAGES[name](corpus, work_dir, options)
+        wall = time.perf_counter() - start
+        result = {"wall_s": round(wall, 4), **info}
+        if info.get("items") and wall > 0:
+            result["throughput"] = round(info["items"] / wall, 3)
+        if info.get("pages") and wall > 0:
+            result["pages_per_s"] = round(info["pages"] / wall, 3)
+        result["peak_rss_mb"] = _peak_rss_mb(resource.RUSAGE_SELF) if resource else None
+        result["children_peak_rss_mb"] = _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None
+        result_queue.put(result)
+    except Exception as e:
+        result_queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_stage(name: str, corpus: Corpus, work_root: Path, options: dict) -> dict:
+    """在spawn子进程中运行单个阶段（子进程非守护进程，阶段内部可再启动Word工作进程）"""
+    work_dir = work_root / name
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True)
+    ctx = multiprocessing.get_context("spawn")
+    result_queue = ctx.Queue()
+    process = ctx.Process(target=_stage_main, args=(name, corpus, work_dir, options, result_queue))
+    process.start()
+    try:
+        result = result_queue.get(timeout=options["stage_timeout"])
+    except Exception:
+        result = {"error": f"阶段超时（>{options['stage_timeout']}秒）"}
+        process.terminate()
+    process.join()
+    return {"name": name, **result}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[dict]:
+    """逐阶段比较耗时：返回每个阶段的变化比例，超过阈值的记为回归（仅比较语料参数一致的结果）"""
+    base_stages = {s["name"]: s for s in baseline.get("stages", [])}
+    rows = []
+    for stage in current["stages"]:
+        base = base_stages.get(stage["name"])
+        if not base or "wall_s" not in base or "wall_s" not in stage or not base["wall_s"]:
+            continue
+        change = stage["wall_s"] / base["wall_s"] - 1
+        rows.append({"name": stage["name"], "baseline_s": base["wall_s"], "current_s": stage["wall_s"],
+                     "change": round(change, 4), "regression": change > threshold})
+    return rows
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="GaiZhangYe端到端性能基准")
+    parser.add_argument("--stages", default=",".join(STAGES), help="要运行的阶段（逗号分隔）")
+    parser.add_argument("--docs", type=int, default=20, help="Word文档数量")
+    parser.add_argument("--min-pages", type=int, default=2)
+    parser.add_argument("--max-pages", type=int, default=40)
+    parser.add_argument("--stamp-pdfs", type=int, default=2, help="盖章PDF数量")
+    parser.add_argument("--stamp-pdf-pages", type=int, default=10, help="每个盖章PDF的页数")
+    parser.add_argument("--scans", type=int, default=20, help="扫描图片数量")
+    parser.add_argument("--seed", type=int, default=20251219)
+    parser.add_argument("--workers", type=int, default=1, help="批量转换的Word工作进程数")
+    parser.add_argument("--image-width", type=int, default=800, help="盖章图片缩放宽度")
+    parser.add_argument("--repeat-small", type=int, default=50, help="快速阶段（如PDF页数统计）的重复次数")
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="模拟Word耗时缩放（1.0为真实量级；比较结果时需保持一致）")
+    parser.add_argument("--real-word", action="store_true", help="使用真实Word（仅Windows），不使用模拟后端")
+    parser.add_argument("--with-cache", action="store_true", help="启用Word→PDF转换缓存（默认关闭以测量冷启动）")
+    parser.add_argument("--corpus-dir", type=Path, help="语料目录（默认临时目录；已存在同参数语料时复用）")
+    parser.add_argument("--work-dir", type=Path, help="输出工作目录（默认临时目录，结束后删除）")
+    parser.add_argument("--stage-timeout", type=float, default=1800)
+    parser.add_argument("--output", type=Path, help="结果JSON路径（默认输出到标准输出）")
+    parser.add_argument("--baseline", type=Path, help="用于比较的上次结果JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="判定回归的耗时增幅（默认15%%）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"未知阶段：{unknown}，可选：{list(STAGES)}", file=sys.stderr)
+        return 2
+
+    temp_dirs = []
+    work_root = args.work_dir
+    if work_root is None:
+        work_root = Path(tempfile.mkdtemp(prefix="gzy-bench-"))
+        temp_dirs.append(work_root)
+    corpus_dir = args.corpus_dir or work_root / "corpus"
+
+    # 配置在子进程导入GaiZhangYe时从环境变量加载（Word工作进程同样继承）
+    os.environ["LOG_LEVEL"] = "WARNING"
+    os.environ["LOG_DIR"] = str(work_root / "logs")
+    os.environ["CONVERSION_CACHE_ENABLED"] = "true" if args.with_cache else "false"
+    os.environ["FAKE_WORD_TIME_SCALE"] = str(args.time_scale)
+    if not args.real_word:
+        os.environ["WORD_APP_FACTORY"] = FAKE_WORD_FACTORY
+
+    corpus_params = {
+        "docs": args.docs, "min_pages": args.min_pages, "max_pages": args.max_pages,
+        "stamp_pdfs": args.stamp_pdfs, "stamp_pdf_pages": args.stamp_pdf_pages, "scans": args.scans,
+        "seed": args.seed,
+    }
+    try:
+        start = time.perf_counter()
+        corpus = _load_or_generate_corpus(corpus_dir, corpus_params)
+        corpus_seconds = time.perf_counter() - start
+        print(f"语料就绪：{len(corpus.word_files)}个文档（共{corpus.total_pages}页），"
+              f"{len(corpus.stamp_pdfs)}个盖章PDF，{len(corpus.scans)}张扫描图片（{corpus_seconds:.1f}秒）", file=sys.stderr)
+
+        options = {"workers": args.workers, "image_width": args.image_width, "repeat_small": args.repeat_small,
+                   "stage_timeout": args.stage_timeout}
+        results = []
+        for name in stages:
+            result = run_stage(name, corpus, work_root, options)
+            results.append(result)
+            summary = result.get("error") or f"{result['wall_s']:.3f}秒，{result.get('throughput', 0)} {result.get('unit', '')}/秒"
+            print(f"[{name}] {summary}", file=sys.stderr)
+
+        report = {
+            "schema": SCHEMA_VERSION,
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "word" if args.real_word else "fake",
+            "time_scale": None if args.real_word else args.time_scale,
+            "conversion_cache": args.with_cache,
+            "corpus": {**corpus_params, "total_pages": corpus.total_pages},
+            "options": {k: v for k, v in options.items() if k != "stage_timeout"},
+            "stages": results,
+        }
+
+        exit_code = 0
+        if args.baseline:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+            if any(baseline.get(key) != report[key] for key in ("corpus", "options", "time_scale", "backend")):
+                print("警告：基线的语料参数、运行选项或Word后端与本次不同，比较结果仅供参考", file=sys.stderr)
+            report["comparison"] = compare(report, baseline, args.threshold)
+            for row in report["comparison"]:
+                flag = "  回归" if row["regression"] else ""
+                print(f"  {row['name']}: {row['baseline_s']:.3f}s → {row['current_s']:.3f}s "
+                      f"({row['change']:+.1%}){flag}", file=sys.stderr)
+            if any(row["regression"] for row in report["comparison"]):
+                exit_code = 1
+        if any("error" in r for r in results):
+            exit_code = 1
+
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            args.output.write_text(text, encoding="utf-8")
+        else:
+            print(text)
+        return exit_code
+    finally:
+        for temp_dir in temp_dirs:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _load_or_generate_corpus(corpus_dir: Path, params: dict) -> Corpus:
+    """语料目录中记录的生成参数与本次一致时直接复用，否则重新生成"""
+    params_file = corpus_dir / "corpus.json"
+    if params_file.exists():
+        try:
+            saved = json.loads(params_file.read_text(encoding="utf-8"))
+            if saved.get("params") == params:
+                corpus = Corpus(root=corpus_dir, word_dir=corpus_dir / "word",
+                                stamp_pdf_dir=corpus_dir / "stamp_pdf", scan_dir=corpus_dir / "scans",
+                                page_counts=saved["page_counts"])
+                corpus.word_files = [corpus.word_dir / name for name in saved["page_counts"]]
+                corpus.stamp_pdfs = [corpus.stamp_pdf_dir / name for name in saved["stamp_pdfs"]]
+                corpus.scans = [corpus.scan_dir / name for name in saved["scans"]]
+                if all(p.exists() for p in corpus.word_files + corpus.stamp_pdfs + corpus.scans):
+                    return corpus
+        except (ValueError, KeyError):
+            pass
+
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    corpus = generate_corpus(corpus_dir, **params)
+    params_file.write_text(json.dumps({
+        "params": params,
+        "page_counts": corpus.page_counts,
+        "stamp_pdfs": [p.name for p in corpus.stamp_pdfs],
+        "scans": [p.name for p in corpus.scans],
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    return corpus
+
+
+if __name__ == "__main__":
+    sys.exit(main())
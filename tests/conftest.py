@@ -0,0 +1,41 @@
+# tests/conftest.py
+"""
+公共夹具：
+- 每个测试使用临时的业务目录与缓存，不读写仓库中的business_data
+- fake_word：启用benchmarks中的模拟Word（不等待），Linux下即可验证Word相关流程
+- corpus：基准语料生成器生成的小规模语料（整个测试会话共用）
+"""
+import pytest
+
+from benchmarks.corpus import Corpus, generate_corpus
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.core.basic import artifact_store, file_manager, page_count_cache
+
+FAKE_WORD_FACTORY = "benchmarks.fake_word:FakeWordApplication"
+
+
+@pytest.fixture(autouse=True)
+def business_data(tmp_path, monkeypatch):
+    """临时业务目录；关闭转换缓存（工作进程通过环境变量继承）"""
+    root = tmp_path / "business_data"
+    monkeypatch.setattr(file_manager, "_file_manager", file_manager.FileManager(root_dir=root))
+    monkeypatch.setattr(artifact_store, "_stores", {})
+    monkeypatch.setattr(page_count_cache, "_page_count_cache", None)
+    monkeypatch.setenv("CONVERSION_CACHE_ENABLED", "false")
+    monkeypatch.setattr(get_settings(), "conversion_cache_enabled", False)
+    return root
+
+
+@pytest.fixture
+def fake_word(monkeypatch):
+    """使用模拟Word.Application（耗时缩放为0）"""
+    monkeypatch.setenv("WORD_APP_FACTORY", FAKE_WORD_FACTORY)
+    monkeypatch.setenv("FAKE_WORD_TIME_SCALE", "0")
+    monkeypatch.setattr(get_settings(), "word_app_factory", FAKE_WORD_FACTORY)
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory) -> Corpus:
+    """4个Word文档（第4个为横向）、1个3页的盖章PDF、4张扫描图片"""
+    return generate_corpus(tmp_path_factory.mktemp("corpus"), docs=4, min_pages=2, max_pages=6,
+                           stamp_pdfs=1, stamp_pdf_pages=3, scans=4, scan_size=(600, 848), landscape_every=4)
@@ -0,0 +1,117 @@
+"""ConfigStore：行拆分、版本号、事务回滚与损坏行"""
+import sqlite3
+import threading
+
+import pytest
+
+from GaiZhangYe.core.basic.config_store import ConfigStore
+
+CONFIG = {
+    "stamp_mode": "overlay",
+    "config": {
+        "合同10.docx": {"images": ["a.png"], "pages": [10]},
+        "合同2.docx": {"images": ["b.png"], "pages": [2]},
+    },
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ConfigStore(tmp_path / "config.sqlite3", split_fields={"func2": ("config",)})
+
+
+def test_round_trip_keeps_order(store):
+    store.replace("func2", CONFIG)
+    data = store.get("func2")
+    assert data == CONFIG
+    assert list(data) == list(CONFIG)
+    assert list(data["config"]) == list(CONFIG["config"])
+
+
+def test_get_returns_copy(store):
+    store.replace("func2", CONFIG)
+    store.get("func2")["config"].clear()
+    assert store.get("func2") == CONFIG
+
+
+def test_version_bumps_only_on_change(store):
+    assert store.version("func2") == 0
+    assert store.replace("func2", CONFIG) == 1
+    assert store.replace("func2", CONFIG) == 1
+    assert store.patch("func2", "stamp_mode", "overlay") == 1
+    assert store.patch("func2", "stamp_mode", "insert") == 2
+
+
+def test_split_field_rows(store):
+    store.replace("func2", CONFIG)
+    with sqlite3.connect(str(store.db_path)) as conn:
+        rows = conn.execute("SELECT section, key FROM records WHERE document = 'func2'").fetchall()
+    assert set(rows) == {("", "stamp_mode"), ("", "config"), ("config", "合同10.docx"), ("config", "合同2.docx")}
+
+
+def test_empty_split_field_survives(store):
+    store.replace("func2", {"config": {}})
+    assert store.get("func2") == {"config": {}}
+
+
+def test_patch_entry_and_delete(store):
+    store.replace("func2", CONFIG)
+    store.patch("func2", "合同3.docx", {"images": [], "pages": []}, field="config")
+    store.patch("func2", "合同10.docx", None, field="config")
+    config = store.get("func2")["config"]
+    assert list(config) == ["合同2.docx", "合同3.docx"]
+    assert config["合同2.docx"] == CONFIG["config"]["合同2.docx"]
+
+
+def test_patch_non_dict_field_raises(store):
+    store.replace("func2", {"config": {}, "stamp_mode": "overlay"})
+    with pytest.raises(ValueError):
+        store.patch("func2", "x", 1, field="stamp_mode")
+    assert store.version("func2") == 1
+
+
+def test_edit_rolls_back_on_error(store):
+    store.replace("func1", {"target_pages": {"a.docx": [1]}})
+    store.replace("func2", CONFIG)
+    with pytest.raises(RuntimeError):
+        with store.edit("func1", "func2") as (func1, func2):
+            func1["target_pages"]["b.docx"] = [2]
+            func2["config"].clear()
+            raise RuntimeError("中途失败")
+    assert store.get("func1") == {"target_pages": {"a.docx": [1]}}
+    assert store.get("func2") == CONFIG
+    assert store.version("func1") == store.version("func2") == 1
+
+
+def test_other_instance_sees_changes(store, tmp_path):
+    other = ConfigStore(store.db_path, split_fields=store.split_fields)
+    store.replace("func2", CONFIG)
+    assert other.get("func2") == CONFIG
+    other.patch("func2", "stamp_mode", "insert")
+    assert store.get_with_version("func2") == ({**CONFIG, "stamp_mode": "insert"}, 2)
+
+
+def test_corrupted_row_skipped(store):
+    store.replace("func2", CONFIG)
+    with sqlite3.connect(str(store.db_path)) as conn:
+        conn.execute("UPDATE records SET value = '{broken' WHERE section = 'config' AND key = '合同2.docx'")
+    fresh = ConfigStore(store.db_path, split_fields=store.split_fields)
+    data = fresh.get("func2")
+    assert data["stamp_mode"] == "overlay"
+    assert data["config"] == {"合同10.docx": CONFIG["config"]["合同10.docx"]}
+
+
+def test_concurrent_patches(store):
+    store.replace("func2", {"config": {}})
+
+    def worker(index: int) -> None:
+        for n in range(5):
+            store.patch("func2", f"{index}-{n}.docx", {"pages": [n]}, field="config")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get("func2")["config"]) == 20
+    assert store.version("func2") == 21
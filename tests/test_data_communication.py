@@ -0,0 +1,55 @@
+"""功能2自动匹配：只更新匹配到的目标文件的配置"""
+import pymupdf as fitz
+import pytest
+
+from benchmarks.corpus import write_docx
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+from GaiZhangYe.core.data_communication import FUNC2_DOCUMENT, DataCommunicationService
+
+CUSTOM_ENTRY = [{"image": "手工.png", "position": 3}]
+
+
+@pytest.fixture
+def service(business_data, corpus, monkeypatch):
+    """目标文件合同1~3.docx与旧合同.doc；盖章PDF的3页依次作为合同1第2页、合同2第1页、旧合同第1页的候选页"""
+    monkeypatch.setattr(get_settings(), "stamp_match_min_confidence", 0.0)
+    service = DataCommunicationService()
+    target_dir = service.file_manager.get_func2_dir("target_files")
+    for index in (1, 2, 3):
+        write_docx(target_dir / f"合同{index}.docx", 3)
+    (target_dir / "旧合同.doc").write_bytes(b"\xd0\xcf\x11\xe0")
+
+    nostamped_dir = service.file_manager.get_func1_dir("nostamped_pdf")
+    with fitz.open(corpus.stamp_pdfs[0]) as source:
+        for page_index, name in enumerate(["合同1_第2页.pdf", "合同2_第1页.pdf", "旧合同_第1页.pdf"]):
+            with fitz.open() as page_pdf:
+                page_pdf.insert_pdf(source, from_page=page_index, to_page=page_index)
+                page_pdf.save(nostamped_dir / name)
+    PdfProcessor().extract_images(corpus.stamp_pdfs[0], service.file_manager.get_func2_dir("images"))
+
+    service.store.replace(FUNC2_DOCUMENT, {
+        "target_files": ["合同1.docx", "合同2.docx", "合同3.docx"],
+        "images": ["手工.png"],
+        "config": {
+            "合同1.docx": {"total_pages": 3, "images": ["手工.png"], "positions": [{"page": 3, "x": 100, "y": 100}]},
+            "合同3.docx": CUSTOM_ENTRY,
+        },
+    })
+    return service
+
+
+def test_auto_match_updates_only_matched_files(service):
+    result = service.auto_match_func2()
+    data = service.get_func2_data()
+
+    assert data["config"]["合同3.docx"] == CUSTOM_ENTRY
+    assert list(data["config"]) == ["合同1.docx", "合同2.docx", "合同3.docx"]
+    assert [(item["image"], item["position"]) for item in data["config"]["合同1.docx"]] == [("盖章页文件1_1.jpeg", 2)]
+    assert [(item["image"], item["position"]) for item in data["config"]["合同2.docx"]] == [("盖章页文件1_2.jpeg", 1)]
+    assert set(result["config"]) == {"合同1.docx", "合同2.docx"}
+    assert result["unmatched_images"] == ["盖章页文件1_3.jpeg"]
+    # 目标文件与图片列表由目录刷新维护，自动匹配不改写
+    assert data["target_files"] == ["合同1.docx", "合同2.docx", "合同3.docx"]
+    assert data["images"] == ["手工.png"]
+    assert data["auto_match"]["matched"] == 2
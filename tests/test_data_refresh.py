@@ -0,0 +1,124 @@
+"""业务目录增量刷新：未变化文件的页码选择与图片配置保留，新增/删除/修改的文件按变化更新"""
+import time
+
+import pytest
+
+from benchmarks.corpus import write_docx
+from GaiZhangYe.core.data_communication import (BusinessDataWatcher, DataCommunicationService, _remove_images,
+                                                _resize_func1_entry, _resize_func2_entry)
+
+
+@pytest.fixture
+def service(business_data, fake_word):
+    return DataCommunicationService()
+
+
+def _write_images(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / name).write_bytes(name.encode("utf-8"))
+
+
+def test_refresh_func1_keeps_user_pages(service):
+    word_dir = service.file_manager.get_func1_dir("nostamped_word")
+    for name, pages in (("a", 3), ("b", 4), ("c", 2)):
+        write_docx(word_dir / f"{name}.docx", pages)
+    service.refresh_func1()
+    service.patch_func1_entry("a", {"pages": [1, 3], "total_pages": 3})
+    service.patch_func1_entry("b", {"pages": [2, 4], "total_pages": 4})
+
+    write_docx(word_dir / "d.docx", 5)
+    (word_dir / "c.docx").unlink()
+    write_docx(word_dir / "b.docx", 3)
+    deltas = service.refresh_business_data()
+
+    assert deltas["func1"]["word_files"] == {"added": ["d.docx"], "removed": ["c.docx"], "modified": ["b.docx"]}
+    assert service.get_func1_data() == {
+        "a": {"pages": [1, 3], "total_pages": 3},
+        "b": {"pages": [2], "total_pages": 3},
+        "d": {"pages": [], "total_pages": 5},
+    }
+
+    # 目录未变化时不写入数据
+    _, version = service.get_data_with_version("func1")
+    assert service.refresh_business_data()["func1"]["word_files"] == {"added": [], "removed": [], "modified": []}
+    assert service.get_data_with_version("func1")[1] == version
+
+
+def test_refresh_func2_keeps_user_config(service):
+    target_dir = service.file_manager.get_func2_dir("target_files")
+    image_dir = service.file_manager.get_func2_dir("images")
+    for index, pages in ((1, 3), (2, 4), (3, 2)):
+        write_docx(target_dir / f"合同{index}.docx", pages)
+    _write_images(image_dir, ["1.png", "2.png", "3.png", "4.png"])
+    service.refresh_func2()
+    assert service.get_func2_data()["config"]["合同3.docx"]["images"] == ["3.png"]
+    user_entry = [{"image": "1.png", "position": 2}, {"image": "3.png", "position": 1}]
+    service.patch_func2_config("合同1.docx", user_entry)
+
+    (image_dir / "3.png").unlink()
+    _write_images(image_dir, ["5.png"])
+    write_docx(target_dir / "合同4.docx", 2)
+    (target_dir / "合同3.docx").unlink()
+    write_docx(target_dir / "合同2.docx", 6)
+    deltas = service.refresh_business_data()["func2"]
+
+    assert deltas["target_files"] == {"added": ["合同4.docx"], "removed": ["合同3.docx"], "modified": ["合同2.docx"]}
+    assert deltas["images"] == {"added": ["5.png"], "removed": ["3.png"], "modified": []}
+    data = service.get_func2_data()
+    assert data["target_files"] == ["合同1.docx", "合同2.docx", "合同4.docx"]
+    assert data["images"] == ["1.png", "2.png", "4.png", "5.png"]
+    assert data["config"] == {
+        # 用户配置只去掉已删除的图片
+        "合同1.docx": [{"image": "1.png", "position": 2}],
+        # 默认插在原最后一页的图片跟随新的最后一页
+        "合同2.docx": {"total_pages": 6, "images": ["2.png"], "positions": [{"page": 6, "x": 100, "y": 100}]},
+        # 新增文件分配尚未使用的图片
+        "合同4.docx": {"total_pages": 2, "images": ["4.png"], "positions": [{"page": 2, "x": 100, "y": 100}]},
+    }
+
+
+def test_watcher_applies_changes(service):
+    word_dir = service.file_manager.get_func1_dir("nostamped_word")
+    write_docx(word_dir / "a.docx", 2)
+    service.refresh_func1()
+    service.patch_func1_entry("a", {"pages": [2], "total_pages": 2})
+
+    watcher = BusinessDataWatcher(service, 0.05)
+    watcher.start()
+    try:
+        write_docx(word_dir / "b.docx", 3)
+        deadline = time.monotonic() + 10
+        while "b" not in service.get_func1_data() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop()
+    assert service.get_func1_data() == {"a": {"pages": [2], "total_pages": 2}, "b": {"pages": [], "total_pages": 3}}
+
+
+@pytest.mark.parametrize("entry, total_pages, expected", [
+    ({"pages": [1, 4, 5], "total_pages": 5}, 4, {"pages": [1, 4], "total_pages": 4}),
+    ([1, 3, "all"], 2, [1, "all"]),
+    ({"pages": [3], "total_pages": 3}, 0, {"pages": [3], "total_pages": 3}),
+])
+def test_resize_func1_entry(entry, total_pages, expected):
+    assert _resize_func1_entry(entry, total_pages) == expected
+
+
+@pytest.mark.parametrize("entry, old_pages, total_pages, expected", [
+    ({"total_pages": 4, "images": ["a", "b"], "positions": [{"page": 4}, {"page": 2}]}, 4, 6,
+     {"total_pages": 6, "images": ["a", "b"], "positions": [{"page": 6}, {"page": 2}]}),
+    ([{"image": "a", "position": 5}, {"image": "b", "position": 1}], 6, 3,
+     [{"image": "a", "position": 3}, {"image": "b", "position": 1}]),
+    ([{"image": "a", "position": 2}], None, 3, [{"image": "a", "position": 2}]),
+])
+def test_resize_func2_entry(entry, old_pages, total_pages, expected):
+    assert _resize_func2_entry(entry, old_pages, total_pages) == expected
+
+
+def test_remove_images():
+    entry = {"images": ["a", "b", "c"], "positions": [{"page": 1}, {"page": 2}, {"page": 3}]}
+    assert _remove_images(entry, {"b"}) == {"images": ["a", "c"], "positions": [{"page": 1}, {"page": 3}]}
+    assert _remove_images([{"image": "a", "position": 1}, {"image": "b", "position": 2}], {"a"}) == [
+        {"image": "b", "position": 2}]
+    assert _remove_images("-1", {"a"}) == "-1"
@@ -0,0 +1,103 @@
+"""后台任务：快照与事件日志、重启后恢复、旧格式记录迁移"""
+import json
+import threading
+import time
+
+from GaiZhangYe.core.models.progress import report_progress
+from GaiZhangYe.web.jobs import JOB_FAILED, JOB_SUCCEEDED, JobManager
+
+
+def _wait_finished(manager, job_id):
+    after = 0
+    while True:
+        events, finished = manager.wait_events(job_id, after, timeout=10)
+        after += len(events)
+        if finished:
+            return manager.get(job_id)
+
+
+def _read_snapshot(path, status):
+    """结束通知先于快照写入（写盘在条件变量之外），等待快照更新"""
+    deadline = time.monotonic() + 10
+    while True:
+        snapshot = json.loads(path.read_text(encoding="utf-8"))
+        if snapshot["status"] == status or time.monotonic() > deadline:
+            return snapshot
+        time.sleep(0.01)
+
+
+def _read_log(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_events_appended_to_log(tmp_path):
+    manager = JobManager(tmp_path)
+
+    def runner(progress):
+        for i in range(1, 51):
+            report_progress(progress, f"{i}.docx", "failed" if i % 10 == 0 else "done", i, 50)
+        return {"count": 50}
+
+    job = _wait_finished(manager, manager.submit("word-to-pdf", {}, runner).id)
+    assert job.status == JOB_SUCCEEDED
+    assert (job.total, job.completed, job.failed) == (50, 50, 5)
+
+    snapshot = _read_snapshot(tmp_path / f"{job.id}.json", JOB_SUCCEEDED)
+    assert "events" not in snapshot
+    assert snapshot["status"] == JOB_SUCCEEDED and snapshot["result"] == {"count": 50}
+    events = _read_log(tmp_path / f"{job.id}.events.jsonl")
+    assert events == job.events
+    assert [e["seq"] for e in events] == list(range(1, 53))
+
+
+def test_interrupted_job_restored_from_log(tmp_path):
+    manager = JobManager(tmp_path)
+    release = threading.Event()
+    reported = threading.Event()
+
+    def runner(progress):
+        report_progress(progress, "a.docx", "done", 1, 3)
+        report_progress(progress, "b.docx", "failed", 2, 3, "转换失败")
+        reported.set()
+        release.wait(10)
+        return {}
+
+    job_id = manager.submit("word-to-pdf", {}, runner).id
+    assert reported.wait(10)
+    try:
+        # 模拟服务在任务执行中退出：新的管理器从快照（running）与事件日志恢复
+        restored = JobManager(tmp_path).get(job_id)
+    finally:
+        release.set()
+    assert restored.status == JOB_FAILED and restored.error == "服务重启，任务已中断"
+    assert (restored.total, restored.completed, restored.failed) == (3, 2, 1)
+    assert restored.files["b.docx"]["message"] == "转换失败"
+    assert [e["type"] for e in restored.events] == ["status", "progress", "progress", "finished"]
+
+
+def test_truncated_log_and_legacy_record(tmp_path):
+    legacy = {"id": "legacy", "kind": "word-to-pdf", "params": {}, "status": JOB_SUCCEEDED,
+              "events": [{"seq": 1, "type": "status", "time": 0, "status": "running"}]}
+    (tmp_path / "legacy.json").write_text(json.dumps(legacy), encoding="utf-8")
+    (tmp_path / "broken.json").write_text(json.dumps({"id": "broken", "kind": "x", "params": {}, "status": "running"}),
+                                          encoding="utf-8")
+    (tmp_path / "broken.events.jsonl").write_text('{"seq": 1, "type": "status", "time": 0, "status": "running"}\n'
+                                                  '{"seq": 2, "type": "prog', encoding="utf-8")
+
+    manager = JobManager(tmp_path)
+    assert manager.get("legacy").events == legacy["events"]
+    assert "events" not in json.loads((tmp_path / "legacy.json").read_text(encoding="utf-8"))
+    assert _read_log(tmp_path / "legacy.events.jsonl") == legacy["events"]
+
+    broken = manager.get("broken")
+    assert [e["seq"] for e in broken.events] == [1, 2]
+    assert _read_log(tmp_path / "broken.events.jsonl") == broken.events
+
+
+def test_prune_removes_both_files(tmp_path):
+    manager = JobManager(tmp_path, max_records=2)
+    ids = [_wait_finished(manager, manager.submit("k", {}, lambda progress: {}).id).id for _ in range(3)]
+    assert manager.get(ids[0]) is None
+    assert not (tmp_path / f"{ids[0]}.json").exists()
+    assert not (tmp_path / f"{ids[0]}.events.jsonl").exists()
+    assert (tmp_path / f"{ids[2]}.events.jsonl").exists()
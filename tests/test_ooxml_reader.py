@@ -0,0 +1,64 @@
+""".docx元数据：页面尺寸的长度写法、解析失败时回退为通过Word计算页数"""
+import zipfile
+
+import pytest
+
+from benchmarks.corpus import write_docx
+from GaiZhangYe.core.basic.ooxml_reader import parse_twips_measure, read_docx_metadata
+from GaiZhangYe.core.basic.word_processor import WordProcessor
+from GaiZhangYe.core.models.exceptions import WordProcessError
+
+
+def _rewrite(path, replacements):
+    """替换压缩包中各部件的文本"""
+    with zipfile.ZipFile(path) as package:
+        parts = {name: package.read(name).decode("utf-8") for name in package.namelist()}
+    for old, new in replacements:
+        parts = {name: text.replace(old, new) for name, text in parts.items()}
+    with zipfile.ZipFile(path, "w") as package:
+        for name, text in parts.items():
+            package.writestr(name, text)
+
+
+@pytest.mark.parametrize("value, twips", [
+    ("11906", 11906), ("11906.5", 11906.5), ("210mm", 11905.5), ("21cm", 11905.5),
+    ("8.5in", 12240), ("595.3pt", 11906), ("49.6pc", 11904), (None, 16838),
+])
+def test_parse_twips_measure(value, twips):
+    assert parse_twips_measure(value, 16838) == pytest.approx(twips, abs=0.1)
+
+
+@pytest.mark.parametrize("value", ["", "abc", "-100", "12px", "1e3"])
+def test_parse_twips_measure_invalid(value):
+    with pytest.raises(ValueError):
+        parse_twips_measure(value, 11906)
+
+
+def test_page_size_with_units(tmp_path):
+    path = tmp_path / "mm.docx"
+    write_docx(path, 3)
+    _rewrite(path, [('w:w="11906" w:h="16838"', 'w:w="297mm" w:h="210mm"')])
+    section = read_docx_metadata(path).sections[-1]
+    assert section.landscape
+    assert (section.page_width, section.page_height) == pytest.approx((841.9, 595.3), abs=0.1)
+
+
+def test_invalid_page_size_raises_word_error(tmp_path):
+    path = tmp_path / "bad.docx"
+    write_docx(path, 2)
+    _rewrite(path, [('w:w="11906"', 'w:w="A4"')])
+    with pytest.raises(WordProcessError):
+        read_docx_metadata(path)
+
+
+def test_page_count_falls_back_to_word(fake_word, tmp_path):
+    # 统计信息由其他程序生成（不可信），需要通过Word计算页数
+    path = tmp_path / "untrusted.docx"
+    write_docx(path, 4)
+    _rewrite(path, [("Microsoft Office Word", "python-docx"), ('w:w="11906"', 'w:w="210mm"')])
+    assert not read_docx_metadata(path).confident
+    processor = WordProcessor()
+    try:
+        assert processor.get_word_page_count(path) == 4
+    finally:
+        processor.close()
@@ -0,0 +1,101 @@
+"""OOXML盖章：页数、插入位置、横向页尺寸与关系/内容类型"""
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from benchmarks.corpus import A4_LANDSCAPE, A4_PORTRAIT, make_scan, write_docx
+from GaiZhangYe.core.basic.ooxml_stamper import EMU_PER_TWIP, IMAGE_REL_TYPE, OoxmlStamper
+from GaiZhangYe.core.models.exceptions import WordProcessError
+
+
+@pytest.fixture(scope="module")
+def scans(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("scans")
+    paths = []
+    for seed, ext in ((1, "jpg"), (2, "png")):
+        path = directory / f"扫描{seed}.{ext}"
+        make_scan(seed, (200, 283)).save(path)
+        paths.append(path)
+    return paths
+
+
+def _read(path, part):
+    with zipfile.ZipFile(path) as package:
+        return package.read(part).decode("utf-8")
+
+
+def _anchor_paragraphs(document_xml):
+    """每个插入的图片所在段落的（页码, 段落序号）"""
+    found = []
+    for match in re.finditer(r"<wp:anchor\b", document_xml):
+        para_start = document_xml.rfind("<w:p>", 0, match.start())
+        text = re.search(r"第(\d+)页 第(\d+)段", document_xml[para_start:])
+        found.append((int(text.group(1)), int(text.group(2))))
+    return found
+
+
+def test_page_count(tmp_path):
+    for pages in (1, 2, 7):
+        path = tmp_path / f"{pages}.docx"
+        write_docx(path, pages)
+        assert OoxmlStamper().get_page_count(path) == pages
+
+
+def test_insert_at_page_starts(tmp_path, scans):
+    source, output = tmp_path / "合同.docx", tmp_path / "合同_盖章.docx"
+    write_docx(source, 5)
+    OoxmlStamper().insert_images(source, [(scans[0], 3), (scans[1], 1)], output)
+
+    document_xml = _read(output, "word/document.xml")
+    ET.fromstring(document_xml.encode("utf-8"))
+    assert _anchor_paragraphs(document_xml) == [(1, 1), (3, 1)]
+    extent = re.search(r'<wp:extent cx="(\d+)" cy="(\d+)"/>', document_xml)
+    assert (int(extent.group(1)), int(extent.group(2))) == tuple(v * EMU_PER_TWIP for v in A4_PORTRAIT)
+    assert 'behindDoc="0"' in document_xml
+
+    rels = ET.fromstring(_read(output, "word/_rels/document.xml.rels").encode("utf-8"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels if rel.get("Type") == IMAGE_REL_TYPE}
+    assert len(targets) == 2
+    assert set(re.findall(r'r:embed="([^"]+)"', document_xml)) == set(targets)
+    with zipfile.ZipFile(output) as package:
+        names = package.namelist()
+    assert all(f"word/{target}" in names for target in targets.values())
+    content_types = _read(output, "[Content_Types].xml")
+    assert 'Extension="jpg"' in content_types and 'Extension="png"' in content_types
+    assert OoxmlStamper().get_page_count(output) == 5
+
+
+def test_landscape_rotated(tmp_path, scans):
+    source = tmp_path / "横向.docx"
+    write_docx(source, 2, A4_LANDSCAPE)
+    OoxmlStamper(behind_text=True).insert_images(source, [(scans[0], 2)], source)
+
+    document_xml = _read(source, "word/document.xml")
+    width, height = A4_LANDSCAPE
+    assert f'<wp:extent cx="{height * EMU_PER_TWIP}" cy="{width * EMU_PER_TWIP}"/>' in document_xml
+    assert 'rot="5400000"' in document_xml
+    assert 'behindDoc="1"' in document_xml
+    assert _anchor_paragraphs(document_xml) == [(2, 1)]
+
+
+def test_out_of_range_page_clamped(tmp_path, scans):
+    source, output = tmp_path / "合同.docx", tmp_path / "out.docx"
+    write_docx(source, 3)
+    OoxmlStamper().insert_images(source, [(scans[0], 99), (scans[1], 0)], output)
+    assert sorted(_anchor_paragraphs(_read(output, "word/document.xml"))) == [(1, 1), (3, 1)]
+
+
+def test_invalid_inputs(tmp_path, scans):
+    doc = tmp_path / "旧格式.doc"
+    doc.write_bytes(b"\xd0\xcf\x11\xe0")
+    with pytest.raises(WordProcessError):
+        OoxmlStamper().insert_images(doc, [(scans[0], 1)], tmp_path / "out.doc")
+
+    source = tmp_path / "合同.docx"
+    write_docx(source, 2)
+    with pytest.raises(FileNotFoundError):
+        OoxmlStamper().insert_images(source, [(tmp_path / "missing.png", 1)], source)
+    with pytest.raises(WordProcessError):
+        OoxmlStamper().insert_images(source, [(scans[0], "第一页")], source)
@@ -0,0 +1,86 @@
+"""PDF图片提取：文件命名、去重与清单，并行与串行结果一致"""
+import io
+import json
+
+import pymupdf as fitz
+import pytest
+from PIL import Image
+
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+from GaiZhangYe.core.models.exceptions import PdfProcessError
+
+
+def _png(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def stamp_pdf(tmp_path):
+    """
+    第1页：红；第2页：绿、蓝；第3页：再次引用第1页的图片（同一xref）；
+    第4页：与绿色内容相同的另一个图片对象；第5页：无图片
+    """
+    red, green, blue = _png("red"), _png("green"), _png("blue")
+    path = tmp_path / "盖章件.pdf"
+    with fitz.open() as doc:
+        for _ in range(5):
+            doc.new_page()
+        red_xref = doc[0].insert_image(fitz.Rect(0, 0, 200, 150), stream=red)
+        doc[1].insert_image(fitz.Rect(0, 0, 200, 150), stream=green)
+        doc[1].insert_image(fitz.Rect(0, 200, 200, 350), stream=blue)
+        doc[2].insert_image(fitz.Rect(0, 0, 200, 150), xref=red_xref)
+        copy = fitz.open()
+        copy.new_page().insert_image(fitz.Rect(0, 0, 200, 150), stream=green)
+        doc[3].show_pdf_page(doc[3].rect, copy, 0)
+        doc.save(path)
+    return path
+
+
+def _manifest(output_dir, stem):
+    with open(output_dir / f"{stem}_images.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_extract_naming_and_manifest(stamp_pdf, tmp_path):
+    output_dir = tmp_path / "images"
+    images = PdfProcessor().extract_images(stamp_pdf, output_dir, mode="extract", workers=1)
+
+    assert [p.name for p in images] == ["盖章件_1.png", "盖章件_2.png", "盖章件_2_2.png"]
+    assert sorted(p.name for p in output_dir.glob("*.png")) == sorted(p.name for p in images)
+    manifest = _manifest(output_dir, "盖章件")
+    assert manifest["mode"] == "extract"
+    assert manifest["pages"] == {
+        "1": ["盖章件_1.png"],
+        "2": ["盖章件_2.png", "盖章件_2_2.png"],
+        "3": ["盖章件_1.png"],
+        "4": ["盖章件_2.png"],
+        "5": [],
+    }
+
+
+def test_auto_mode_renders_pages_without_images(stamp_pdf, tmp_path):
+    output_dir = tmp_path / "images"
+    images = PdfProcessor().extract_images(stamp_pdf, output_dir, dpi=36, mode="auto", workers=1)
+    assert images[-1].name == "盖章件_5.png"
+    assert _manifest(output_dir, "盖章件")["pages"]["5"] == ["盖章件_5.png"]
+
+
+def test_parallel_matches_serial(stamp_pdf, tmp_path, monkeypatch):
+    serial_dir, parallel_dir = tmp_path / "serial", tmp_path / "parallel"
+    processor = PdfProcessor()
+    serial = processor.extract_images(stamp_pdf, serial_dir, mode="extract", workers=1)
+
+    monkeypatch.setattr(get_settings(), "pdf_parallel_min_pages", 1)
+    parallel = processor.extract_images(stamp_pdf, parallel_dir, mode="extract", workers=3)
+
+    assert [p.name for p in parallel] == [p.name for p in serial]
+    assert sorted(p.name for p in parallel_dir.glob("*.png")) == sorted(p.name for p in serial)
+    assert _manifest(parallel_dir, "盖章件")["pages"] == _manifest(serial_dir, "盖章件")["pages"]
+
+
+def test_invalid_input(tmp_path):
+    with pytest.raises(PdfProcessError):
+        PdfProcessor().extract_images(tmp_path / "missing.pdf", tmp_path / "images")
@@ -0,0 +1,78 @@
+"""盖章页匹配：匈牙利算法与分配策略、端到端匹配"""
+import itertools
+import random
+
+import pytest
+
+from GaiZhangYe.core.basic.pdf_processor import PdfProcessor
+from GaiZhangYe.core.basic.stamp_matcher import (
+    HASH_BITS,
+    StampMatcher,
+    _assign,
+    _hungarian,
+    distance_matrix,
+)
+
+
+def _brute_force(cost):
+    """较小一侧的每个元素都分配时的最小总代价"""
+    n, m = len(cost), len(cost[0])
+    if n <= m:
+        return min(sum(cost[i][cols[i]] for i in range(n)) for cols in itertools.permutations(range(m), n))
+    return min(sum(cost[rows[j]][j] for j in range(m)) for rows in itertools.permutations(range(n), m))
+
+
+def _check_assignment(cost, result):
+    n, m = len(cost), len(cost[0])
+    assert len(result) == min(n, m)
+    assert len(set(result.values())) == len(result)
+    assert all(0 <= r < n and 0 <= c < m for r, c in result.items())
+    assert sum(cost[r][c] for r, c in result.items()) == _brute_force(cost)
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 3), (5, 5), (2, 5), (4, 6), (5, 2), (6, 4)])
+def test_hungarian_matches_brute_force(shape):
+    rng = random.Random(sum(shape))
+    for _ in range(20):
+        cost = [[rng.randint(0, 50) for _ in range(shape[1])] for _ in range(shape[0])]
+        _check_assignment(cost, _hungarian(cost))
+
+
+def test_hungarian_prefers_global_optimum_over_greedy():
+    # 贪心先取(0,0)=1会迫使(1,1)=100，最优为(0,1)+(1,0)=2+2
+    assert _hungarian([[1, 2], [2, 100]]) == {0: 1, 1: 0}
+
+
+def test_assign_sure_pairs_and_rest():
+    far = HASH_BITS // 2
+    distances = [
+        [3, far, far, far],          # 明确匹配第0页
+        [far, 60, 62, far],          # 与图片2争夺第1、2页
+        [far, 61, 100, far],
+    ]
+    assignment = _assign(distances)
+    assert assignment[0] == 0
+    assert {assignment[1], assignment[2]} == {1, 2}
+    # 总距离最小：图片1->页1、图片2->页2 为60+100，大于 图片1->页2、图片2->页1 的62+61
+    assert assignment == {0: 0, 1: 2, 2: 1}
+
+
+def test_assign_more_images_than_pages():
+    distances = [[10, 90], [80, 12], [50, 50]]
+    assert _assign(distances) == {0: 0, 1: 1}
+
+
+def test_match_extracted_images_to_pages(corpus, tmp_path):
+    stamp_pdf = corpus.stamp_pdfs[0]
+    images = PdfProcessor().extract_images(stamp_pdf, tmp_path / "images")
+    assert len(images) == 3
+
+    matcher = StampMatcher()
+    order = [2, 0, 1]
+    page_hashes = matcher.hash_pages([(stamp_pdf, index) for index in order])
+    image_hashes = matcher.hash_images(sorted(images, key=lambda p: int(p.stem.rsplit("_", 1)[1])))
+    assert len(distance_matrix(image_hashes, page_hashes)) == 3
+
+    matches = matcher.match(image_hashes, page_hashes)
+    assert [(m.image_index, order[m.page_index]) for m in matches] == [(0, 0), (1, 1), (2, 2)]
+    assert all(m.confidence > 0 for m in matches), matches
@@ -0,0 +1,191 @@
+"""功能2盖章：各插图引擎经模拟Word生成结果，.doc在OOXML方式下改用Word，本次运行的临时目录互不干扰，
+命中转换缓存时盖章页区间拼接进底稿"""
+import re
+import threading
+
+import pymupdf as fitz
+import pytest
+
+from benchmarks.corpus import write_docx
+from GaiZhangYe.utils.config import get_settings
+from GaiZhangYe.core.basic.artifact_store import conversion_cache_key, get_conversion_cache
+from GaiZhangYe.core.basic.ooxml_stamper import OoxmlStamper
+from GaiZhangYe.core.basic.word_processor import WordDocumentSession, WordProcessor
+from GaiZhangYe.core.stamp_overlay import StampOverlayService
+
+
+@pytest.fixture
+def targets(tmp_path):
+    target_dir = tmp_path / "targets"
+    for index, pages in ((1, 3), (2, 5)):
+        write_docx(target_dir / f"合同{index}.docx", pages)
+    return target_dir
+
+
+def _run(target_dir, output_dir, images, engine, configs=None):
+    return StampOverlayService().run(target_word_dir=target_dir, image_files=images, configs=configs,
+                                     result_word_dir=output_dir / "word", result_pdf_dir=output_dir / "pdf",
+                                     insert_engine=engine)
+
+
+@pytest.mark.parametrize("engine", ["word", "ooxml", "pdf"])
+def test_engines_produce_pdfs(fake_word, business_data, corpus, targets, tmp_path, engine):
+    results = _run(targets, tmp_path / "out", corpus.scans[:2], engine)
+
+    assert len(results) == 2
+    for index, pages in ((1, 3), (2, 5)):
+        with fitz.open(tmp_path / "out" / "pdf" / f"合同{index}.pdf") as doc:
+            assert doc.page_count == pages
+    assert not any((business_data / "func2" / ".temp").iterdir())
+
+
+def test_concurrent_pdf_runs(fake_word, business_data, corpus, targets, tmp_path, monkeypatch):
+    # 两次运行都转换完基准PDF后再继续，先结束的运行清理临时目录时另一运行仍在使用自己的基准PDF
+    barrier = threading.Barrier(2, timeout=30)
+    baseline_dirs = []
+    convert_baselines = StampOverlayService._convert_baselines
+
+    def convert_and_wait(self, word_files, baseline_dir):
+        baselines = convert_baselines(self, word_files, baseline_dir)
+        baseline_dirs.append(baseline_dir)
+        barrier.wait()
+        return baselines
+
+    monkeypatch.setattr(StampOverlayService, "_convert_baselines", convert_and_wait)
+    errors = []
+
+    def run(index):
+        try:
+            _run(targets, tmp_path / f"out{index}", corpus.scans[index * 2:index * 2 + 2], "pdf")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(baseline_dirs)) == 2
+    for index in range(2):
+        assert sorted(p.name for p in (tmp_path / f"out{index}" / "pdf").iterdir()) == ["合同1.pdf", "合同2.pdf"]
+    assert not any((business_data / "func2" / ".temp").iterdir())
+
+
+def test_ooxml_engine_routes_doc_to_word(fake_word, corpus, targets, tmp_path, monkeypatch):
+    # 模拟Word按内容识别格式，.doc以.docx内容代替
+    write_docx(targets / "旧合同.doc", 2)
+    stamped = []
+    insert_images = OoxmlStamper.insert_images
+
+    def record(self, word_path, images, output_path):
+        stamped.append(word_path.name)
+        return insert_images(self, word_path, images, output_path)
+
+    monkeypatch.setattr(OoxmlStamper, "insert_images", record)
+    results = _run(targets, tmp_path / "out", corpus.scans[:3], "ooxml")
+
+    assert sorted(p.name for p in results) == ["合同1.docx", "合同2.docx", "旧合同.docx"]
+    assert sorted(stamped) == ["合同1_temp.docx", "合同2_temp.docx"]
+    with fitz.open(tmp_path / "out" / "pdf" / "旧合同.pdf") as doc:
+        assert doc.page_count == 2
+
+
+@pytest.fixture
+def splice(fake_word, targets, tmp_path, monkeypatch):
+    """启用转换缓存并预先转换合同2.docx（5页）作为底稿；按调用记录 _splice_into_baseline 的（结果, 底稿路径）"""
+    monkeypatch.setenv("CONVERSION_CACHE_ENABLED", "true")
+    monkeypatch.setattr(get_settings(), "conversion_cache_enabled", True)
+    monkeypatch.setattr(get_settings(), "splice_stamped_export", True)
+    processor = WordProcessor()
+    try:
+        processor.word_to_pdf(targets / "合同2.docx", tmp_path / "primed.pdf")
+    finally:
+        processor.close()
+
+    calls = []
+    splice_into_baseline = StampOverlayService._splice_into_baseline
+
+    def record(self, session, baseline_pdf, *args):
+        spliced = splice_into_baseline(self, session, baseline_pdf, *args)
+        calls.append((spliced, baseline_pdf))
+        return spliced
+
+    monkeypatch.setattr(StampOverlayService, "_splice_into_baseline", record)
+    return calls
+
+
+def _stamp_pages(corpus, pages):
+    return {"合同2.docx": [{"image": str(scan), "position": page} for scan, page in zip(corpus.scans, pages)]}
+
+
+def _pages(pdf_path):
+    """输出PDF各页的（来源文档是否为盖章后文档, 页码, 是否有图片）；模拟Word的页面文字为“文档名 - 第N页”"""
+    with fitz.open(pdf_path) as doc:
+        pages = []
+        for page in doc:
+            text = page.get_text()
+            pages.append(("_temp" in text, int(re.search(r" - \D*(\d+)", text).group(1)), bool(page.get_images())))
+        return pages
+
+
+@pytest.mark.parametrize("engine", ["word", "ooxml"])
+def test_spliced_into_baseline(splice, business_data, corpus, targets, tmp_path, engine):
+    _run(targets, tmp_path / "out", corpus.scans[3:4], engine, _stamp_pages(corpus, [2, 3, 5]))
+
+    # 只有合同2有底稿；盖章页替换为区间导出的页面，页序不变
+    assert [spliced for spliced, _ in splice] == [True]
+    pages = _pages(tmp_path / "out" / "pdf" / "合同2.pdf")
+    assert [number for _, number, _ in pages] == [1, 2, 3, 4, 5]
+    if engine == "word":
+        # Word方式在"_temp"副本的会话中插图并导出区间，未盖章的第1、4页来自底稿
+        # （OOXML方式插入的图片模拟Word读不到，只校验页序）
+        assert [(exported, stamped) for exported, _, stamped in pages] == [
+            (False, False), (True, True), (True, True), (False, False), (True, True)]
+    assert not any((business_data / "func2" / ".temp").iterdir())
+
+
+def test_page_count_mismatch_exports_whole(splice, business_data, corpus, targets, tmp_path):
+    # 缓存中的底稿页数与盖章后文档不一致（4页/5页）
+    short = tmp_path / "short.docx"
+    write_docx(short, 4)
+    processor = WordProcessor()
+    try:
+        processor.word_to_pdf(short, tmp_path / "short.pdf")
+    finally:
+        processor.close()
+    get_conversion_cache().put(conversion_cache_key(targets / "合同2.docx"), tmp_path / "short.pdf")
+
+    _run(targets, tmp_path / "out", corpus.scans[3:4], "word", _stamp_pages(corpus, [2]))
+
+    assert [spliced for spliced, _ in splice] == [False]
+    assert _pages(tmp_path / "out" / "pdf" / "合同2.pdf") == [
+        (True, 1, False), (True, 2, True), (True, 3, False), (True, 4, False), (True, 5, False)]
+    assert not any((business_data / "func2" / ".temp").iterdir())
+
+
+def test_range_page_count_mismatch_exports_whole(splice, business_data, corpus, targets, tmp_path, monkeypatch):
+    # 区间导出只得到起始页（如分节导致的区间截断）
+    export_pdf = WordDocumentSession.export_pdf
+
+    def export_first_page(self, pdf_path, page_range=None):
+        export_pdf(self, pdf_path, (page_range[0], page_range[0]) if page_range else None)
+
+    monkeypatch.setattr(WordDocumentSession, "export_pdf", export_first_page)
+    _run(targets, tmp_path / "out", corpus.scans[3:4], "word", _stamp_pages(corpus, [2, 3]))
+
+    assert [spliced for spliced, _ in splice] == [False]
+    assert _pages(tmp_path / "out" / "pdf" / "合同2.pdf") == [
+        (True, 1, False), (True, 2, True), (True, 3, True), (True, 4, False), (True, 5, False)]
+
+
+def test_splice_files_per_call(splice, business_data, corpus, targets, tmp_path):
+    # 同一目标文件的两次运行各自使用独立目录中的底稿与区间PDF，不会互相覆盖或删除
+    for index in range(2):
+        _run(targets, tmp_path / f"out{index}", corpus.scans[3:4], "word", _stamp_pages(corpus, [2]))
+
+    assert [spliced for spliced, _ in splice] == [True, True]
+    assert splice[0][1].parent != splice[1][1].parent
+    assert splice[0][1].parent.parent == business_data / "func2" / ".temp"
+    assert not any((business_data / "func2" / ".temp").iterdir())
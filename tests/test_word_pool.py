@@ -0,0 +1,101 @@
+"""Word转换工作池：结果顺序、单文件失败、工作进程崩溃与超时；经模拟Word的COM后端"""
+import time
+from functools import partial
+
+import pymupdf as fitz
+import pytest
+
+from GaiZhangYe.core.basic.word_pool import ComWordBackend, FakeWordBackend, WordConversionPool
+
+
+def _page_count(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_com_backend_with_fake_word(fake_word, corpus, tmp_path, workers):
+    jobs = [(word, tmp_path / f"{word.stem}.pdf") for word in corpus.word_files]
+    seen = []
+    results = WordConversionPool(workers=workers, backend_factory=ComWordBackend, timeout=60).convert_all(
+        jobs, on_result=seen.append)
+
+    assert [r.source for r in results] == corpus.word_files
+    assert all(r.ok for r in results), [r.error for r in results]
+    assert len(seen) == len(jobs)
+    for result in results:
+        assert _page_count(result.output) == corpus.page_counts[result.source.name]
+
+
+def _word_files(directory, names):
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name in names:
+        path = directory / name
+        path.write_bytes(b"")
+        paths.append(path)
+    return paths
+
+
+def _jobs(word_files, output_dir):
+    return [(word, output_dir / f"{word.stem}.pdf") for word in word_files]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_results_in_natural_order(tmp_path, workers):
+    words = _word_files(tmp_path / "word", ["合同10.docx", "合同2.docx", "附件.docx", "合同1.docx", "合同02a.docx"])
+    results = WordConversionPool(workers=workers, backend_factory=FakeWordBackend, timeout=60).convert_all(
+        _jobs(words, tmp_path / "pdf"))
+
+    assert [r.source.name for r in results] == ["合同1.docx", "合同2.docx", "合同02a.docx", "合同10.docx", "附件.docx"]
+    assert all(r.ok and r.output.exists() for r in results)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_single_failure_does_not_stop_others(tmp_path, workers):
+    words = _word_files(tmp_path / "word", ["a1.docx", "bad2.docx", "a3.docx"])
+    seen = []
+    pool = WordConversionPool(workers=workers, backend_factory=partial(FakeWordBackend, fail_marker="bad"), timeout=60)
+    results = pool.convert_all(_jobs(words, tmp_path / "pdf") + [(tmp_path / "missing.docx", tmp_path / "x.pdf")],
+                               on_result=seen.append)
+
+    by_name = {r.source.name: r for r in results}
+    assert len(seen) == 4
+    assert by_name["a1.docx"].ok and by_name["a3.docx"].ok
+    assert "模拟转换失败" in by_name["bad2.docx"].error
+    assert not by_name["missing.docx"].ok
+    assert not (tmp_path / "pdf" / "bad2.pdf").exists()
+
+
+def test_worker_crash_replaced(tmp_path):
+    words = _word_files(tmp_path / "word", [f"doc{i}.docx" for i in range(1, 6)] + ["crash.docx"])
+    pool = WordConversionPool(workers=2, backend_factory=partial(FakeWordBackend, crash_marker="crash"), timeout=60)
+    results = pool.convert_all(_jobs(words, tmp_path / "pdf"))
+
+    by_name = {r.source.name: r for r in results}
+    assert "工作进程异常退出" in by_name["crash.docx"].error
+    assert all(r.ok for name, r in by_name.items() if name != "crash.docx")
+    assert len(results) == len(words)
+
+
+def test_timeout_terminates_worker(tmp_path):
+    words = _word_files(tmp_path / "word", ["slow1.docx", "slow2.docx"])
+    pool = WordConversionPool(workers=2, backend_factory=partial(FakeWordBackend, delay=30), timeout=1)
+    start = time.monotonic()
+    results = pool.convert_all(_jobs(words, tmp_path / "pdf"))
+
+    assert time.monotonic() - start < 20
+    assert all("转换超时" in r.error for r in results)
+    assert [r.source.name for r in results] == ["slow1.docx", "slow2.docx"]
+
+
+def test_worker_crash_on_start_gives_up(tmp_path):
+    # 工作进程在发送"ready"前退出（未抛出异常），连续数次后不再替换
+    words = _word_files(tmp_path / "word", ["a1.docx", "a2.docx", "a3.docx"])
+    pool = WordConversionPool(workers=2, backend_factory=partial(FakeWordBackend, crash_on_init=True), timeout=60)
+    start = time.monotonic()
+    results = pool.convert_all(_jobs(words, tmp_path / "pdf"))
+
+    assert time.monotonic() - start < 30
+    assert [r.source.name for r in results] == ["a1.docx", "a2.docx", "a3.docx"]
+    assert all("工作进程启动失败" in r.error for r in results)